@@ -23,11 +23,56 @@ class Settings:
     FIRECRAWL_API_KEY: str | None = os.getenv("FIRECRAWL_API_KEY")
     ZEP_API_KEY: str | None = os.getenv("ZEP_API_KEY")
     
+    # Models
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+    
+    # Chunking: "chars", or "tokens" to size document chunks with the embedding model's tokenizer
+    CHUNKING_MODE: str = os.getenv("CHUNKING_MODE", "chars").lower()
+    CHUNK_TOKENS: int = int(os.getenv("CHUNK_TOKENS", "256"))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+    
+    # Vector store: "auto" (exact NumPy search, moving to Milvus above EXACT_SEARCH_MAX_CHUNKS),
+    # "numpy" or "milvus"
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "auto").lower()
+    EXACT_SEARCH_MAX_CHUNKS: int = int(os.getenv("EXACT_SEARCH_MAX_CHUNKS", "20000"))
+    # Vector storage: "float32", "float16", "int8" or "binary"; with rescoring, the top
+    # VECTOR_RESCORE_FACTOR * k candidates are re-ranked by exact float32 distance
+    # (unset: 4 for float16/int8, 40 for binary)
+    VECTOR_PRECISION: str = os.getenv("VECTOR_PRECISION", "float32").lower()
+    VECTOR_RESCORE: bool = os.getenv("VECTOR_RESCORE", "true").lower() in ("1", "true", "yes")
+    VECTOR_RESCORE_FACTOR: int | None = int(os.getenv("VECTOR_RESCORE_FACTOR", "0")) or None
+    
+    # Caches
+    SCRAPE_CACHE_TTL_HOURS: float = float(os.getenv("SCRAPE_CACHE_TTL_HOURS", "24"))
+    SCRAPE_CACHE_MAX_ENTRIES: int = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "5000"))
+    TRANSCRIPT_CACHE_MAX_ENTRIES: int = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "500"))
+    TRANSCRIPT_CACHE_MAX_AGE_DAYS: float = float(os.getenv("TRANSCRIPT_CACHE_MAX_AGE_DAYS", "30"))
+    
+    # Uploads
+    UPLOAD_MAX_BYTES: int = int(float(os.getenv("UPLOAD_MAX_MB", "500")) * 1024 * 1024)
+    UPLOAD_CHUNK_BYTES: int = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+    
+    # Startup
+    WARMUP_ON_STARTUP: bool = os.getenv("WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+    
     # Paths
     BASE_DIR: Path = Path(__file__).parent.parent
     DATA_DIR: Path = BASE_DIR / "data"
     OUTPUTS_DIR: Path = BASE_DIR / "outputs"
     
+    # Sessions
+    SESSION_IDLE_TIMEOUT_MINUTES: int = int(os.getenv("SESSION_IDLE_TIMEOUT_MINUTES", "60"))
+    SESSION_MAX_ACTIVE: int = int(os.getenv("SESSION_MAX_ACTIVE", "8"))
+    SESSION_MAX_SESSIONS: int = int(os.getenv("SESSION_MAX_SESSIONS", "256"))
+    SESSION_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60"))
+    
+    # Podcast jobs
+    PODCAST_WORKERS: int = int(os.getenv("PODCAST_WORKERS", "2"))
+    PODCAST_QUEUE_SIZE: int = int(os.getenv("PODCAST_QUEUE_SIZE", "8"))
+    PODCAST_RETENTION_HOURS: int = int(os.getenv("PODCAST_RETENTION_HOURS", "72"))
+    PODCAST_MAX_EPISODES_PER_SESSION: int = int(os.getenv("PODCAST_MAX_EPISODES_PER_SESSION", "10"))
+    PODCAST_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("PODCAST_SWEEP_INTERVAL_SECONDS", "3600"))
+    
     @property
     def has_audio_processing(self) -> bool:
         return bool(self.ASSEMBLYAI_API_KEY)
@@ -5,14 +5,22 @@ FastAPI backend for the KnowledgeCast knowledge management platform.
 Run with: uvicorn api.main:app --reload --port 8000
 """
 
+import sys
+import time
 import logging
 from contextlib import asynccontextmanager
 
+_import_started = time.perf_counter()
+_modules_before = len(sys.modules)
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.config import settings
 from api.routes import sources_router, chat_router, podcast_router
+from api.sessions import session_manager, get_scrape_cache, get_transcript_cache
+from api.podcast_jobs import podcast_jobs
+from api.startup import startup_report, start_warmup
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,6 +28,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+startup_report.record_import(
+    "api.main",
+    time.perf_counter() - _import_started,
+    len(sys.modules) - _modules_before
+)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -28,8 +42,16 @@ async def lifespan(app: FastAPI):
     logger.info(f"Audio processing: {'enabled' if settings.has_audio_processing else 'disabled'}")
     logger.info(f"Web scraping: {'enabled' if settings.has_web_scraping else 'disabled'}")
     logger.info(f"Memory layer: {'enabled' if settings.has_memory else 'disabled'}")
+    session_manager.start_sweeper(settings.SESSION_SWEEP_INTERVAL_SECONDS)
+    podcast_jobs.start_sweeper(settings.PODCAST_SWEEP_INTERVAL_SECONDS)
+    if settings.WARMUP_ON_STARTUP:
+        start_warmup()
+    startup_report.mark_ready()
     yield
     logger.info("Shutting down KnowledgeCast API...")
+    session_manager.stop_sweeper()
+    podcast_jobs.stop_sweeper()
+    session_manager.close_all()
 
 
 app = FastAPI(
@@ -73,3 +95,20 @@ async def root():
 async def health_check():
     """Simple health check endpoint."""
     return {"status": "ok"}
+
+
+@app.get("/startup")
+async def startup():
+    """Startup timings: time to ready, feature import breakdown and warm-up."""
+    return startup_report.to_dict()
+
+
+@app.get("/metrics")
+async def metrics():
+    """Session eviction/residency metrics and cache counters."""
+    metrics = {"sessions": session_manager.metrics()}
+    if settings.has_web_scraping:
+        metrics["scrape_cache"] = get_scrape_cache().get_stats()
+    if settings.has_audio_processing:
+        metrics["transcript_cache"] = get_transcript_cache().get_stats()
+    return metrics
@@ -9,6 +9,13 @@ class URLRequest(BaseModel):
     urls: list[str] = Field(..., min_length=1)
 
 
+class CrawlRequest(BaseModel):
+    """Request model for site crawling."""
+    url: str = Field(..., pattern=r"^https?://")
+    max_depth: int = Field(default=2, ge=0, le=5)
+    max_pages: int = Field(default=50, ge=1, le=500)
+
+
 class YouTubeRequest(BaseModel):
     """Request model for YouTube processing."""
     url: str = Field(..., pattern=r"^https?://.*youtube.*|^https?://youtu\.be/.*")
@@ -23,6 +30,14 @@ class ChatRequest(BaseModel):
     """Request model for chat queries."""
     query: str = Field(..., min_length=1)
     session_id: str
+    # Source names to answer from; all of the session's sources when omitted or empty
+    sources: Optional[list[str]] = Field(default=None, max_length=256)
+
+
+class ChunksRequest(BaseModel):
+    """Request model for batched chunk lookup."""
+    session_id: str
+    ids: list[str] = Field(..., min_length=1, max_length=256)
 
 
 class ChatResetRequest(BaseModel):
@@ -47,6 +62,7 @@ class SourceResponse(BaseModel):
     uploaded_at: str
     url: Optional[str] = None
     video_id: Optional[str] = None
+    content_hash: Optional[str] = None
 
 
 class CitationResponse(BaseModel):
@@ -58,6 +74,22 @@ class CitationResponse(BaseModel):
     content: str
 
 
+class ChunkResponse(BaseModel):
+    """Response model for a stored chunk."""
+    id: str
+    content: str
+    source_file: str
+    source_type: str
+    page_number: Optional[int] = None
+    chunk_index: Optional[int] = None
+    metadata: dict = Field(default_factory=dict)
+
+
+class ChunksResponse(BaseModel):
+    """Response model for batched chunk lookup; unknown ids are omitted."""
+    chunks: list[ChunkResponse]
+
+
 class ChatResponse(BaseModel):
     """Response model for chat queries."""
     response: str
@@ -70,6 +102,20 @@ class PodcastScriptLine(BaseModel):
     text: str
 
 
+class PodcastJobResponse(BaseModel):
+    """Response model for a podcast generation job."""
+    id: str
+    status: str
+    source_name: str
+    style: str
+    duration: str
+    created_at: float
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    total_lines: int = 0
+    audio_url: Optional[str] = None
+
+
 class PodcastResponse(BaseModel):
     """Response model for generated podcast."""
     id: str
@@ -0,0 +1,416 @@
+"""Background podcast generation jobs with persistent artifacts."""
+
+import re
+import json
+import queue
+import shutil
+import time
+import uuid
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Session and job ids become directory names, so only plain names are accepted
+SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+class PodcastQueueFullError(Exception):
+    """Raised when the podcast job queue has no free slots."""
+
+
+@dataclass
+class ChunkLike:
+    """Simple class to match expected chunk interface."""
+    content: str
+
+
+@dataclass
+class PodcastJob:
+    """A podcast generation request tracked through script, tts and encode stages."""
+    
+    id: str
+    session_id: str
+    source_name: str
+    source_type: str
+    style: str
+    duration: str
+    artifact_dir: Path
+    status: str = "queued"
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    script: list[dict] = field(default_factory=list)
+    audio_file: str | None = None
+    future: Future = field(default_factory=Future, repr=False, compare=False)
+    
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+    
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "session_id": self.session_id,
+            "source_name": self.source_name,
+            "source_type": self.source_type,
+            "style": self.style,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "script": self.script,
+            "audio_file": self.audio_file,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict, artifact_dir: Path) -> "PodcastJob":
+        job = cls(artifact_dir=artifact_dir, **data)
+        job.future.set_result(job)
+        return job
+
+
+class PodcastJobManager:
+    """Runs podcast jobs on a bounded worker pool and keeps their artifacts on disk.
+    
+    Artifacts live under ``<output_dir>/<session_id>/<job_id>/`` together with
+    a ``job.json`` record, so a session's episode history survives restarts.
+    Finished jobs are evicted after ``retention_hours`` and once a session has
+    more than ``max_episodes_per_session`` of them: a session is trimmed when
+    one of its jobs finishes, and ``start_sweeper`` expires the rest on a timer.
+    """
+    
+    def __init__(
+        self,
+        output_dir: Path,
+        workers: int = 2,
+        queue_size: int = 8,
+        retention_hours: int = 72,
+        max_episodes_per_session: int = 10
+    ):
+        self.output_dir = Path(output_dir)
+        self.workers = workers
+        self.retention_hours = retention_hours
+        self.max_episodes_per_session = max_episodes_per_session
+        
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._jobs: dict[str, PodcastJob] = {}
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._sweeper: threading.Thread | None = None
+        self._stop_sweeper = threading.Event()
+    
+    def submit(self, lease, source_info: dict, style: str, duration: str) -> PodcastJob:
+        """Queue a podcast generation job for a session source.
+        
+        The job takes over the session ``lease`` and releases it when it
+        finishes, so the session cannot be evicted while the job is queued
+        or running. If the job cannot be queued the lease stays with the caller.
+        """
+        session = lease.session
+        job_id = str(uuid.uuid4())
+        artifact_dir = self._job_dir(session.id, job_id)
+        if artifact_dir is None:
+            raise ValueError(f"Invalid session id for podcast jobs: {session.id!r}")
+        
+        job = PodcastJob(
+            id=job_id,
+            session_id=session.id,
+            source_name=source_info["name"],
+            source_type=source_info["type"],
+            style=style,
+            duration=duration,
+            artifact_dir=artifact_dir
+        )
+        
+        with self._lock:
+            self._jobs[job.id] = job
+        self._save(job)
+        
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait((job, lease))
+        except queue.Full:
+            self._delete(job)
+            raise PodcastQueueFullError("Podcast queue is full, please try again later")
+        
+        logger.info(f"Queued podcast job {job.id} for session {session.id}")
+        return job
+    
+    def get(self, job_id: str, session_id: str | None = None) -> PodcastJob | None:
+        """Get a job by id, loading it from disk if it is not in memory."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        
+        if job is None and session_id:
+            job_dir = self._job_dir(session_id, job_id)
+            job = self._load(job_dir) if job_dir else None
+        
+        if job and session_id and job.session_id != session_id:
+            return None
+        return job
+    
+    def list_for_session(self, session_id: str) -> list[PodcastJob]:
+        """List a session's jobs, newest first."""
+        session_dir = self._job_dir(session_id)
+        if session_dir is None:
+            return []
+        
+        with self._lock:
+            jobs = {jid: job for jid, job in self._jobs.items() if job.session_id == session_id}
+        
+        if session_dir.is_dir():
+            for job_dir in session_dir.iterdir():
+                if job_dir.name not in jobs:
+                    job = self._load(job_dir)
+                    # A record copied or moved from another session's directory is not theirs
+                    if job and job.session_id == session_id:
+                        jobs[job.id] = job
+        
+        return sorted(jobs.values(), key=lambda j: j.created_at, reverse=True)
+    
+    def cleanup_session(self, session_id: str) -> int:
+        """Delete a session's finished jobs past retention and over the per-session cap."""
+        cutoff = time.time() - (self.retention_hours * 3600)
+        removed = 0
+        
+        finished = [j for j in self.list_for_session(session_id) if j.done]
+        for position, job in enumerate(finished):
+            expired = (job.finished_at or job.created_at) < cutoff
+            if expired or position >= self.max_episodes_per_session:
+                self._delete(job)
+                removed += 1
+        
+        if removed:
+            logger.info(f"Evicted {removed} podcast episodes from session {session_id}")
+        return removed
+    
+    def cleanup_expired(self) -> int:
+        """Apply ``cleanup_session`` to every session with episodes on disk."""
+        if not self.output_dir.is_dir():
+            return 0
+        
+        return sum(
+            self.cleanup_session(session_dir.name)
+            for session_dir in self.output_dir.iterdir()
+            if session_dir.is_dir()
+        )
+    
+    def start_sweeper(self, interval_seconds: int = 3600) -> None:
+        """Start a background thread that runs ``cleanup_expired`` periodically."""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        
+        self._stop_sweeper.clear()
+        
+        def sweep():
+            while not self._stop_sweeper.wait(interval_seconds):
+                try:
+                    self.cleanup_expired()
+                except Exception as e:
+                    logger.warning(f"Podcast retention sweep failed: {e}")
+        
+        self._sweeper = threading.Thread(target=sweep, name="podcast-sweeper", daemon=True)
+        self._sweeper.start()
+        logger.info(f"Podcast retention sweeper started (interval {interval_seconds}s)")
+    
+    def stop_sweeper(self) -> None:
+        """Stop the background retention sweeper."""
+        self._stop_sweeper.set()
+        if self._sweeper:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+    
+    def _job_dir(self, session_id: str, job_id: str | None = None) -> Path | None:
+        """Directory for a session's jobs, or one job, if the ids are safe path names."""
+        if not SAFE_ID.match(session_id or "") or (job_id is not None and not SAFE_ID.match(job_id)):
+            return None
+        session_dir = self.output_dir / session_id
+        return session_dir / job_id if job_id else session_dir
+    
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"podcast-worker-{len(self._threads)}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+    
+    def _worker_loop(self) -> None:
+        while True:
+            job, lease = self._queue.get()
+            try:
+                self._run(job, lease.session)
+            finally:
+                lease.release()
+                self._queue.task_done()
+    
+    def _run(self, job: PodcastJob, session) -> None:
+        job.started_at = time.time()
+        try:
+            self._generate(job, session)
+            self._set_status(job, "completed")
+        except Exception as e:
+            logger.exception(f"Podcast job {job.id} failed")
+            job.error = str(e)
+            self._set_status(job, "failed")
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+            job.future.set_result(job)
+        
+        # Only this session changed; other sessions expire on the sweeper's timer
+        try:
+            self.cleanup_session(job.session_id)
+        except Exception as e:
+            logger.warning(f"Podcast eviction failed: {e}")
+    
+    def _generate(self, job: PodcastJob, session) -> None:
+        from src.podcast.script_generator import PodcastScript
+        from src.vector_database.filters import field_equals
+        
+        self._set_status(job, "script")
+        
+        # Retrieve content from vector DB
+        query_embedding = session.embedding_generator.generate_query_embedding(
+            f"content from {job.source_name}"
+        )
+        search_results = session.vector_db.search(
+            query_embedding,
+            limit=50,
+            filter_expr=field_equals("source_file", job.source_name)
+        )
+        
+        if not search_results:
+            raise ValueError("No content found for this source")
+        
+        search_results.sort(key=lambda x: x.get('chunk_index', 0))
+        combined = "\n\n".join([r['content'] for r in search_results])
+        
+        script_gen = session.podcast_script_generator
+        tts = session.podcast_tts_generator
+        
+        if job.source_type == "Website":
+            script_lines = script_gen.generate_script_from_website(
+                website_chunks=[ChunkLike(content=r['content']) for r in search_results],
+                source_url=job.source_name,
+                podcast_style=job.style.lower(),
+                target_duration=job.duration
+            ).script
+        elif tts:
+            # Stream script lines straight into TTS so synthesis overlaps generation
+            script_lines = script_gen.stream_script_from_text(
+                text_content=combined,
+                podcast_style=job.style.lower(),
+                target_duration=job.duration
+            )
+        else:
+            script_lines = script_gen.generate_script_from_text(
+                text_content=combined,
+                source_name=job.source_name,
+                podcast_style=job.style.lower(),
+                target_duration=job.duration
+            ).script
+        
+        if tts:
+            self._synthesize(job, session, tts, script_lines)
+        else:
+            job.script = script_lines
+        
+        (job.artifact_dir / "script.json").write_text(PodcastScript(
+            script=job.script,
+            source_document=job.source_name,
+            total_lines=len(job.script),
+            estimated_duration=job.duration
+        ).to_json())
+    
+    def _synthesize(self, job: PodcastJob, session, tts, script_lines) -> None:
+        """Voice the script into ``podcast.wav``, keeping the script if audio fails."""
+        segments_dir = job.artifact_dir / "segments"
+        script_state = {"complete": False}
+        
+        def recorded_lines():
+            for line in script_lines:
+                job.script.append(line)
+                yield line
+            script_state["complete"] = True
+        
+        try:
+            audio_files, _ = tts.generate_podcast_audio_from_stream(
+                recorded_lines(),
+                output_dir=str(segments_dir),
+                combine_audio=True,
+                on_stage=lambda stage: self._set_status(job, stage)
+            )
+            
+            # Keep only the combined episode
+            for audio_file in audio_files:
+                if "complete_podcast" in Path(audio_file).name:
+                    final_path = job.artifact_dir / "podcast.wav"
+                    shutil.move(audio_file, final_path)
+                    job.audio_file = str(final_path)
+                    session.last_podcast_audio = job.audio_file
+                    break
+        except Exception as e:
+            # A failed script fails the job; failed audio leaves a script-only episode
+            if not script_state["complete"]:
+                raise
+            logger.error(f"Audio generation failed for podcast job {job.id}, keeping the script: {e}")
+        finally:
+            shutil.rmtree(segments_dir, ignore_errors=True)
+    
+    def _set_status(self, job: PodcastJob, status: str) -> None:
+        job.status = status
+        logger.info(f"Podcast job {job.id}: {status}")
+    
+    def _save(self, job: PodcastJob) -> None:
+        try:
+            job.artifact_dir.mkdir(parents=True, exist_ok=True)
+            (job.artifact_dir / "job.json").write_text(json.dumps(job.to_dict(), indent=2))
+        except OSError as e:
+            logger.warning(f"Could not persist podcast job {job.id}: {e}")
+    
+    def _load(self, job_dir: Path) -> PodcastJob | None:
+        record = job_dir / "job.json"
+        if not record.is_file():
+            return None
+        try:
+            job = PodcastJob.from_dict(json.loads(record.read_text()), job_dir)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Could not load podcast job from {job_dir}: {e}")
+            return None
+        
+        # A job recorded as running was interrupted by a restart
+        if not job.done:
+            job.status = "failed"
+            job.error = job.error or "Interrupted"
+        return job
+    
+    def _delete(self, job: PodcastJob) -> None:
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        shutil.rmtree(job.artifact_dir, ignore_errors=True)
+
+
+# Global podcast job manager
+podcast_jobs = PodcastJobManager(
+    output_dir=settings.OUTPUTS_DIR / "podcasts",
+    workers=settings.PODCAST_WORKERS,
+    queue_size=settings.PODCAST_QUEUE_SIZE,
+    retention_hours=settings.PODCAST_RETENTION_HOURS,
+    max_episodes_per_session=settings.PODCAST_MAX_EPISODES_PER_SESSION
+)
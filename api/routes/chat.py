@@ -3,7 +3,15 @@
 import logging
 from fastapi import APIRouter, HTTPException
 
-from api.models import ChatRequest, ChatResetRequest, ChatResponse, CitationResponse
+from api.models import (
+    ChatRequest,
+    ChatResetRequest,
+    ChatResponse,
+    CitationResponse,
+    ChunksRequest,
+    ChunkResponse,
+    ChunksResponse
+)
 from api.sessions import session_manager
 
 logger = logging.getLogger(__name__)
@@ -13,54 +21,93 @@ router = APIRouter(prefix="/api", tags=["chat"])
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Process chat query with RAG."""
-    session = session_manager.get(request.session_id)
-    if not session:
+    lease = session_manager.acquire(request.session_id)
+    if not lease:
         raise HTTPException(404, "Session not found. Please refresh and try again.")
     
-    if not session.sources:
-        raise HTTPException(400, "No sources available. Please add sources first.")
-    
-    try:
-        result = session.rag_generator.generate_response(request.query)
+    with lease as session:
+        if not session.sources:
+            raise HTTPException(400, "No sources available. Please add sources first.")
         
-        if session.memory:
-            try:
-                session.memory.save_conversation_turn(result)
-            except Exception as e:
-                logger.warning(f"Failed to save to memory: {e}")
+        if request.sources:
+            known = {source["name"] for source in session.sources}
+            unknown = sorted(set(request.sources) - known)
+            if unknown:
+                raise HTTPException(400, f"Unknown sources: {', '.join(unknown)}")
         
-        # Format citations
-        citations = []
-        for source in result.sources_used:
-            citations.append(CitationResponse(
-                reference=source.get("reference", ""),
-                source_file=source.get("source_file", "Unknown"),
-                page_number=source.get("page_number"),
-                chunk_id=source.get("chunk_id", ""),
-                content=source.get("content", "")[:500]  # Limit content length
-            ))
+        try:
+            result = session.rag_generator.generate_response(request.query, sources=request.sources)
+            
+            if session.memory:
+                try:
+                    session.memory.save_conversation_turn(result)
+                except Exception as e:
+                    logger.warning(f"Failed to save to memory: {e}")
+            
+            # Format citations
+            citations = []
+            for source in result.sources_used:
+                citations.append(CitationResponse(
+                    reference=source.get("reference", ""),
+                    source_file=source.get("source_file", "Unknown"),
+                    page_number=source.get("page_number"),
+                    chunk_id=source.get("chunk_id", ""),
+                    content=source.get("content", "")[:500]  # Limit content length
+                ))
+            
+            return ChatResponse(response=result.response, sources_used=citations)
+            
+        except Exception as e:
+            logger.exception("Chat query failed")
+            raise HTTPException(500, f"Failed to generate response: {str(e)}")
+
+
+@router.post("/chunks", response_model=ChunksResponse)
+async def get_chunks(request: ChunksRequest):
+    """Fetch several chunks (e.g. every citation of an answer) in one request."""
+    lease = session_manager.acquire(request.session_id)
+    if not lease:
+        raise HTTPException(404, "Session not found")
+    
+    with lease as session:
+        if not session.sources:
+            return ChunksResponse(chunks=[])
         
-        return ChatResponse(response=result.response, sources_used=citations)
+        try:
+            chunks = session.vector_db.get_chunks_by_ids(request.ids)
+        except Exception as e:
+            logger.exception("Chunk lookup failed")
+            raise HTTPException(500, f"Failed to fetch chunks: {str(e)}")
         
-    except Exception as e:
-        logger.exception("Chat query failed")
-        raise HTTPException(500, f"Failed to generate response: {str(e)}")
+        return ChunksResponse(chunks=[
+            ChunkResponse(
+                id=chunk["id"],
+                content=chunk["content"],
+                source_file=chunk["source_file"],
+                source_type=chunk["source_type"],
+                page_number=chunk["page_number"],
+                chunk_index=chunk["chunk_index"],
+                metadata=chunk["metadata"]
+            )
+            for chunk in chunks
+        ])
 
 
 @router.post("/chat/reset")
 async def reset_chat(request: ChatResetRequest):
     """Reset chat session."""
-    session = session_manager.get(request.session_id)
-    if not session:
+    lease = session_manager.acquire(request.session_id)
+    if not lease:
         raise HTTPException(404, "Session not found")
     
-    if session.memory:
-        try:
-            session.memory.clear_session()
-        except Exception as e:
-            logger.warning(f"Could not clear memory: {e}")
-    
-    import uuid
-    new_session_id = str(uuid.uuid4())
-    
-    return {"success": True, "new_session_id": new_session_id}
+    with lease as session:
+        if session.memory:
+            try:
+                session.memory.clear_session()
+            except Exception as e:
+                logger.warning(f"Could not clear memory: {e}")
+        
+        import uuid
+        new_session_id = str(uuid.uuid4())
+        
+        return {"success": True, "new_session_id": new_session_id}
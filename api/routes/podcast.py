@@ -1,123 +1,137 @@
 """API route handlers for podcast generation."""
 
 import os
-import uuid
 import time
+import asyncio
 import logging
-import tempfile
-from pathlib import Path
-from dataclasses import dataclass
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse
 
-from api.models import PodcastRequest, PodcastResponse
+from api.models import PodcastRequest, PodcastResponse, PodcastJobResponse
 from api.sessions import session_manager
+from api.podcast_jobs import podcast_jobs, PodcastJob, PodcastQueueFullError
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["podcast"])
 
 
-@dataclass
-class ChunkLike:
-    """Simple class to match expected chunk interface."""
-    content: str
+def _audio_url(job: PodcastJob) -> str | None:
+    if not job.audio_file:
+        return None
+    return f"/api/podcast/jobs/{job.id}/audio?session_id={job.session_id}"
 
 
-@router.post("/podcast/generate", response_model=PodcastResponse)
-async def generate_podcast(request: PodcastRequest, session_id: str = None):
-    """Generate podcast from source."""
+def _job_response(job: PodcastJob) -> PodcastJobResponse:
+    return PodcastJobResponse(
+        id=job.id,
+        status=job.status,
+        source_name=job.source_name,
+        style=job.style,
+        duration=job.duration,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        total_lines=len(job.script),
+        audio_url=_audio_url(job)
+    )
+
+
+def _submit_job(request: PodcastRequest, session_id: str | None) -> PodcastJob:
+    """Validate a podcast request and queue it as a job."""
     if not session_id:
         raise HTTPException(400, "Session ID is required")
     
-    session = session_manager.get(session_id)
-    if not session:
+    lease = session_manager.acquire(session_id)
+    if not lease:
         raise HTTPException(404, "Session not found")
     
-    if not session.podcast_script_generator:
-        raise HTTPException(400, "Podcast generation not available (missing GEMINI_API_KEY)")
-    
-    # Find source
-    source_info = next(
-        (s for s in session.sources if s["name"] == request.source_name),
-        None
-    )
-    if not source_info:
-        raise HTTPException(404, f"Source '{request.source_name}' not found")
-    
+    session = lease.session
     try:
-        # Retrieve content from vector DB
-        query_embedding = session.embedding_generator.generate_query_embedding(
-            f"content from {request.source_name}"
-        )
-        search_results = session.vector_db.search(
-            query_embedding,
-            limit=50,
-            filter_expr=f'source_file == "{request.source_name}"'
-        )
-        
-        if not search_results:
-            raise HTTPException(400, "No content found for this source")
-        
-        search_results.sort(key=lambda x: x.get('chunk_index', 0))
-        
-        # Generate script
-        script_gen = session.podcast_script_generator
-        
-        if source_info["type"] == "Website":
-            chunks = [ChunkLike(content=r['content']) for r in search_results]
-            podcast_script = script_gen.generate_script_from_website(
-                website_chunks=chunks,
-                source_url=request.source_name,
-                podcast_style=request.style.lower(),
-                target_duration=request.duration
-            )
-        else:
-            combined = "\n\n".join([r['content'] for r in search_results])
-            podcast_script = script_gen.generate_script_from_text(
-                text_content=combined,
-                source_name=request.source_name,
-                podcast_style=request.style.lower(),
-                target_duration=request.duration
-            )
+        if not session.podcast_script_generator:
+            raise HTTPException(400, "Podcast generation not available (missing GEMINI_API_KEY)")
         
-        # Generate audio if TTS available
-        audio_url = None
-        tts = session.podcast_tts_generator
-        
-        if tts:
-            try:
-                temp_dir = tempfile.mkdtemp(prefix="podcast_")
-                audio_files = tts.generate_podcast_audio(
-                    podcast_script=podcast_script,
-                    output_dir=temp_dir,
-                    combine_audio=True
-                )
-                
-                for audio_file in audio_files:
-                    if "complete_podcast" in Path(audio_file).name:
-                        session.last_podcast_audio = audio_file
-                        audio_url = f"/api/podcast/audio/{session.id}"
-                        break
-                        
-            except Exception as e:
-                logger.error(f"Audio generation failed: {e}")
-        
-        return PodcastResponse(
-            id=str(uuid.uuid4()),
-            total_lines=podcast_script.total_lines,
-            estimated_duration=podcast_script.estimated_duration,
-            script=podcast_script.script,
-            audio_url=audio_url,
-            source_name=request.source_name,
-            style=request.style
+        # Find source
+        source_info = next(
+            (s for s in session.sources if s["name"] == request.source_name),
+            None
         )
+        if not source_info:
+            raise HTTPException(404, f"Source '{request.source_name}' not found")
         
-    except HTTPException:
+        try:
+            return podcast_jobs.submit(lease, source_info, request.style, request.duration)
+        except PodcastQueueFullError as e:
+            raise HTTPException(503, str(e))
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+    except Exception:
+        # The queued job owns the lease; anything else hands it back
+        lease.release()
         raise
-    except Exception as e:
-        logger.exception("Podcast generation failed")
-        raise HTTPException(500, str(e))
+
+
+@router.post("/podcast/generate", response_model=PodcastResponse)
+async def generate_podcast(request: PodcastRequest, session_id: str = None):
+    """Generate podcast from source and wait for the result."""
+    job = _submit_job(request, session_id)
+    
+    await asyncio.wrap_future(job.future)
+    
+    if job.status == "failed":
+        raise HTTPException(500, job.error or "Podcast generation failed")
+    
+    return PodcastResponse(
+        id=job.id,
+        total_lines=len(job.script),
+        estimated_duration=job.duration,
+        script=job.script,
+        audio_url=_audio_url(job),
+        source_name=job.source_name,
+        style=job.style
+    )
+
+
+@router.post("/podcast/jobs", response_model=PodcastJobResponse, status_code=202)
+async def submit_podcast_job(request: PodcastRequest, session_id: str = None):
+    """Queue podcast generation and return immediately."""
+    return _job_response(_submit_job(request, session_id))
+
+
+@router.get("/podcast/jobs", response_model=list[PodcastJobResponse])
+async def list_podcast_jobs(session_id: str):
+    """List a session's podcast episodes, newest first.
+    
+    Episodes are read from disk, so they stay listed after the session is evicted.
+    """
+    return [_job_response(job) for job in podcast_jobs.list_for_session(session_id)]
+
+
+@router.get("/podcast/jobs/{job_id}")
+async def get_podcast_job(job_id: str, session_id: str):
+    """Get a podcast job's status and script."""
+    job = podcast_jobs.get(job_id, session_id)
+    if not job:
+        raise HTTPException(404, "Podcast job not found")
+    
+    return {**_job_response(job).model_dump(), "script": job.script}
+
+
+@router.get("/podcast/jobs/{job_id}/audio")
+async def download_podcast_job_audio(job_id: str, session_id: str):
+    """Download a past episode's audio."""
+    job = podcast_jobs.get(job_id, session_id)
+    if not job:
+        raise HTTPException(404, "Podcast job not found")
+    
+    if not job.audio_file or not os.path.exists(job.audio_file):
+        raise HTTPException(404, "Audio file not found for this episode")
+    
+    return FileResponse(
+        job.audio_file,
+        media_type="audio/wav",
+        filename=f"podcast_{job.id[:8]}.wav"
+    )
 
 
 @router.get("/podcast/audio/{session_id}")
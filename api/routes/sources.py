@@ -1,15 +1,20 @@
 """API route handlers for source ingestion."""
 
 import os
+import json
 import time
+import hashlib
 import logging
 import tempfile
 from pathlib import Path
 
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from api.models import URLRequest, YouTubeRequest, TextRequest, SourceResponse
+from api.models import URLRequest, CrawlRequest, YouTubeRequest, TextRequest, SourceResponse
 from api.sessions import session_manager
+from api.uploads import save_upload, UploadTooLargeError
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["sources"])
@@ -29,20 +34,89 @@ def create_source_response(name: str, source_type: str, size: str, chunks: int,
     }
 
 
+def _find_source(session, name: str) -> dict | None:
+    return next((s for s in session.sources if s["name"] == name), None)
+
+
+def _register_source(session, source_info: dict) -> dict:
+    """Add a source, replacing an earlier version with the same name."""
+    for i, source in enumerate(session.sources):
+        if source["name"] == source_info["name"]:
+            source_info["id"] = source["id"]
+            session.sources[i] = source_info
+            return source_info
+    session.sources.append(source_info)
+    return source_info
+
+
+def _duplicate_response(session, source_hash: str) -> dict | None:
+    """Response for a source whose exact content is already indexed, if any."""
+    name = session.fingerprints.find_source(source_hash)
+    source = _find_source(session, name) if name else None
+    if source is None:
+        return None
+    logger.info(f"Skipping duplicate source: {name}")
+    return {"success": True, "session_id": session.id, "source": source, "duplicate": True}
+
+
+def _index_chunks(
+    session,
+    source_name: str,
+    chunks: list,
+    source_hash: str | None = None,
+    token_sized: bool = False
+) -> dict:
+    """Embed and insert only the chunks that are new for this source.
+    
+    Chunks whose text is unchanged since the source was last indexed are kept
+    as they are, and chunks that disappeared are deleted. ``token_sized``
+    chunks fit the embedding model, so they are not checked for truncation.
+    """
+    from src.document_processing.chunk_batch import ChunkBatch
+    
+    for chunk in chunks:
+        chunk.source_file = source_name
+        chunk.refresh_chunk_id()
+    
+    batch = ChunkBatch.from_chunks(chunks)
+    diff = session.fingerprints.diff(source_name, batch)
+    
+    if len(session.sources) == 0:
+        session.vector_db.create_index(use_binary_quantization=False)
+    
+    session.vector_db.delete_embeddings(diff.stale_ids)
+    if diff.new_indices:
+        new_chunks = batch.select(diff.new_indices)
+        session.embedding_generator.embed_batch(new_chunks, check_truncation=not token_sized)
+        session.vector_db.upsert_batch(new_chunks)
+    
+    session.fingerprints.commit(source_name, diff, source_hash)
+    return {
+        "added": len(diff.new_indices),
+        "unchanged": diff.unchanged,
+        "removed": len(diff.stale_ids)
+    }
+
+
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
     session_id: str = Form(None)
 ):
     """Upload and process a document or audio file."""
-    session = session_manager.create(session_id)
+    lease = session_manager.acquire(session_id, create=True)
+    session = lease.session
+    upload = None
     
     try:
-        suffix = f".{file.filename.split('.')[-1]}"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            temp_path = tmp_file.name
+        try:
+            upload = await save_upload(file)
+        except UploadTooLargeError as e:
+            raise HTTPException(413, str(e))
+        
+        duplicate = _duplicate_response(session, upload.sha256)
+        if duplicate:
+            return duplicate
         
         # Determine file type and process
         is_audio = file.content_type and file.content_type.startswith('audio/')
@@ -50,168 +124,247 @@ async def upload_file(
         if is_audio:
             if not session.audio_transcriber:
                 raise HTTPException(400, "Audio processing not available (missing ASSEMBLYAI_API_KEY)")
-            chunks = session.audio_transcriber.transcribe_audio(temp_path)
+            chunks = session.audio_transcriber.transcribe_audio(
+                str(upload.path),
+                content_hash=upload.sha256
+            )
             source_type = "Audio"
+            token_sized = False
         else:
-            chunks = session.doc_processor.process_document(temp_path)
+            chunks = session.doc_processor.process_document(str(upload.path))
             source_type = "Document"
+            token_sized = session.doc_processor.token_sized
         
-        for chunk in chunks:
-            chunk.source_file = file.filename
-        
-        embedded_chunks = session.embedding_generator.generate_embeddings(chunks)
-        
-        if len(session.sources) == 0:
-            session.vector_db.create_index(use_binary_quantization=False)
-        
-        session.vector_db.insert_embeddings(embedded_chunks)
+        changes = _index_chunks(
+            session,
+            file.filename,
+            chunks,
+            source_hash=upload.sha256,
+            token_sized=token_sized
+        )
         
-        source_info = create_source_response(
+        source_info = _register_source(session, create_source_response(
             name=file.filename,
             source_type=source_type,
-            size=f"{len(content) / 1024:.1f} KB",
-            chunks=len(chunks)
-        )
-        session.sources.append(source_info)
-        
-        os.unlink(temp_path)
+            size=f"{upload.size / 1024:.1f} KB",
+            chunks=len(chunks),
+            content_hash=upload.sha256
+        ))
         
-        return {"success": True, "session_id": session.id, "source": source_info}
+        return {"success": True, "session_id": session.id, "source": source_info, "changes": changes}
         
     except HTTPException:
         raise
     except Exception as e:
         logger.exception("Upload failed")
         raise HTTPException(500, str(e))
+    finally:
+        lease.release()
+        if upload:
+            upload.cleanup()
+
+
+def _ingest_web_page(session, url: str, chunks: list) -> dict:
+    """Embed and index one scraped page and register it as a source."""
+    _index_chunks(session, url, chunks)
+    
+    return _register_source(session, create_source_response(
+        name=url,
+        source_type="Website",
+        size=f"{len(chunks)} chunks",
+        chunks=len(chunks),
+        url=url
+    ))
+
+
+def _ndjson_response(lease, results) -> StreamingResponse:
+    """Stream ``results`` as NDJSON, keeping the session leased until the stream ends.
+    
+    The lease is released when the generator finishes or is closed, and
+    again by the background task in case the client went away before the
+    stream started.
+    """
+    def ndjson():
+        try:
+            for result in results:
+                yield json.dumps({"session_id": lease.session.id, **result}) + "\n"
+        finally:
+            lease.release()
+    
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(lease.release)
+    )
 
 
 @router.post("/scrape")
-async def scrape_urls(request: URLRequest, session_id: str = None):
-    """Scrape and process web URLs."""
-    session = session_manager.create(session_id)
+async def scrape_urls(request: URLRequest, session_id: str = None, stream: bool = False):
+    """Scrape and process web URLs concurrently.
+    
+    With ``stream=true`` the response is NDJSON with one line per URL,
+    emitted as soon as that page has been scraped and indexed.
+    """
+    lease = session_manager.acquire(session_id, create=True)
+    session = lease.session
     
     if not session.web_scraper:
+        lease.release()
         raise HTTPException(400, "Web scraping not available (missing FIRECRAWL_API_KEY)")
     
-    processed = []
+    urls = [url.strip() for url in request.urls if url.strip()]
     
-    for url in request.urls:
-        try:
-            chunks = session.web_scraper.scrape_url(url.strip())
+    def ingest_results():
+        for url, chunks, error in session.web_scraper.iter_scrape_urls(urls):
+            if error is not None:
+                yield {"url": url, "success": False, "error": str(error)}
+                continue
             if not chunks:
+                yield {"url": url, "success": False, "error": "No content extracted"}
                 continue
             
-            for chunk in chunks:
-                chunk.source_file = url
-            
-            embedded_chunks = session.embedding_generator.generate_embeddings(chunks)
-            
-            if len(session.sources) == 0:
-                session.vector_db.create_index(use_binary_quantization=False)
-            
-            session.vector_db.insert_embeddings(embedded_chunks)
-            
-            source_info = create_source_response(
-                name=url,
-                source_type="Website",
-                size=f"{len(chunks)} chunks",
-                chunks=len(chunks),
-                url=url
-            )
-            session.sources.append(source_info)
-            processed.append(source_info)
-            
-        except Exception as e:
-            logger.error(f"Error scraping {url}: {e}")
+            try:
+                yield {"url": url, "success": True, "source": _ingest_web_page(session, url, chunks)}
+            except Exception as e:
+                logger.error(f"Error indexing {url}: {e}")
+                yield {"url": url, "success": False, "error": str(e)}
     
+    if stream:
+        return _ndjson_response(lease, ingest_results())
+    
+    try:
+        processed = [result["source"] for result in ingest_results() if result["success"]]
+    finally:
+        lease.release()
     return {"success": True, "session_id": session.id, "sources": processed}
 
 
-@router.post("/youtube")
-async def process_youtube(request: YouTubeRequest, session_id: str = None):
-    """Process YouTube video."""
-    session = session_manager.create(session_id)
+@router.post("/crawl")
+async def crawl_site(request: CrawlRequest, session_id: str = None, stream: bool = False):
+    """Crawl a site from a seed URL and index each new page as it arrives.
     
-    if not session.youtube_transcriber:
-        raise HTTPException(400, "YouTube processing not available (missing ASSEMBLYAI_API_KEY)")
+    With ``stream=true`` the response is NDJSON with one line per page.
+    """
+    lease = session_manager.acquire(session_id, create=True)
+    session = lease.session
     
-    try:
-        transcriber = session.youtube_transcriber
-        chunks = transcriber.transcribe_youtube_video(request.url, cleanup_audio=True)
-        
-        if not chunks:
-            raise HTTPException(400, "No transcript extracted from video")
-        
-        video_id = transcriber.extract_video_id(request.url)
-        video_name = f"YouTube Video {video_id}"
-        
-        for chunk in chunks:
-            chunk.source_file = video_name
-        
-        embedded_chunks = session.embedding_generator.generate_embeddings(chunks)
-        
-        if len(session.sources) == 0:
-            session.vector_db.create_index(use_binary_quantization=False)
-        
-        session.vector_db.insert_embeddings(embedded_chunks)
-        
-        source_info = create_source_response(
-            name=video_name,
-            source_type="YouTube",
-            size=f"{len(chunks)} segments",
-            chunks=len(chunks),
-            url=request.url,
-            video_id=video_id
+    if not session.web_scraper:
+        lease.release()
+        raise HTTPException(400, "Web scraping not available (missing FIRECRAWL_API_KEY)")
+    
+    def ingest_pages():
+        pages = session.web_scraper.crawl_site(
+            request.url,
+            max_depth=request.max_depth,
+            max_pages=request.max_pages
         )
-        session.sources.append(source_info)
-        
-        return {"success": True, "session_id": session.id, "source": source_info}
+        for url, chunks in pages:
+            try:
+                yield {"url": url, "success": True, "source": _ingest_web_page(session, url, chunks)}
+            except Exception as e:
+                logger.error(f"Error indexing {url}: {e}")
+                yield {"url": url, "success": False, "error": str(e)}
+    
+    if stream:
+        return _ndjson_response(lease, ingest_pages())
+    
+    try:
+        processed = [result["source"] for result in ingest_pages() if result["success"]]
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    finally:
+        lease.release()
+    
+    return {"success": True, "session_id": session.id, "sources": processed}
+
+
+@router.post("/youtube")
+async def process_youtube(request: YouTubeRequest, session_id: str = None):
+    """Process YouTube video."""
+    with session_manager.acquire(session_id, create=True) as session:
+        if not session.youtube_transcriber:
+            raise HTTPException(400, "YouTube processing not available (missing ASSEMBLYAI_API_KEY)")
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception("YouTube processing failed")
-        raise HTTPException(500, str(e))
+        try:
+            transcriber = session.youtube_transcriber
+            video_id = transcriber.extract_video_id(request.url)
+            source_hash = f"youtube:{video_id}"
+            
+            duplicate = _duplicate_response(session, source_hash)
+            if duplicate:
+                return duplicate
+            
+            chunks = transcriber.transcribe_youtube_video(request.url, cleanup_audio=True)
+            
+            if not chunks:
+                raise HTTPException(400, "No transcript extracted from video")
+            
+            video_name = f"YouTube Video {video_id}"
+            changes = _index_chunks(session, video_name, chunks, source_hash=source_hash)
+            
+            source_info = _register_source(session, create_source_response(
+                name=video_name,
+                source_type="YouTube",
+                size=f"{len(chunks)} segments",
+                chunks=len(chunks),
+                url=request.url,
+                video_id=video_id
+            ))
+            
+            return {"success": True, "session_id": session.id, "source": source_info, "changes": changes}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.exception("YouTube processing failed")
+            raise HTTPException(500, str(e))
 
 
 @router.post("/text")
 async def process_text(request: TextRequest, session_id: str = None):
     """Process pasted text."""
-    session = session_manager.create(session_id)
-    
-    try:
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as tmp:
-            tmp.write(request.content)
-            temp_path = tmp.name
+    with session_manager.acquire(session_id, create=True) as session:
+        source_hash = hashlib.sha256(request.content.encode("utf-8")).hexdigest()
+        duplicate = _duplicate_response(session, source_hash)
+        if duplicate:
+            return duplicate
         
-        chunks = session.doc_processor.process_document(temp_path)
-        
-        text_name = f"Text ({time.strftime('%H:%M')})"
-        for chunk in chunks:
-            chunk.source_file = text_name
-        
-        embedded_chunks = session.embedding_generator.generate_embeddings(chunks)
-        
-        if len(session.sources) == 0:
-            session.vector_db.create_index(use_binary_quantization=False)
-        
-        session.vector_db.insert_embeddings(embedded_chunks)
-        
-        source_info = create_source_response(
-            name=text_name,
-            source_type="Text",
-            size=f"{len(request.content)} chars",
-            chunks=len(chunks)
-        )
-        session.sources.append(source_info)
-        
-        os.unlink(temp_path)
-        
-        return {"success": True, "session_id": session.id, "source": source_info}
-        
-    except Exception as e:
-        logger.exception("Text processing failed")
-        raise HTTPException(500, str(e))
+        try:
+            with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt') as tmp:
+                tmp.write(request.content)
+                temp_path = tmp.name
+            
+            chunks = session.doc_processor.process_document(temp_path)
+            
+            base_name = text_name = f"Text ({time.strftime('%H:%M')})"
+            suffix = 2
+            while _find_source(session, text_name):
+                text_name = f"{base_name} {suffix}"
+                suffix += 1
+            
+            _index_chunks(
+                session,
+                text_name,
+                chunks,
+                source_hash=source_hash,
+                token_sized=session.doc_processor.token_sized
+            )
+            
+            source_info = _register_source(session, create_source_response(
+                name=text_name,
+                source_type="Text",
+                size=f"{len(request.content)} chars",
+                chunks=len(chunks),
+                content_hash=source_hash
+            ))
+            
+            os.unlink(temp_path)
+            
+            return {"success": True, "session_id": session.id, "source": source_info}
+            
+        except Exception as e:
+            logger.exception("Text processing failed")
+            raise HTTPException(500, str(e))
 
 
 @router.get("/sources")
@@ -227,14 +380,18 @@ async def get_sources(session_id: str):
 @router.delete("/sources/{source_name:path}")
 async def delete_source(source_name: str, session_id: str):
     """Delete a source from session."""
-    session = session_manager.get(session_id)
-    if not session:
+    lease = session_manager.acquire(session_id)
+    if not lease:
         raise HTTPException(404, "Session not found")
     
-    original_count = len(session.sources)
-    session.sources = [s for s in session.sources if s["name"] != source_name]
-    
-    if len(session.sources) == original_count:
-        raise HTTPException(404, "Source not found")
-    
-    return {"success": True, "message": "Source removed"}
+    with lease as session:
+        original_count = len(session.sources)
+        session.sources = [s for s in session.sources if s["name"] != source_name]
+        
+        if len(session.sources) == original_count:
+            raise HTTPException(404, "Source not found")
+        
+        session.fingerprints.forget(source_name)
+        session.vector_db.delete_by_source(source_name)
+        
+        return {"success": True, "message": "Source removed"}
@@ -1,194 +1,659 @@
 """Session management for the API."""
 
+import os
+import json
 import uuid
 import time
 import logging
-from typing import Any
+import threading
+from pathlib import Path
+from typing import Any, Callable
+from collections import OrderedDict
+from functools import lru_cache
 from dataclasses import dataclass, field
 
 from api.config import settings
+from api.startup import timed_import
+from api.podcast_jobs import SAFE_ID
+from src.vector_database.fingerprint_index import FingerprintIndex
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_scrape_cache():
+    """Scrape cache shared by every session's WebScraper."""
+    module = timed_import("src.web_scraping.scrape_cache")
+    return module.ScrapeCache(
+        db_path=str(settings.DATA_DIR / "scrape_cache.sqlite"),
+        ttl_seconds=settings.SCRAPE_CACHE_TTL_HOURS * 3600,
+        max_entries=settings.SCRAPE_CACHE_MAX_ENTRIES
+    )
+
+
+@lru_cache(maxsize=None)
+def get_transcript_cache():
+    """Transcript cache shared by every session's audio and YouTube transcribers."""
+    module = timed_import("src.audio_processing.transcript_cache")
+    return module.TranscriptCache(
+        db_path=str(settings.DATA_DIR / "transcript_cache.sqlite"),
+        max_entries=settings.TRANSCRIPT_CACHE_MAX_ENTRIES,
+        max_age_seconds=settings.TRANSCRIPT_CACHE_MAX_AGE_DAYS * 86400
+    )
+
+
 @dataclass
 class Session:
-    """Represents an active user session with all initialized components."""
+    """Represents an active user session.
+    
+    Each component is constructed lazily on first access, so a text-only
+    chat session never loads the transcription, scraping or TTS stacks.
+    """
     
     id: str
     created_at: float = field(default_factory=time.time)
+    last_accessed: float = field(default_factory=time.time)
     sources: list[dict] = field(default_factory=list)
     last_podcast_audio: str | None = None
+    fingerprints: FingerprintIndex = field(default_factory=FingerprintIndex, repr=False)
+    
+    # Components by name, and how long each took to build
+    _components: dict[str, Any] = field(default_factory=dict, repr=False)
+    _component_locks: dict[str, threading.Lock] = field(default_factory=dict, repr=False)
+    _locks_guard: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    init_timings: dict[str, float] = field(default_factory=dict)
     
-    # Components (initialized lazily)
-    _doc_processor: Any = None
-    _embedding_generator: Any = None
-    _vector_db: Any = None
-    _rag_generator: Any = None
-    _audio_transcriber: Any = None
-    _youtube_transcriber: Any = None
-    _web_scraper: Any = None
-    _podcast_script_generator: Any = None
-    _podcast_tts_generator: Any = None
-    _memory: Any = None
-    _initialized: bool = False
+    # Outstanding leases; guarded by the SessionManager lock
+    leases: int = field(default=0, repr=False)
+    # Deleted while leased, so closed when the last lease is released
+    retired: bool = field(default=False, repr=False)
     
     def initialize(self) -> None:
-        """Initialize all session components."""
-        if self._initialized:
-            return
-            
-        from src.document_processing.doc_processor import DocumentProcessor
-        from src.embeddings.embedding_generator import EmbeddingGenerator
-        from src.vector_database.milvus_vector_db import MilvusVectorDB
-        from src.generation.rag import RAGGenerator
-        
-        logger.info(f"Initializing session: {self.id}")
-        
-        self._doc_processor = DocumentProcessor()
-        self._embedding_generator = EmbeddingGenerator()
-        self._vector_db = MilvusVectorDB(
-            db_path=f"./data/milvus_{self.id[:8]}.db",
-            collection_name=f"collection_{self.id[:8]}"
-        )
-        
-        self._rag_generator = RAGGenerator(
-            embedding_generator=self._embedding_generator,
-            vector_db=self._vector_db,
-            gemini_api_key=settings.GEMINI_API_KEY
+        """Eagerly initialize all session components."""
+        for name in COMPONENT_NAMES:
+            getattr(self, name)
+    
+    @property
+    def initialized(self) -> bool:
+        return any(component is not None for component in self._components.values())
+    
+    def touch(self) -> None:
+        """Mark the session as recently used."""
+        self.last_accessed = time.time()
+    
+    @property
+    def busy(self) -> bool:
+        """Whether a request, stream or podcast job holds a lease on the session."""
+        return self.leases > 0
+    
+    def detach(self) -> dict[str, Any]:
+        """Take the built components out of the session; they are rebuilt on next access."""
+        with self._locks_guard:
+            components, self._components = self._components, {}
+        return components
+    
+    def state(self) -> dict:
+        """What a re-created session needs to match the stores it left on disk."""
+        return {
+            "sources": [dict(source) for source in self.sources],
+            "fingerprints": self.fingerprints.to_dict(),
+            "last_podcast_audio": self.last_podcast_audio,
+        }
+    
+    @classmethod
+    def from_state(cls, session_id: str, state: dict | None) -> "Session":
+        if not state:
+            return cls(id=session_id)
+        return cls(
+            id=session_id,
+            sources=state.get("sources", []),
+            fingerprints=FingerprintIndex.from_dict(state.get("fingerprints", {})),
+            last_podcast_audio=state.get("last_podcast_audio"),
         )
+    
+    def close(self) -> None:
+        """Release all components; they are rebuilt on next access.
         
-        # Optional components
-        if settings.has_audio_processing:
-            from src.audio_processing.audio_transcriber import AudioTranscriber
-            from src.audio_processing.youtube_transcriber import YouTubeTranscriber
-            self._audio_transcriber = AudioTranscriber(settings.ASSEMBLYAI_API_KEY)
-            self._youtube_transcriber = YouTubeTranscriber(settings.ASSEMBLYAI_API_KEY)
+        Sources stay attached and the vector store (Milvus Lite file or saved
+        NumPy matrix) stays on disk, so a closed session can be re-initialized
+        transparently.
+        """
+        close_components(self.id, self.detach())
+    
+    def _component(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Return a component, building it on first use (thread-safe)."""
+        if name in self._components:
+            return self._components[name]
         
-        if settings.has_web_scraping:
-            from src.web_scraping.web_scraper import WebScraper
-            self._web_scraper = WebScraper(settings.FIRECRAWL_API_KEY)
+        with self._locks_guard:
+            lock = self._component_locks.setdefault(name, threading.Lock())
         
-        if settings.GEMINI_API_KEY:
-            from src.podcast.script_generator import PodcastScriptGenerator
-            self._podcast_script_generator = PodcastScriptGenerator(settings.GEMINI_API_KEY)
+        with lock:
+            if name in self._components:
+                return self._components[name]
             
-            try:
-                from src.podcast.text_to_speech import PodcastTTSGenerator
-                self._podcast_tts_generator = PodcastTTSGenerator()
-            except ImportError:
-                logger.warning("TTS not available")
-        
-        if settings.has_memory:
-            from src.memory.memory_layer import NotebookMemoryLayer
-            self._memory = NotebookMemoryLayer(
-                user_id="api_user",
-                session_id=self.id,
-                create_new_session=True
+            start = time.perf_counter()
+            component = factory()
+            elapsed = time.perf_counter() - start
+            
+            self._components[name] = component
+            self.init_timings[name] = elapsed
+            logger.info(f"Session {self.id[:8]}: {name} initialized in {elapsed:.2f}s")
+            return component
+    
+    def _build_doc_processor(self):
+        module = timed_import("src.document_processing.doc_processor")
+        if settings.CHUNKING_MODE != "tokens":
+            return module.DocumentProcessor()
+        
+        tokenizer = self.embedding_generator.tokenizer
+        if tokenizer is None:
+            logger.warning("Embedding tokenizer unavailable; falling back to character chunking")
+            return module.DocumentProcessor()
+        
+        tokenizer, max_tokens = tokenizer
+        # Leave room for the [CLS]/[SEP] tokens the model adds
+        return module.DocumentProcessor(
+            tokenizer=tokenizer,
+            chunk_tokens=min(settings.CHUNK_TOKENS, max_tokens - 2),
+            chunk_overlap_tokens=settings.CHUNK_OVERLAP_TOKENS
+        )
+    
+    def _build_embedding_generator(self):
+        module = timed_import("src.embeddings.embedding_generator")
+        return module.EmbeddingGenerator(model_name=settings.EMBEDDING_MODEL)
+    
+    def _build_vector_db(self):
+        milvus_path = f"./data/milvus_{self.id[:8]}.db"
+        source_store_path = f"./data/sources_{self.id[:8]}.sqlite"
+        precision = {
+            "precision": settings.VECTOR_PRECISION,
+            "rescore": settings.VECTOR_RESCORE,
+            "rescore_factor": settings.VECTOR_RESCORE_FACTOR
+        }
+        
+        if settings.VECTOR_BACKEND == "milvus":
+            module = timed_import("src.vector_database.milvus_vector_db")
+            return module.MilvusVectorDB(
+                db_path=milvus_path,
+                collection_name=f"collection_{self.id[:8]}",
+                source_store_path=source_store_path,
+                **precision
+            )
+        
+        if settings.VECTOR_BACKEND == "numpy":
+            module = timed_import("src.vector_database.numpy_vector_db")
+            return module.NumpyVectorDB(
+                path=f"./data/vectors_{self.id[:8]}",
+                source_store_path=source_store_path,
+                **precision
             )
         
-        self._initialized = True
-        logger.info(f"Session {self.id} initialized successfully")
+        module = timed_import("src.vector_database.tiered_vector_db")
+        return module.TieredVectorDB(
+            vectors_path=f"./data/vectors_{self.id[:8]}",
+            milvus_path=milvus_path,
+            collection_name=f"collection_{self.id[:8]}",
+            source_store_path=source_store_path,
+            max_exact_chunks=settings.EXACT_SEARCH_MAX_CHUNKS,
+            **precision
+        )
+    
+    def _build_rag_generator(self):
+        module = timed_import("src.generation.rag")
+        return module.RAGGenerator(
+            embedding_generator=self.embedding_generator,
+            vector_db=self.vector_db,
+            gemini_api_key=settings.GEMINI_API_KEY
+        )
+    
+    def _build_audio_transcriber(self):
+        if not settings.has_audio_processing:
+            return None
+        module = timed_import("src.audio_processing.audio_transcriber")
+        return module.AudioTranscriber(settings.ASSEMBLYAI_API_KEY, cache=get_transcript_cache())
+    
+    def _build_youtube_transcriber(self):
+        if not settings.has_audio_processing:
+            return None
+        module = timed_import("src.audio_processing.youtube_transcriber")
+        return module.YouTubeTranscriber(settings.ASSEMBLYAI_API_KEY, cache=get_transcript_cache())
+    
+    def _build_web_scraper(self):
+        if not settings.has_web_scraping:
+            return None
+        module = timed_import("src.web_scraping.web_scraper")
+        return module.WebScraper(settings.FIRECRAWL_API_KEY, cache=get_scrape_cache())
+    
+    def _build_podcast_script_generator(self):
+        if not settings.GEMINI_API_KEY:
+            return None
+        module = timed_import("src.podcast.script_generator")
+        return module.PodcastScriptGenerator(settings.GEMINI_API_KEY)
+    
+    def _build_podcast_tts_generator(self):
+        if not settings.GEMINI_API_KEY:
+            return None
+        try:
+            module = timed_import("src.podcast.text_to_speech")
+            return module.PodcastTTSGenerator()
+        except ImportError:
+            logger.warning("TTS not available")
+            return None
+    
+    def _build_memory(self):
+        if not settings.has_memory:
+            return None
+        module = timed_import("src.memory.memory_layer")
+        return module.NotebookMemoryLayer(
+            user_id="api_user",
+            session_id=self.id,
+            create_new_session=True
+        )
     
     @property
     def doc_processor(self):
-        if not self._initialized:
-            self.initialize()
-        return self._doc_processor
+        return self._component("doc_processor", self._build_doc_processor)
     
     @property
     def embedding_generator(self):
-        if not self._initialized:
-            self.initialize()
-        return self._embedding_generator
+        return self._component("embedding_generator", self._build_embedding_generator)
     
     @property
     def vector_db(self):
-        if not self._initialized:
-            self.initialize()
-        return self._vector_db
+        return self._component("vector_db", self._build_vector_db)
     
     @property
     def rag_generator(self):
-        if not self._initialized:
-            self.initialize()
-        return self._rag_generator
+        return self._component("rag_generator", self._build_rag_generator)
     
     @property
     def audio_transcriber(self):
-        if not self._initialized:
-            self.initialize()
-        return self._audio_transcriber
+        return self._component("audio_transcriber", self._build_audio_transcriber)
     
     @property
     def youtube_transcriber(self):
-        if not self._initialized:
-            self.initialize()
-        return self._youtube_transcriber
+        return self._component("youtube_transcriber", self._build_youtube_transcriber)
     
     @property
     def web_scraper(self):
-        if not self._initialized:
-            self.initialize()
-        return self._web_scraper
+        return self._component("web_scraper", self._build_web_scraper)
     
     @property
     def podcast_script_generator(self):
-        if not self._initialized:
-            self.initialize()
-        return self._podcast_script_generator
+        return self._component("podcast_script_generator", self._build_podcast_script_generator)
     
     @property
     def podcast_tts_generator(self):
-        if not self._initialized:
-            self.initialize()
-        return self._podcast_tts_generator
+        return self._component("podcast_tts_generator", self._build_podcast_tts_generator)
     
     @property
     def memory(self):
-        if not self._initialized:
-            self.initialize()
-        return self._memory
+        return self._component("memory", self._build_memory)
+
+
+def session_state_path(session_id: str) -> Path:
+    return Path(f"./data/session_{session_id[:8]}.json")
+
+
+def read_session_state(session_id: str) -> dict | None:
+    """State saved when the session was last removed from memory, if any."""
+    if not SAFE_ID.match(session_id):
+        return None
+    try:
+        with open(session_state_path(session_id), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read saved state of session {session_id}: {e}")
+        return None
+
+
+def write_session_state(session_id: str, state: dict) -> None:
+    path = session_state_path(session_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def close_components(session_id: str, components: dict[str, Any]) -> None:
+    """Close components detached from a session."""
+    vector_db = components.get("vector_db")
+    if vector_db is not None:
+        vector_db.close()
+    
+    if components:
+        logger.info(f"Session {session_id} components released")
+
+
+class SessionLease:
+    """Keeps a session from being evicted or closed until released.
+    
+    Use it as a context manager around a request, or hand it to whatever
+    outlives the request (a streaming response, a queued job) and call
+    ``release`` when that finishes. Releasing twice is harmless.
+    """
+    
+    def __init__(self, manager: "SessionManager", session: Session):
+        self.manager = manager
+        self.session = session
+        self._released = False
+    
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.manager._release(self.session)
+    
+    def __enter__(self) -> Session:
+        return self.session
+    
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+COMPONENT_NAMES = (
+    "doc_processor",
+    "embedding_generator",
+    "vector_db",
+    "rag_generator",
+    "audio_transcriber",
+    "youtube_transcriber",
+    "web_scraper",
+    "podcast_script_generator",
+    "podcast_tts_generator",
+    "memory",
+)
 
 
 class SessionManager:
-    """Manages active sessions."""
+    """Manages active sessions.
+    
+    Sessions are kept in LRU order. Sessions idle for longer than
+    ``idle_timeout_minutes`` are closed and removed, at most ``max_sessions``
+    are kept, and at most ``max_active`` keep their heavy components
+    initialized; less recently used ones are closed and re-initialize on
+    next access. Sessions with an outstanding lease (see ``acquire``) are
+    never evicted or closed, so the caps may be exceeded while they are busy.
+    
+    A removed session's vector and source stores stay on disk, so its
+    sources and chunk fingerprints are saved beside them and restored when
+    the client uses the session id again.
     
-    def __init__(self):
-        self._sessions: dict[str, Session] = {}
+    Sessions are chosen and detached under the lock; their components are
+    closed, and their state written, after it is released.
+    """
+    
+    def __init__(
+        self,
+        idle_timeout_minutes: int = 60,
+        max_active: int = 8,
+        max_sessions: int = 256
+    ):
+        self.idle_timeout_minutes = idle_timeout_minutes
+        self.max_active = max_active
+        self.max_sessions = max_sessions
+        
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.RLock()
+        self._sweeper: threading.Thread | None = None
+        self._stop_sweeper = threading.Event()
+        # State of removed sessions until it is on disk; guarded by the lock
+        self._pending_states: dict[str, dict] = {}
+        self._state_write_lock = threading.Lock()
+        self._stats = {
+            "idle_evictions": 0,
+            "lru_evictions": 0,
+            "releases": 0,
+            "restores": 0,
+        }
     
     def create(self, session_id: str | None = None) -> Session:
         """Create a new session or return existing one."""
-        if not session_id:
-            session_id = str(uuid.uuid4())
-        
-        if session_id not in self._sessions:
-            self._sessions[session_id] = Session(id=session_id)
-        
-        return self._sessions[session_id]
+        return self._open(session_id, create=True)
     
     def get(self, session_id: str) -> Session | None:
-        """Get an existing session."""
-        return self._sessions.get(session_id)
+        """Get an existing session, restoring one removed from memory earlier."""
+        return self._open(session_id)
+    
+    def acquire(self, session_id: str | None, create: bool = False) -> SessionLease | None:
+        """Lease a session for the duration of some work.
+        
+        With ``create`` the session is created if needed, otherwise None is
+        returned for a session that is neither resident nor saved.
+        """
+        session = self._open(session_id, create=create, lease=True)
+        return SessionLease(self, session) if session else None
     
     def delete(self, session_id: str) -> bool:
-        """Delete a session."""
-        if session_id in self._sessions:
-            del self._sessions[session_id]
-            return True
-        return False
+        """Delete a session; a leased one is closed when its last lease is released."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            if session.busy:
+                session.retired = True
+                return True
+            self._stash_state(session)
+            closing = [(session.id, session.detach())]
+        
+        self._close_detached(closing)
+        return True
     
     def cleanup_old_sessions(self, max_age_hours: int = 24) -> int:
         """Remove sessions older than max_age_hours."""
         cutoff = time.time() - (max_age_hours * 3600)
-        old_sessions = [
-            sid for sid, session in self._sessions.items()
-            if session.created_at < cutoff
-        ]
-        for sid in old_sessions:
-            del self._sessions[sid]
-        return len(old_sessions)
+        with self._lock:
+            closing = self._remove(
+                sid for sid, session in self._sessions.items()
+                if session.created_at < cutoff
+            )
+        
+        self._close_detached(closing)
+        return len(closing)
+    
+    def cleanup_idle_sessions(self) -> int:
+        """Remove sessions not used within the idle timeout."""
+        cutoff = time.time() - (self.idle_timeout_minutes * 60)
+        with self._lock:
+            closing = self._remove(
+                sid for sid, session in self._sessions.items()
+                if session.last_accessed < cutoff
+            )
+            self._stats["idle_evictions"] += len(closing)
+        
+        for session_id, _ in closing:
+            logger.info(f"Evicting idle session: {session_id}")
+        self._close_detached(closing)
+        return len(closing)
+    
+    def metrics(self) -> dict[str, int]:
+        """Eviction counters and resident session counts."""
+        with self._lock:
+            return {
+                **self._stats,
+                "resident_sessions": len(self._sessions),
+                "initialized_sessions": sum(1 for s in self._sessions.values() if s.initialized),
+                "busy_sessions": sum(1 for s in self._sessions.values() if s.busy),
+            }
+    
+    def start_sweeper(self, interval_seconds: int = 60) -> None:
+        """Start a background thread that evicts idle sessions periodically."""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        
+        self._stop_sweeper.clear()
+        
+        def sweep():
+            while not self._stop_sweeper.wait(interval_seconds):
+                try:
+                    self.cleanup_idle_sessions()
+                    with self._lock:
+                        closing = self._enforce_limits()
+                    self._close_detached(closing)
+                except Exception as e:
+                    logger.warning(f"Session sweep failed: {e}")
+        
+        self._sweeper = threading.Thread(target=sweep, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+        logger.info(f"Session sweeper started (interval {interval_seconds}s)")
+    
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper."""
+        self._stop_sweeper.set()
+        if self._sweeper:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+    
+    def close_all(self) -> None:
+        """Close every session, e.g. on shutdown, leased or not."""
+        with self._lock:
+            for session in self._sessions.values():
+                self._stash_state(session)
+            closing = [(session.id, session.detach()) for session in self._sessions.values()]
+            self._sessions.clear()
+        self._close_detached(closing)
+    
+    def _release(self, session: Session) -> None:
+        with self._lock:
+            session.leases -= 1
+            session.touch()
+            if session.retired and not session.busy:
+                self._stash_state(session)
+                closing = [(session.id, session.detach())]
+            else:
+                # Caps skipped while sessions were busy apply again
+                closing = self._enforce_limits()
+        
+        self._close_detached(closing)
+    
+    def _open(self, session_id: str | None, create: bool = False, lease: bool = False) -> Session | None:
+        if not session_id:
+            if not create:
+                return None
+            session_id = str(uuid.uuid4())
+        
+        with self._lock:
+            resident = session_id in self._sessions
+            if resident:
+                session, closing = self._enter(session_id, lease)
+        
+        if not resident:
+            # State writes hold this lock, so the stash and the saved file agree
+            with self._state_write_lock:
+                with self._lock:
+                    state = self._pending_states.get(session_id)
+                if state is None:
+                    state = read_session_state(session_id)
+                if state is None and not create:
+                    return None
+                with self._lock:
+                    session, closing = self._enter(session_id, lease, state)
+        
+        self._close_detached(closing)
+        return session
+    
+    def _enter(
+        self,
+        session_id: str,
+        lease: bool,
+        state: dict | None = None
+    ) -> tuple[Session, list[tuple[str, dict[str, Any]]]]:
+        """Use a session, re-creating it from its saved state if it is not resident.
+        
+        Caller holds the lock and closes the returned components after releasing it.
+        """
+        if session_id not in self._sessions:
+            state = self._pending_states.get(session_id) or state
+            if state is not None:
+                self._stats["restores"] += 1
+                logger.info(f"Restoring session {session_id} with {len(state.get('sources', []))} sources")
+            self._sessions[session_id] = Session.from_state(session_id, state)
+        
+        session = self._use(session_id)
+        if lease:
+            session.leases += 1
+        return session, self._enforce_limits(keep=session_id)
+    
+    def _use(self, session_id: str) -> Session:
+        session = self._sessions[session_id]
+        self._sessions.move_to_end(session_id)
+        session.touch()
+        return session
+    
+    def _remove(self, session_ids) -> list[tuple[str, dict[str, Any]]]:
+        """Pop and detach the given sessions, except busy ones. Caller holds the lock."""
+        closing = []
+        for session_id in list(session_ids):
+            if self._sessions[session_id].busy:
+                continue
+            session = self._sessions.pop(session_id)
+            self._stash_state(session)
+            closing.append((session.id, session.detach()))
+        return closing
+    
+    def _enforce_limits(self, keep: str | None = None) -> list[tuple[str, dict[str, Any]]]:
+        """Apply the session and active-session caps in LRU order, skipping busy sessions.
+        
+        Caller holds the lock and closes the returned components after releasing it.
+        """
+        closing = []
+        
+        excess = len(self._sessions) - self.max_sessions
+        if excess > 0:
+            evictable = [sid for sid, s in self._sessions.items() if sid != keep and not s.busy]
+            for session_id in evictable[:excess]:
+                self._stats["lru_evictions"] += 1
+                logger.info(f"Evicting least recently used session: {session_id}")
+            closing += self._remove(evictable[:excess])
+        
+        # The kept session is about to be used, so reserve a slot for it
+        active_budget = self.max_active - (1 if keep else 0)
+        active = [s for sid, s in self._sessions.items() if s.initialized and sid != keep]
+        idle = [s for s in active if not s.busy]
+        for session in idle[:max(0, len(active) - active_budget)]:
+            self._stats["releases"] += 1
+            logger.info(f"Releasing components of least recently used session: {session.id}")
+            closing.append((session.id, session.detach()))
+        
+        return closing
+    
+    def _stash_state(self, session: Session) -> None:
+        """Keep a removed session's state until ``_save_state`` writes it. Caller holds the lock."""
+        self._pending_states[session.id] = session.state()
+    
+    def _save_state(self, session_id: str) -> None:
+        with self._state_write_lock:
+            with self._lock:
+                state = self._pending_states.get(session_id)
+            if state is None:
+                return
+            
+            try:
+                write_session_state(session_id, state)
+            except Exception as e:
+                logger.warning(f"Error saving state of session {session_id}: {e}")
+                return
+            
+            with self._lock:
+                # A newer stash is written by whoever made it
+                if self._pending_states.get(session_id) is state:
+                    del self._pending_states[session_id]
+    
+    def _close_detached(self, closing: list[tuple[str, dict[str, Any]]]) -> None:
+        for session_id, components in closing:
+            try:
+                close_components(session_id, components)
+            except Exception as e:
+                logger.warning(f"Error closing session {session_id}: {e}")
+            self._save_state(session_id)
 
 
 # Global session manager
-session_manager = SessionManager()
+session_manager = SessionManager(
+    idle_timeout_minutes=settings.SESSION_IDLE_TIMEOUT_MINUTES,
+    max_active=settings.SESSION_MAX_ACTIVE,
+    max_sessions=settings.SESSION_MAX_SESSIONS
+)
@@ -0,0 +1,112 @@
+"""Startup timing report and optional background warm-up."""
+
+import sys
+import time
+import logging
+import importlib
+import threading
+from types import ModuleType
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Collects import and warm-up timings for the /startup endpoint.
+    
+    Import timings are cumulative, like ``python -X importtime``: each entry
+    is the wall time of the first import of a feature module including all
+    of the dependencies it pulled in.
+    """
+    
+    def __init__(self):
+        self.process_started_at = time.time()
+        self.ready_at: float | None = None
+        self.imports: dict[str, dict] = {}
+        self.warmup: dict[str, float] = {}
+        self.warmup_status = "disabled"
+        self._lock = threading.Lock()
+    
+    def mark_ready(self) -> None:
+        self.ready_at = time.time()
+        logger.info(f"API ready in {self.ready_at - self.process_started_at:.2f}s")
+    
+    def record_import(self, module_name: str, seconds: float, new_modules: int) -> None:
+        with self._lock:
+            self.imports[module_name] = {
+                "seconds": round(seconds, 4),
+                "modules_loaded": new_modules,
+            }
+    
+    def record_warmup(self, step: str, seconds: float) -> None:
+        with self._lock:
+            self.warmup[step] = round(seconds, 4)
+    
+    def to_dict(self) -> dict:
+        with self._lock:
+            imports = dict(sorted(
+                self.imports.items(),
+                key=lambda item: item[1]["seconds"],
+                reverse=True
+            ))
+            return {
+                "time_to_ready_seconds": (
+                    round(self.ready_at - self.process_started_at, 4) if self.ready_at else None
+                ),
+                "imports": imports,
+                "warmup_status": self.warmup_status,
+                "warmup": dict(self.warmup),
+                "modules_loaded": len(sys.modules),
+            }
+
+
+startup_report = StartupReport()
+
+
+def timed_import(module_name: str) -> ModuleType:
+    """Import a module, recording its cumulative import time on first load."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    
+    modules_before = len(sys.modules)
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+    
+    startup_report.record_import(module_name, elapsed, len(sys.modules) - modules_before)
+    logger.info(f"Imported {module_name} in {elapsed:.2f}s")
+    return module
+
+
+def start_warmup() -> threading.Thread:
+    """Preload the shared embedding model, and a Milvus Lite client if forced, in the background."""
+    
+    def warm_up():
+        startup_report.warmup_status = "running"
+        try:
+            start = time.perf_counter()
+            embeddings = timed_import("src.embeddings.embedding_generator")
+            embeddings.get_shared_model(settings.EMBEDDING_MODEL)
+            startup_report.record_warmup("embedding_model", time.perf_counter() - start)
+            
+            # Sessions start on exact NumPy search unless Milvus is forced
+            if settings.VECTOR_BACKEND == "milvus":
+                start = time.perf_counter()
+                timed_import("src.vector_database.milvus_vector_db")
+                from pymilvus import MilvusClient
+                settings.DATA_DIR.mkdir(parents=True, exist_ok=True)
+                client = MilvusClient(uri=str(settings.DATA_DIR / "warmup.db"))
+                client.close()
+                startup_report.record_warmup("milvus_client", time.perf_counter() - start)
+            
+            startup_report.warmup_status = "completed"
+            logger.info("Warm-up completed")
+        except Exception as e:
+            startup_report.warmup_status = f"failed: {e}"
+            logger.warning(f"Warm-up failed: {e}")
+    
+    thread = threading.Thread(target=warm_up, name="startup-warmup", daemon=True)
+    thread.start()
+    return thread
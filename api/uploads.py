@@ -0,0 +1,87 @@
+"""Streaming upload storage with on-the-fly hashing and size limits."""
+
+import os
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from dataclasses import dataclass
+
+from fastapi import UploadFile
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+    
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes / (1024 * 1024):.0f} MB limit")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class StoredUpload:
+    """An upload copied to disk, with its size and SHA-256 content hash."""
+    
+    path: Path
+    filename: str
+    content_type: str | None
+    size: int
+    sha256: str
+    
+    def cleanup(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+async def save_upload(
+    file: UploadFile,
+    max_bytes: int | None = None,
+    chunk_size: int | None = None
+) -> StoredUpload:
+    """Copy an upload to a temp file in fixed-size chunks.
+    
+    The hash and size are computed while copying, so the file is never held in
+    memory as a whole. Oversized uploads are rejected as soon as the limit is
+    crossed and the partial file is removed.
+    """
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_BYTES
+    
+    # Starlette reports the size of the spooled upload when it knows it
+    if getattr(file, "size", None) and file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+    
+    suffix = Path(file.filename or "").suffix
+    fd, temp_path = tempfile.mkstemp(suffix=suffix)
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = await file.read(chunk_size)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                digest.update(block)
+                out.write(block)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    
+    logger.info(f"Stored upload {file.filename}: {size / 1024:.1f} KB")
+    return StoredUpload(
+        path=Path(temp_path),
+        filename=file.filename,
+        content_type=file.content_type,
+        size=size,
+        sha256=digest.hexdigest()
+    )
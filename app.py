@@ -99,6 +99,7 @@ def create_interactive_citations(response_text: str, sources_used: List[Dict[str
 from src.document_processing.doc_processor import DocumentProcessor
 from src.embeddings.embedding_generator import EmbeddingGenerator
 from src.vector_database.milvus_vector_db import MilvusVectorDB
+from src.vector_database.filters import field_equals
 from src.generation.rag import RAGGenerator
 from src.memory.memory_layer import NotebookMemoryLayer
 from src.audio_processing.audio_transcriber import AudioTranscriber
@@ -412,6 +413,7 @@ def process_uploaded_files(uploaded_files):
                         
                         for chunk in chunks:
                             chunk.source_file = uploaded_file.name
+                            chunk.refresh_chunk_id()
                     else:
                         st.warning(f"Audio processing not available for {uploaded_file.name}")
                         os.unlink(temp_path)
@@ -422,6 +424,7 @@ def process_uploaded_files(uploaded_files):
                     
                     for chunk in chunks:
                         chunk.source_file = uploaded_file.name
+                        chunk.refresh_chunk_id()
                 
                 if chunks:
                     embedded_chunks = pipeline['embedding_generator'].generate_embeddings(chunks)
@@ -429,7 +432,7 @@ def process_uploaded_files(uploaded_files):
                     if len(st.session_state.sources) == 0:
                         pipeline['vector_db'].create_index(use_binary_quantization=False)
                     
-                    pipeline['vector_db'].insert_embeddings(embedded_chunks)
+                    pipeline['vector_db'].upsert_embeddings(embedded_chunks)
                     
                     source_info = {
                         'name': uploaded_file.name,
@@ -467,13 +470,14 @@ def process_urls(urls_text):
                 if chunks:
                     for chunk in chunks:
                         chunk.source_file = url
+                        chunk.refresh_chunk_id()
                     
                     embedded_chunks = pipeline['embedding_generator'].generate_embeddings(chunks)
                     # Create index if first document
                     if len(st.session_state.sources) == 0:
                         pipeline['vector_db'].create_index(use_binary_quantization=False)
                     
-                    pipeline['vector_db'].insert_embeddings(embedded_chunks)
+                    pipeline['vector_db'].upsert_embeddings(embedded_chunks)
                     source_info = {
                         'name': url,
                         'type': "Website",
@@ -506,13 +510,14 @@ def process_youtube_video(youtube_url):
                 video_name = f"YouTube Video {video_id}"
                 for chunk in chunks:
                     chunk.source_file = video_name
+                    chunk.refresh_chunk_id()
                 
                 embedded_chunks = pipeline['embedding_generator'].generate_embeddings(chunks)
                 
                 if len(st.session_state.sources) == 0:
                     pipeline['vector_db'].create_index(use_binary_quantization=False)
                 
-                pipeline['vector_db'].insert_embeddings(embedded_chunks)
+                pipeline['vector_db'].upsert_embeddings(embedded_chunks)
                 
                 source_info = {
                     'name': video_name,
@@ -549,6 +554,7 @@ def process_text(text_content):
             original_name = f"Pasted Text ({time.strftime('%H:%M')})"
             for chunk in chunks:
                 chunk.source_file = original_name
+                chunk.refresh_chunk_id()
             
             if chunks:
                 embedded_chunks = pipeline['embedding_generator'].generate_embeddings(chunks)
@@ -556,7 +562,7 @@ def process_text(text_content):
                 if len(st.session_state.sources) == 0:
                     pipeline['vector_db'].create_index(use_binary_quantization=False)
                 
-                pipeline['vector_db'].insert_embeddings(embedded_chunks)
+                pipeline['vector_db'].upsert_embeddings(embedded_chunks)
                 
                 source_info = {
                     'name': original_name,
@@ -775,7 +781,7 @@ def generate_podcast(selected_source: str, podcast_style: str, podcast_length: s
                 search_results = pipeline['vector_db'].search(
                     query_embedding, 
                     limit=50,
-                    filter_expr=f'source_file == "{selected_source}"'
+                    filter_expr=field_equals("source_file", selected_source)
                 )
                 
                 if not search_results:
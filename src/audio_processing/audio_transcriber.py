@@ -1,13 +1,17 @@
 import logging
 import os
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Union
 from dataclasses import dataclass
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import json
+from bisect import bisect_right
 
 import assemblyai as aai
 from src.document_processing.doc_processor import DocumentChunk
+from src.document_processing.chunking import TextChunker, PROSE_BOUNDARIES, TRANSCRIPT_BOUNDARIES
+from src.audio_processing.transcript_cache import TranscriptCache, CachedTranscript, hash_file
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,9 +36,18 @@ class SpeakerSegment:
 
 
 class AudioTranscriber:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        cache: Optional[TranscriptCache] = None
+    ):
         self.api_key = api_key
+        self.cache = cache
         aai.settings.api_key = api_key
+        if base_url:
+            # e.g. a local stand-in for the AssemblyAI API
+            aai.settings.base_url = base_url
         
         self.supported_formats = {
             '.mp3', '.wav', '.m4a', '.aac', '.ogg', 
@@ -50,15 +63,23 @@ class AudioTranscriber:
         enable_auto_punctuation: bool = True,
         audio_language: str = "en",
         chunk_size: int = 1000,
-        chunk_overlap: int = 100
+        chunk_overlap: int = 100,
+        content_hash: Optional[str] = None
     ) -> List[DocumentChunk]:
         
-        audio_path = Path(audio_path)
+        audio_path = self._validate_audio_path(audio_path)
         
-        if not audio_path.exists():
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
-        if audio_path.suffix.lower() not in self.supported_formats:
-            raise ValueError(f"Unsupported audio format: {audio_path.suffix}")
+        cache_key = None
+        if self.cache:
+            cache_key = self._cache_key(
+                content_hash or hash_file(str(audio_path)),
+                enable_speaker_diarization,
+                enable_auto_punctuation,
+                audio_language
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return self._process_transcript_to_chunks(cached, audio_path.name, chunk_size, chunk_overlap)
         
         logger.info(f"Starting transcription for: {audio_path.name}")
         
@@ -77,6 +98,9 @@ class AudioTranscriber:
             
             logger.info(f"Transcription completed for: {audio_path.name}")
             
+            if cache_key:
+                transcript = self.cache.put(cache_key, transcript)
+            
             return self._process_transcript_to_chunks(
                 transcript, 
                 audio_path.name, 
@@ -88,9 +112,28 @@ class AudioTranscriber:
             logger.error(f"Error transcribing audio {audio_path.name}: {str(e)}")
             raise
     
+    def _cache_key(
+        self,
+        content_hash: str,
+        enable_speaker_diarization: bool,
+        enable_auto_punctuation: bool,
+        audio_language: str
+    ) -> str:
+        return f"audio:{content_hash}:{audio_language}:{int(enable_speaker_diarization)}{int(enable_auto_punctuation)}"
+    
+    def _validate_audio_path(self, audio_path: str) -> Path:
+        audio_path = Path(audio_path)
+        
+        if not audio_path.exists():
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        if audio_path.suffix.lower() not in self.supported_formats:
+            raise ValueError(f"Unsupported audio format: {audio_path.suffix}")
+        
+        return audio_path
+    
     def _process_transcript_to_chunks(
         self,
-        transcript: aai.Transcript,
+        transcript: Union[aai.Transcript, CachedTranscript],
         source_file: str,
         chunk_size: int,
         chunk_overlap: int
@@ -132,128 +175,88 @@ class AudioTranscriber:
         chunk_overlap: int,
         base_metadata: Dict[str, Any]
     ) -> List[DocumentChunk]:
-
-        chunks = []
-        current_text = ""
-        current_speakers = []
-        current_timestamps = []
-        chunk_index = 0
-        start_char = 0
         
+        # Build the transcript once and remember where each utterance starts
+        lines = []
+        line_starts = []
+        offset = 0
         for utterance in utterances:
-            speaker_label = f"Speaker {utterance.speaker}"
-            timestamp_str = f"[{self._format_milliseconds(utterance.start)}]"
-            
-            speaker_text = f"{timestamp_str} {speaker_label}: {utterance.text}\n"
-
-            if len(current_text + speaker_text) > chunk_size and current_text:
-                chunk_metadata = base_metadata.copy()
-                chunk_metadata.update({
-                    'speakers': list(set(current_speakers)),
-                    'start_timestamp': current_timestamps[0] if current_timestamps else None,
-                    'end_timestamp': current_timestamps[-1] if current_timestamps else None,
-                    'speaker_count': len(set(current_speakers))
-                })
-                
-                chunk = DocumentChunk(
-                    content=current_text.strip(),
-                    source_file=source_file,
-                    source_type='audio',
-                    page_number=None,
-                    chunk_index=chunk_index,
-                    start_char=start_char,
-                    end_char=start_char+len(current_text)-1,
-                    metadata=chunk_metadata
-                )
-                chunks.append(chunk)
-                
-                overlap_text = current_text[-chunk_overlap:] if chunk_overlap > 0 else ""
-                current_text = overlap_text + speaker_text
-                start_char += len(current_text) - len(overlap_text) - len(speaker_text)
-                chunk_index += 1
-                
-                current_speakers = [speaker_label]
-                current_timestamps = [utterance.start, utterance.end]
-            else:
-                current_text += speaker_text
-                current_speakers.append(speaker_label)
-                current_timestamps.extend([utterance.start, utterance.end])
+            line = f"[{self._format_milliseconds(utterance.start)}] Speaker {utterance.speaker}: {utterance.text}\n"
+            lines.append(line)
+            line_starts.append(offset)
+            offset += len(line)
+        text = "".join(lines)
         
-        if current_text.strip():
-            chunk_metadata = base_metadata.copy()
-            chunk_metadata.update({
-                'speakers': list(set(current_speakers)),
-                'start_timestamp': current_timestamps[0] if current_timestamps else None,
-                'end_timestamp': current_timestamps[-1] if current_timestamps else None,
-                'speaker_count': len(set(current_speakers))
-            })
+        chunker = TextChunker(chunk_size, min(chunk_overlap, chunk_size - 1), TRANSCRIPT_BOUNDARIES)
+        
+        chunks = []
+        for span in chunker.split(text):
+            content = text[span.start:span.end].strip()
+            if not content:
+                continue
+            
+            first = bisect_right(line_starts, span.start) - 1
+            last = bisect_right(line_starts, span.end - 1) - 1
+            covered = utterances[first:last + 1]
+            speakers = {f"Speaker {u.speaker}" for u in covered}
+            
+            chunk_metadata = {
+                **base_metadata,
+                'speakers': list(speakers),
+                'start_timestamp': covered[0].start,
+                'end_timestamp': covered[-1].end,
+                'speaker_count': len(speakers)
+            }
             
-            chunk = DocumentChunk(
-                content=current_text.strip(),
+            chunks.append(DocumentChunk(
+                content=content,
                 source_file=source_file,
                 source_type='audio',
                 page_number=None,
-                chunk_index=chunk_index,
-                start_char=start_char,
-                end_char=start_char+len(current_text)-1,
+                chunk_index=len(chunks),
+                start_char=span.start,
+                end_char=span.end - 1,
                 metadata=chunk_metadata
-            )
-            chunks.append(chunk)
+            ))
         
         return chunks
     
-    # def _create_chunks_without_speakers(
-    #     self,
-    #     transcript_text: str,
-    #     source_file: str,
-    #     chunk_size: int,
-    #     chunk_overlap: int,
-    #     base_metadata: Dict[str, Any]
-    # ) -> List[DocumentChunk]:
-    #     if not transcript_text.strip():
-    #         return []
+    def _create_chunks_without_speakers(
+        self,
+        transcript_text: str,
+        source_file: str,
+        chunk_size: int,
+        chunk_overlap: int,
+        base_metadata: Dict[str, Any]
+    ) -> List[DocumentChunk]:
+        if not transcript_text or not transcript_text.strip():
+            return []
         
-    #     chunks = []
-    #     start = 0
-    #     chunk_index = 0
+        chunker = TextChunker(chunk_size, min(chunk_overlap, chunk_size - 1), PROSE_BOUNDARIES)
         
-    #     while start < len(transcript_text):
-    #         end = min(start + chunk_size, len(transcript_text))
-            
-    #         # Try to break at sentence boundary
-    #         if end < len(transcript_text):
-    #             last_period = transcript_text.rfind('.', start, end)
-    #             last_newline = transcript_text.rfind('\n', start, end)
-                
-    #             boundary = max(last_period, last_newline)
-    #             if boundary > start + chunk_size * 0.5:
-    #                 end = boundary + 1
-            
-    #         chunk_text = transcript_text[start:end].strip()
+        chunks = []
+        for span in chunker.split(transcript_text):
+            chunk_text = transcript_text[span.start:span.end].strip()
             
-    #         if chunk_text:
-    #             chunk_metadata = base_metadata.copy()
-    #             chunk_metadata.update({
-    #                 'speakers': ['Unknown Speaker'],
-    #                 'speaker_count': 1
-    #             })
+            if chunk_text:
+                chunk_metadata = {
+                    **base_metadata,
+                    'speakers': ['Unknown Speaker'],
+                    'speaker_count': 1
+                }
                 
-    #             chunk = DocumentChunk(
-    #                 content=chunk_text,
-    #                 source_file=source_file,
-    #                 source_type='audio',
-    #                 page_number=None,
-    #                 chunk_index=chunk_index,
-    #                 start_char=start,
-    #                 end_char=end - 1,
-    #                 metadata=chunk_metadata
-    #             )
-    #             chunks.append(chunk)
-    #             chunk_index += 1
-            
-    #         start = max(start + chunk_size - chunk_overlap, end)
+                chunks.append(DocumentChunk(
+                    content=chunk_text,
+                    source_file=source_file,
+                    source_type='audio',
+                    page_number=None,
+                    chunk_index=len(chunks),
+                    start_char=span.start,
+                    end_char=span.end - 1,
+                    metadata=chunk_metadata
+                ))
         
-    #     return chunks
+        return chunks
     
     def _format_milliseconds(self, ms: int) -> str:
         seconds = ms // 1000
@@ -291,19 +294,166 @@ class AudioTranscriber:
             logger.error(f"Error getting transcript summary: {str(e)}")
             return {"error": str(e)}
     
-    def batch_transcribe(self, audio_paths: List[str]) -> List[List[DocumentChunk]]:
-        all_chunks = []
-        for audio_path in audio_paths:
-            try:
-                chunks = self.transcribe_audio(audio_path)
-                all_chunks.append(chunks)
-                logger.info(f"Successfully transcribed {audio_path}: {len(chunks)} chunks")
-            except Exception as e:
-                logger.error(f"Failed to transcribe {audio_path}: {str(e)}")
-                all_chunks.append([])
+    def batch_transcribe(
+        self,
+        audio_paths: List[str],
+        max_concurrency: int = 5
+    ) -> List[List[DocumentChunk]]:
+        results: Dict[str, List[DocumentChunk]] = {}
+        for audio_path, chunks, error in self.iter_transcribe_concurrent(audio_paths, max_concurrency=max_concurrency):
+            results[audio_path] = chunks or []
         
-        return all_chunks
-
+        # Results are keyed by the paths as strings, whatever the caller passed
+        return [results.get(str(audio_path), []) for audio_path in audio_paths]
+    
+    def iter_transcribe_concurrent(
+        self,
+        audio_paths: List[str],
+        max_concurrency: int = 5,
+        enable_speaker_diarization: bool = True,
+        enable_auto_punctuation: bool = True,
+        audio_language: str = "en",
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100,
+        poll_interval: float = 3.0,
+        max_poll_interval: float = 30.0,
+        backoff_factor: float = 1.5,
+        timeout_seconds: float = 3600.0
+    ) -> Iterator[Tuple[str, Optional[List[DocumentChunk]], Optional[Exception]]]:
+        """Transcribe many files concurrently, yielding ``(path, chunks, error)`` as each finishes.
+        
+        Up to ``max_concurrency`` files are uploaded/submitted at once without
+        waiting for completion; all in-flight jobs are then polled together,
+        with the poll interval backing off while nothing completes.
+        """
+        config = aai.TranscriptionConfig(
+            speaker_labels=enable_speaker_diarization,
+            punctuate=enable_auto_punctuation,
+            language_code=audio_language,
+        )
+        transcriber = aai.Transcriber(config=config)
+        
+        pending = list(dict.fromkeys(str(p) for p in audio_paths))
+        submitting: Dict[Any, str] = {}
+        in_flight: Dict[str, Tuple[str, float, Optional[str]]] = {}
+        interval = poll_interval
+        next_poll_at = float('inf')
+        started_at = time.perf_counter()
+        
+        def submit(audio_path: str) -> Tuple[Optional[str], Union[aai.Transcript, CachedTranscript]]:
+            """Return a cached transcript, or submit the file; the first item is its cache key."""
+            path = self._validate_audio_path(audio_path)
+            cache_key = None
+            if self.cache:
+                cache_key = self._cache_key(
+                    hash_file(str(path)),
+                    enable_speaker_diarization,
+                    enable_auto_punctuation,
+                    audio_language
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return None, cached
+            
+            logger.info(f"Submitting transcription for: {path.name}")
+            return cache_key, transcriber.submit(str(path))
+        
+        def to_chunks(audio_path: str, transcript: Any) -> List[DocumentChunk]:
+            chunks = self._process_transcript_to_chunks(
+                transcript,
+                Path(audio_path).name,
+                chunk_size,
+                chunk_overlap
+            )
+            logger.info(f"Successfully transcribed {audio_path}: {len(chunks)} chunks")
+            return chunks
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            while pending or submitting or in_flight:
+                while pending and len(submitting) + len(in_flight) < max_concurrency:
+                    audio_path = pending.pop(0)
+                    submitting[executor.submit(submit, audio_path)] = audio_path
+                
+                for future in [f for f in submitting if f.done()]:
+                    audio_path = submitting.pop(future)
+                    try:
+                        cache_key, transcript = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to submit {audio_path}: {str(e)}")
+                        yield audio_path, None, e
+                        continue
+                    
+                    if isinstance(transcript, CachedTranscript):
+                        try:
+                            yield audio_path, to_chunks(audio_path, transcript), None
+                        except Exception as e:
+                            yield audio_path, None, e
+                        continue
+                    
+                    in_flight[transcript.id] = (audio_path, time.monotonic(), cache_key)
+                    interval = poll_interval
+                    next_poll_at = min(next_poll_at, time.monotonic() + poll_interval)
+                
+                now = time.monotonic()
+                if not in_flight or now < next_poll_at:
+                    # Wait for the next submission to finish or the next poll, whichever is first
+                    timeout = next_poll_at - now if in_flight else None
+                    if submitting:
+                        wait(list(submitting), timeout=timeout, return_when=FIRST_COMPLETED)
+                    elif timeout:
+                        time.sleep(timeout)
+                    continue
+                
+                # Poll every in-flight job in one round
+                transcript_ids = list(in_flight)
+                polled = executor.map(self._poll_transcript, transcript_ids)
+                completed_any = False
+                
+                for transcript_id, (transcript, poll_error) in zip(transcript_ids, polled):
+                    audio_path, submitted_at, cache_key = in_flight[transcript_id]
+                    
+                    if poll_error is not None:
+                        logger.warning(f"Polling {transcript_id} failed: {poll_error}")
+                        status = None
+                    else:
+                        status = transcript.status
+                    
+                    if status == aai.TranscriptStatus.completed:
+                        del in_flight[transcript_id]
+                        completed_any = True
+                        try:
+                            if cache_key:
+                                transcript = self.cache.put(cache_key, transcript)
+                            yield audio_path, to_chunks(audio_path, transcript), None
+                        except Exception as e:
+                            yield audio_path, None, e
+                    
+                    elif status == aai.TranscriptStatus.error:
+                        del in_flight[transcript_id]
+                        completed_any = True
+                        yield audio_path, None, Exception(f"Transcription failed: {transcript.error}")
+                    
+                    elif time.monotonic() - submitted_at > timeout_seconds:
+                        del in_flight[transcript_id]
+                        yield audio_path, None, TimeoutError(f"Transcription timed out: {transcript_id}")
+                
+                interval = poll_interval if completed_any else min(interval * backoff_factor, max_poll_interval)
+                next_poll_at = time.monotonic() + interval if in_flight else float('inf')
+        
+        logger.info(f"Batch transcription of {len(audio_paths)} files finished in {time.perf_counter() - started_at:.1f}s")
+    
+    def _poll_transcript(self, transcript_id: str) -> Tuple[Optional[aai.Transcript], Optional[Exception]]:
+        """Fetch a transcript's current status once.
+        
+        ``aai.Transcript.get_by_id`` would block until the job finishes,
+        defeating the shared poll rounds and the timeout.
+        """
+        try:
+            client = aai.Client.get_default()
+            response = aai.api.get_transcript(client.http_client, transcript_id)
+            return aai.Transcript.from_response(client=client, response=response), None
+        except Exception as e:
+            return None, e
 
 if __name__ == "__main__":
     api_key = os.getenv("ASSEMBLYAI_API_KEY")
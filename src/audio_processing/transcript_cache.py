@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedUtterance:
+    """A stored utterance; mirrors the attributes of ``aai.Utterance`` used for chunking"""
+    speaker: str
+    text: str
+    start: int
+    end: int
+    confidence: Optional[float] = None
+
+
+@dataclass
+class CachedTranscript:
+    """A stored transcript; mirrors the attributes of ``aai.Transcript`` used for chunking"""
+    id: str
+    text: str
+    audio_duration: Optional[float] = None
+    confidence: Optional[float] = None
+    audio_url: Optional[str] = None
+    utterances: List[CachedUtterance] = field(default_factory=list)
+    
+    @classmethod
+    def from_transcript(cls, transcript: Any) -> "CachedTranscript":
+        return cls(
+            id=transcript.id,
+            text=transcript.text or "",
+            audio_duration=transcript.audio_duration,
+            confidence=transcript.confidence,
+            audio_url=transcript.audio_url,
+            utterances=[
+                CachedUtterance(
+                    speaker=u.speaker,
+                    text=u.text,
+                    start=u.start,
+                    end=u.end,
+                    confidence=getattr(u, 'confidence', None)
+                )
+                for u in (getattr(transcript, 'utterances', None) or [])
+            ]
+        )
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CachedTranscript":
+        utterances = [CachedUtterance(**u) for u in data.pop('utterances', [])]
+        return cls(utterances=utterances, **data)
+
+
+def hash_file(path: str, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Disk-backed cache of raw transcripts (text and utterances).
+    
+    Keys are built by the callers: a content hash for uploaded audio or the
+    video id for YouTube, plus the transcription options. Because the raw
+    utterances are stored, re-chunking with different sizes never
+    re-transcribes. Entries are evicted after ``max_age_seconds`` and,
+    least recently used first, beyond ``max_entries``.
+    """
+    
+    def __init__(
+        self,
+        db_path: str = "./data/transcript_cache.sqlite",
+        max_entries: int = 500,
+        max_age_seconds: float = 30 * 24 * 3600
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS transcripts (
+                cache_key TEXT PRIMARY KEY,
+                transcript TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        
+        logger.info(f"Transcript cache ready at {db_path}")
+    
+    def get(self, cache_key: str) -> Optional[CachedTranscript]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transcript, created_at FROM transcripts WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+            
+            if row is None or time.time() - row[1] > self.max_age_seconds:
+                self.stats['misses'] += 1
+                return None
+            
+            self._conn.execute(
+                "UPDATE transcripts SET last_accessed = ? WHERE cache_key = ?",
+                (time.time(), cache_key)
+            )
+            self._conn.commit()
+            self.stats['hits'] += 1
+        
+        logger.info(f"Transcript cache hit: {cache_key}")
+        return CachedTranscript.from_dict(json.loads(row[0]))
+    
+    def put(self, cache_key: str, transcript: Any) -> CachedTranscript:
+        """Store a transcript (``aai.Transcript`` or ``CachedTranscript``) and return the cached form."""
+        if not isinstance(transcript, CachedTranscript):
+            transcript = CachedTranscript.from_transcript(transcript)
+        
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts (cache_key, transcript, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (cache_key, json.dumps(asdict(transcript)), now, now)
+            )
+            self._conn.commit()
+            self.stats['stores'] += 1
+        
+        self.evict()
+        return transcript
+    
+    def evict(self) -> int:
+        """Drop expired entries and the least recently used ones beyond ``max_entries``."""
+        with self._lock:
+            expired = self._conn.execute(
+                "DELETE FROM transcripts WHERE created_at < ?",
+                (time.time() - self.max_age_seconds,)
+            ).rowcount
+            overflow = self._conn.execute(
+                """DELETE FROM transcripts WHERE cache_key IN (
+                       SELECT cache_key FROM transcripts ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+            self.stats['evictions'] += expired + overflow
+        
+        return expired + overflow
+    
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+            return {**self.stats, 'entries': entries}
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,250 @@
+"""Checks for concurrent batch transcription against a local fake AssemblyAI.
+
+Run with ``python -m src.audio_processing.transcription_check``.
+``FakeTranscriptionServer`` answers the upload, submit and transcript
+endpoints the AssemblyAI SDK calls, and ``AudioTranscriber`` is pointed at
+it through ``base_url``, so no API key or network is needed. Each fake
+audio file says how its transcript behaves (complete after some polls,
+fail, fail one poll, or never finish), and the checks cover submission
+without waiting, polling with backoff, errors, timeouts, the transcript
+cache and ``batch_transcribe``. The exit status is non-zero if any check
+fails.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+
+from src.audio_processing.audio_transcriber import AudioTranscriber
+from src.audio_processing.transcript_cache import TranscriptCache
+
+
+class FakeTranscriptionServer:
+    """A local stand-in for the AssemblyAI upload and transcript endpoints.
+
+    The uploaded bytes are the job's behaviour: ``complete:N`` finishes on
+    the Nth poll, ``flaky:N`` also answers its first poll with a 500,
+    ``error`` fails on the first poll and ``stall`` never finishes.
+    """
+
+    def __init__(self):
+        self.uploads: Dict[str, str] = {}
+        self.transcripts: Dict[str, dict] = {}
+        # Poll times per transcript id, and when each was submitted
+        self.polls: Dict[str, List[float]] = {}
+        self.submitted_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeTranscriptionServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self):
+                if self.path == "/v2/upload":
+                    upload_url = f"{server.base_url}/files/{uuid.uuid4().hex}"
+                    with server._lock:
+                        server.uploads[upload_url] = self._body().decode("utf-8")
+                    return self._send(200, {"upload_url": upload_url})
+
+                if self.path == "/v2/transcript":
+                    request = json.loads(self._body())
+                    transcript_id = uuid.uuid4().hex
+                    with server._lock:
+                        behaviour = server.uploads[request["audio_url"]]
+                        server.transcripts[transcript_id] = {"behaviour": behaviour, "audio_url": request["audio_url"]}
+                        server.polls[transcript_id] = []
+                        server.submitted_at[transcript_id] = time.monotonic()
+                    return self._send(200, server._response(transcript_id, "queued"))
+
+                self._send(404, {"error": "not found"})
+
+            def do_GET(self):
+                transcript_id = self.path.rsplit("/", 1)[-1]
+                with server._lock:
+                    job = server.transcripts.get(transcript_id)
+                    if job is None:
+                        return self._send(404, {"error": "not found"})
+                    server.polls[transcript_id].append(time.monotonic())
+                    polls = len(server.polls[transcript_id])
+
+                kind, _, count = job["behaviour"].partition(":")
+                if kind == "flaky" and polls == 1:
+                    return self._send(500, {"error": "temporarily unavailable"})
+                if kind == "error":
+                    return self._send(200, server._response(transcript_id, "error"))
+                if kind in ("complete", "flaky") and polls >= int(count):
+                    return self._send(200, server._response(transcript_id, "completed"))
+                self._send(200, server._response(transcript_id, "processing"))
+
+        return Handler
+
+    def _response(self, transcript_id: str, status: str) -> dict:
+        job = self.transcripts[transcript_id]
+        response = {"id": transcript_id, "status": status, "audio_url": job["audio_url"]}
+        if status == "error":
+            response["error"] = "fake transcription failure"
+        if status == "completed":
+            utterances = [
+                {"speaker": speaker, "text": f"Fake line {i} for {job['behaviour']}.",
+                 "start": i * 4000, "end": i * 4000 + 3500, "confidence": 0.9, "words": []}
+                for i, speaker in enumerate("ABAB")
+            ]
+            response.update(
+                text=" ".join(u["text"] for u in utterances),
+                utterances=utterances,
+                confidence=0.9,
+                audio_duration=16
+            )
+        return response
+
+
+class Checker:
+    def __init__(self):
+        self.failures: List[str] = []
+        self.passed = 0
+
+    def check(self, name: str, condition: bool, detail: str = ""):
+        if condition:
+            self.passed += 1
+        else:
+            self.failures.append(f"{name}: {detail}" if detail else name)
+
+
+def _audio_files(directory: Path, behaviours: Dict[str, str]) -> Dict[str, Path]:
+    files = {}
+    for name, behaviour in behaviours.items():
+        path = directory / f"{name}.mp3"
+        path.write_text(behaviour, encoding="utf-8")
+        files[name] = path
+    return files
+
+
+def run(poll_interval: float, max_poll_interval: float, timeout_seconds: float) -> bool:
+    checker = Checker()
+    options = {
+        "poll_interval": poll_interval,
+        "max_poll_interval": max_poll_interval,
+        "backoff_factor": 2.0,
+        "timeout_seconds": timeout_seconds,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp, FakeTranscriptionServer() as server:
+        directory = Path(tmp)
+        files = _audio_files(directory, {
+            "quick": "complete:1",
+            "slow": "complete:3",
+            "flaky": "flaky:2",
+            "broken": "error",
+            "stalled": "stall",
+        })
+        cache = TranscriptCache(db_path=str(directory / "transcripts.sqlite"))
+        transcriber = AudioTranscriber("fake-key", base_url=server.base_url, cache=cache)
+
+        started = time.monotonic()
+        results = {
+            Path(path).stem: (chunks, error)
+            for path, chunks, error in transcriber.iter_transcribe_concurrent(
+                list(files.values()), max_concurrency=len(files), **options
+            )
+        }
+        elapsed = time.monotonic() - started
+
+        checker.check("every file reported", set(results) == set(files), f"got {sorted(results)}")
+        submits = sorted(server.submitted_at.values())
+        first_completion = min(
+            (polls[-1] for polls in server.polls.values() if polls), default=float("inf")
+        )
+        checker.check("all submitted before any poll completes", len(submits) == len(files) and submits[-1] <= first_completion)
+
+        for name in ("quick", "slow", "flaky"):
+            chunks, error = results.get(name, (None, None))
+            checker.check(f"{name} completes", error is None and bool(chunks), repr(error))
+            checker.check(f"{name} chunk text", bool(chunks) and f"for {files[name].read_text()}" in chunks[0].content)
+
+        _, error = results.get("broken", (None, None))
+        checker.check("error status raised", error is not None and "fake transcription failure" in str(error), repr(error))
+        _, error = results.get("stalled", (None, None))
+        checker.check("stalled job times out", isinstance(error, TimeoutError), repr(error))
+        checker.check("timeout bounds the batch", elapsed < timeout_seconds + 2 * max_poll_interval + 1, f"{elapsed:.2f}s")
+
+        stalled_id = next(tid for tid, job in server.transcripts.items() if job["behaviour"] == "stall")
+        gaps = [b - a for a, b in zip(server.polls[stalled_id], server.polls[stalled_id][1:])]
+        checker.check("poll interval backs off", len(gaps) >= 3 and gaps[-1] > gaps[0] * 1.5,
+                      ", ".join(f"{gap:.2f}" for gap in gaps))
+        checker.check("poll interval capped", all(gap < max_poll_interval * 1.5 + 0.05 for gap in gaps),
+                      ", ".join(f"{gap:.2f}" for gap in gaps))
+
+        # Completed transcripts are cached; paths come back as given, Path or str
+        submitted = len(server.transcripts)
+        batch = transcriber.batch_transcribe([files["slow"], str(files["quick"])], max_concurrency=2)
+        checker.check("batch_transcribe keeps order and Path inputs",
+                      len(batch) == 2 and all(batch) and "complete:3" in batch[0][0].content and "complete:1" in batch[1][0].content)
+        checker.check("cached files are not resubmitted", len(server.transcripts) == submitted,
+                      f"{len(server.transcripts) - submitted} resubmitted")
+
+        # Uncached, since files with the same behaviour have the same content hash
+        limited = _audio_files(directory, {f"limited{i}": f"complete:{i % 2 + 1}" for i in range(4)})
+        uncached = AudioTranscriber("fake-key", base_url=server.base_url)
+        before = set(server.transcripts)
+        list(uncached.iter_transcribe_concurrent(list(limited.values()), max_concurrency=2, **options))
+        new = [tid for tid in server.transcripts if tid not in before]
+        peak = max(
+            sum(1 for other in new if server.submitted_at[other] <= server.submitted_at[tid] < server.polls[other][-1])
+            for tid in new
+        )
+        checker.check("max_concurrency respected", len(new) == 4 and peak <= 2, f"{peak} in flight")
+        cache.close()
+
+    total = checker.passed + len(checker.failures)
+    print(f"{checker.passed}/{total} checks passed")
+    for failure in checker.failures:
+        print(f"FAIL {failure}")
+    return not checker.failures
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--max-poll-interval", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=1.0, help="seconds before a stalled job times out")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    sys.exit(0 if run(args.poll_interval, args.max_poll_interval, args.timeout) else 1)
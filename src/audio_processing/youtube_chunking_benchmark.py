@@ -0,0 +1,188 @@
+"""Benchmark for merging YouTube utterances into time-window chunks.
+
+Run with ``python -m src.audio_processing.youtube_chunking_benchmark [--repeat 3]``.
+The recorded transcript in ``benchmark_fixtures/youtube_transcript.json``
+(a 20-minute, two-speaker conversation in the transcript cache's format)
+is chunked the old way, one chunk per utterance, and with
+``YouTubeTranscriber._create_time_window_chunks``. Chunk count, characters
+and chunking time are reported for both, plus the time to embed the chunks
+when the embedding model can be loaded. ``--repeat`` tiles the fixture to
+simulate longer videos.
+
+The fixture is also joined into a single monologue utterance, which must be
+split: its chunks are checked to fit ``--chunk-size`` and to carry start
+times that increase within the utterance's span.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from src.audio_processing.transcript_cache import CachedTranscript, CachedUtterance
+from src.audio_processing.youtube_transcriber import YouTubeTranscriber
+from src.document_processing.doc_processor import DocumentChunk
+
+FIXTURE = Path(__file__).parent / "benchmark_fixtures" / "youtube_transcript.json"
+
+VIDEO_ID = "benchmark"
+VIDEO_URL = f"https://www.youtube.com/watch?v={VIDEO_ID}"
+
+
+class FixtureTranscriber(YouTubeTranscriber):
+    """Chunks utterances without configuring AssemblyAI or a temp directory."""
+
+    def __init__(self):
+        self.cache = None
+
+
+def load_utterances(path: Path, repeat: int = 1) -> List[CachedUtterance]:
+    """The fixture's utterances, tiled ``repeat`` times back to back in time."""
+    with open(path, encoding="utf-8") as f:
+        transcript = CachedTranscript.from_dict(json.load(f))
+
+    utterances = transcript.utterances
+    span = utterances[-1].end + 1000 if utterances else 0
+    return [
+        CachedUtterance(u.speaker, u.text, u.start + i * span, u.end + i * span, u.confidence)
+        for i in range(repeat)
+        for u in utterances
+    ]
+
+
+def monologue(utterances: List[CachedUtterance]) -> List[CachedUtterance]:
+    """The utterances joined into one turn by the first speaker."""
+    if not utterances:
+        return []
+    return [CachedUtterance(
+        utterances[0].speaker,
+        " ".join(u.text for u in utterances),
+        utterances[0].start,
+        utterances[-1].end,
+        utterances[0].confidence
+    )]
+
+
+def check_split(chunks: List[DocumentChunk], utterance: CachedUtterance, chunk_size: int) -> List[str]:
+    """Problems with the chunks of one oversized utterance, if any."""
+    problems = []
+    longest = max((len(chunk.content) for chunk in chunks), default=0)
+    if len(chunks) < 2:
+        problems.append(f"not split ({len(chunks)} chunk)")
+    if longest > chunk_size:
+        problems.append(f"chunk of {longest} chars exceeds {chunk_size}")
+    starts = [chunk.metadata['start_time'] for chunk in chunks]
+    if starts != sorted(set(starts)):
+        problems.append("start times do not increase")
+    if chunks and (starts[0] != utterance.start or chunks[-1].metadata['end_time'] != utterance.end):
+        problems.append("chunks do not span the utterance")
+    return problems
+
+
+def legacy_utterance_chunks(utterances: List[CachedUtterance]) -> List[DocumentChunk]:
+    """The one-chunk-per-utterance loop previously used by YouTubeTranscriber."""
+    return [
+        DocumentChunk(
+            content=f"Speaker {utterance.speaker}: {utterance.text}",
+            source_file=f"YouTube Video {VIDEO_ID}",
+            source_type="youtube",
+            page_number=None,
+            chunk_index=i,
+            start_char=utterance.start,
+            end_char=utterance.end,
+            metadata={
+                'speaker': utterance.speaker,
+                'start_time': utterance.start,
+                'end_time': utterance.end,
+                'confidence': utterance.confidence,
+                'video_url': VIDEO_URL,
+                'video_id': VIDEO_ID
+            }
+        )
+        for i, utterance in enumerate(utterances)
+    ]
+
+
+def _time(fn: Callable[[], list], repeat: int) -> Tuple[float, list]:
+    best, result = float("inf"), []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _load_embedder(model_name: str):
+    from src.embeddings.embedding_generator import EmbeddingGenerator
+    try:
+        return EmbeddingGenerator(model_name=model_name)
+    except Exception as e:
+        print(f"Embedding model unavailable ({e}); embedding times are not reported")
+        return None
+
+
+def _embed_time(embedder, chunks: List[DocumentChunk]) -> Optional[float]:
+    if embedder is None:
+        return None
+    started = time.perf_counter()
+    embedder.generate_embeddings(chunks, check_truncation=False)
+    return time.perf_counter() - started
+
+
+def run(args):
+    utterances = load_utterances(args.fixture, args.repeat)
+    transcriber = FixtureTranscriber()
+    embedder = None if args.no_embed else _load_embedder(args.model)
+    if embedder is not None:
+        # Load the model's weights and caches before timing either side
+        _embed_time(embedder, legacy_utterance_chunks(utterances[:8]))
+
+    def time_window(source):
+        return lambda: transcriber._create_time_window_chunks(
+            source, VIDEO_ID, VIDEO_URL, args.chunk_size, args.max_window_seconds
+        )
+
+    long_turn = monologue(load_utterances(args.fixture))
+    cases = [
+        ("per utterance", lambda: legacy_utterance_chunks(utterances)),
+        ("time window", time_window(utterances)),
+        ("monologue", time_window(long_turn)),
+    ]
+
+    minutes = utterances[-1].end / 60000 if utterances else 0
+    print(f"{len(utterances)} utterances, {minutes:.0f} minutes of audio")
+    print(f"{'case':<16}{'chunks':>8}{'chars':>10}{'avg chars':>11}{'max chars':>11}{'chunk ms':>10}{'embed s':>10}")
+    problems = []
+    for name, chunker in cases:
+        chunk_time, chunks = _time(chunker, args.runs)
+        chars = sum(len(chunk.content) for chunk in chunks)
+        longest = max((len(chunk.content) for chunk in chunks), default=0)
+        embed_time = _embed_time(embedder, chunks)
+        embed = f"{embed_time:.2f}" if embed_time is not None else "-"
+        print(
+            f"{name:<16}{len(chunks):>8}{chars:>10}{chars / max(len(chunks), 1):>11.0f}"
+            f"{longest:>11}{chunk_time * 1000:>10.2f}{embed:>10}"
+        )
+        if name == "monologue" and long_turn:
+            problems = check_split(chunks, long_turn[0], args.chunk_size)
+
+    for problem in problems:
+        print(f"FAIL monologue: {problem}")
+    return not problems
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", type=Path, default=FIXTURE, help="transcript JSON in the cache's format")
+    parser.add_argument("--repeat", type=int, default=3, help="times the fixture is tiled")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--max-window-seconds", type=float, default=120.0)
+    parser.add_argument("--runs", type=int, default=5, help="chunking runs; the best is reported")
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--no-embed", action="store_true", help="skip the embedding timings")
+    sys.exit(0 if run(parser.parse_args()) else 1)
@@ -2,19 +2,22 @@ import logging
 import os
 import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 import yt_dlp
 import assemblyai as aai
 
 from src.document_processing.doc_processor import DocumentChunk
+from src.document_processing.chunking import TextChunker, TRANSCRIPT_BOUNDARIES
+from src.audio_processing.transcript_cache import TranscriptCache, CachedTranscript, CachedUtterance
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class YouTubeTranscriber:
-    def __init__(self, assemblyai_api_key: str):
+    def __init__(self, assemblyai_api_key: str, cache: Optional[TranscriptCache] = None):
         self.assemblyai_api_key = assemblyai_api_key
+        self.cache = cache
         self.temp_dir = Path(tempfile.gettempdir()) / "youtube_transcriber"
         self.temp_dir.mkdir(exist_ok=True)
         
@@ -69,49 +72,40 @@ class YouTubeTranscriber:
     def transcribe_youtube_video(
         self,
         url: str,
-        cleanup_audio: bool = True
+        cleanup_audio: bool = True,
+        chunk_size: int = 1000,
+        max_window_seconds: float = 120.0
     ) -> List[DocumentChunk]:
         try:
-            audio_path = self.download_audio(url)
-            
-            # Configure transcription with speaker diarization
-            config = aai.TranscriptionConfig(
-                speaker_labels=True,
-                punctuate=True
-            )
+            video_id = self.extract_video_id(url)
+            if not video_id:
+                raise ValueError("Could not extract video ID from URL")
             
-            logger.info("Starting transcription with speaker diarization...")
-            transcriber = aai.Transcriber(config=config)
-            transcript = transcriber.transcribe(audio_path)
+            # A cached transcript skips both the download and the transcription
+            cache_key = f"youtube:{video_id}"
+            transcript = self.cache.get(cache_key) if self.cache else None
+            audio_path = None
             
-            if transcript.status == aai.TranscriptStatus.error:
-                raise Exception(f"Transcription failed: {transcript.error}")
+            if transcript is None:
+                audio_path = self.download_audio(url)
+                transcript = self._transcribe(audio_path)
+                if self.cache:
+                    transcript = self.cache.put(cache_key, transcript)
             
-            chunks = []
-            video_id = self.extract_video_id(url)
-            for i, utterance in enumerate(transcript.utterances):
-                chunk = DocumentChunk(
-                    content=f"Speaker {utterance.speaker}: {utterance.text}",
-                    source_file=f"YouTube Video {video_id}",
-                    source_type="youtube",
-                    page_number=None,
-                    chunk_index=i,
-                    start_char=utterance.start,
-                    end_char=utterance.end,
-                    metadata={
-                        'speaker': utterance.speaker,
-                        'start_time': utterance.start,
-                        'end_time': utterance.end,
-                        'confidence': getattr(utterance, 'confidence', None),
-                        'video_url': url,
-                        'video_id': video_id
-                    }
-                )
-                chunks.append(chunk)
+            chunks = self._create_time_window_chunks(
+                transcript.utterances or [],
+                video_id,
+                url,
+                chunk_size,
+                max_window_seconds
+            )
             
-            logger.info(f"Transcription completed: {len(chunks)} utterances")
+            logger.info(
+                f"Transcription completed: {len(transcript.utterances or [])} utterances "
+                f"merged into {len(chunks)} chunks"
+            )
             
-            if cleanup_audio and os.path.exists(audio_path):
+            if cleanup_audio and audio_path and os.path.exists(audio_path):
                 os.unlink(audio_path)
                 logger.info("Audio file cleaned up")
             
@@ -121,6 +115,151 @@ class YouTubeTranscriber:
             logger.error(f"Error transcribing YouTube video: {str(e)}")
             raise
     
+    def _create_time_window_chunks(
+        self,
+        utterances: List[Any],
+        video_id: str,
+        url: str,
+        chunk_size: int,
+        max_window_seconds: float
+    ) -> List[DocumentChunk]:
+        """Merge consecutive utterances into chunks bounded by size and time span.
+        
+        Chunks start on a speaker turn, so their start/end times can be used to
+        deep-link into the video. An utterance too long for one chunk is first
+        split at sentence ends, with its times interpolated across the pieces.
+        """
+        chunks = []
+        current_lines: List[str] = []
+        current_utterances: List[Any] = []
+        current_length = 0
+        start_char = 0
+        max_window_ms = max_window_seconds * 1000
+        
+        def flush():
+            nonlocal start_char
+            content = "\n".join(current_lines)
+            chunks.append(self._build_chunk(
+                content,
+                current_utterances,
+                video_id,
+                url,
+                len(chunks),
+                start_char
+            ))
+            start_char += len(content) + 1
+        
+        for utterance in self._split_long_utterances(utterances, chunk_size):
+            line = f"[{self._format_milliseconds(utterance.start)}] Speaker {utterance.speaker}: {utterance.text}"
+            
+            if current_lines and (
+                current_length + len(line) + 1 > chunk_size
+                or utterance.end - current_utterances[0].start > max_window_ms
+            ):
+                flush()
+                current_lines, current_utterances, current_length = [], [], 0
+            
+            current_lines.append(line)
+            current_utterances.append(utterance)
+            current_length += len(line) + 1
+        
+        if current_lines:
+            flush()
+        
+        return chunks
+    
+    def _split_long_utterances(self, utterances: List[Any], chunk_size: int) -> List[Any]:
+        """Split utterances whose transcript line exceeds ``chunk_size``.
+        
+        Each piece's start and end are placed by its character offset in the
+        utterance, assuming a steady speaking rate.
+        """
+        pieces = []
+        for utterance in utterances:
+            # The end time gives the widest timestamp any piece can carry
+            prefix = len(f"[{self._format_milliseconds(utterance.end)}] Speaker {utterance.speaker}: ")
+            text = utterance.text or ""
+            if prefix + len(text) <= chunk_size:
+                pieces.append(utterance)
+                continue
+            
+            budget = max(chunk_size - prefix, 1)
+            chunker = TextChunker(budget, 0, TRANSCRIPT_BOUNDARIES)
+            duration = utterance.end - utterance.start
+            for span in chunker.split(text):
+                piece = text[span.start:span.end].strip()
+                if not piece:
+                    continue
+                pieces.append(CachedUtterance(
+                    speaker=utterance.speaker,
+                    text=piece,
+                    start=utterance.start + duration * span.start // len(text),
+                    end=utterance.start + duration * span.end // len(text),
+                    confidence=getattr(utterance, 'confidence', None)
+                ))
+        return pieces
+    
+    def _build_chunk(
+        self,
+        content: str,
+        utterances: List[Any],
+        video_id: str,
+        url: str,
+        chunk_index: int,
+        start_char: int
+    ) -> DocumentChunk:
+        speakers = list(dict.fromkeys(f"Speaker {u.speaker}" for u in utterances))
+        confidences = [u.confidence for u in utterances if getattr(u, 'confidence', None) is not None]
+        start_time = utterances[0].start
+        end_time = utterances[-1].end
+        
+        metadata: Dict[str, Any] = {
+            'speakers': speakers,
+            'speaker_count': len(speakers),
+            'utterance_count': len(utterances),
+            'start_time': start_time,
+            'end_time': end_time,
+            'start_timestamp': self._format_milliseconds(start_time),
+            'end_timestamp': self._format_milliseconds(end_time),
+            'confidence': sum(confidences) / len(confidences) if confidences else None,
+            'video_url': url,
+            'video_id': video_id,
+            'timestamp_url': f"https://www.youtube.com/watch?v={video_id}&t={start_time // 1000}s"
+        }
+        
+        return DocumentChunk(
+            content=content,
+            source_file=f"YouTube Video {video_id}",
+            source_type="youtube",
+            page_number=None,
+            chunk_index=chunk_index,
+            start_char=start_char,
+            end_char=start_char + len(content) - 1,
+            metadata=metadata
+        )
+    
+    def _format_milliseconds(self, ms: int) -> str:
+        seconds = ms // 1000
+        minutes = seconds // 60
+        seconds = seconds % 60
+        return f"{minutes:02d}:{seconds:02d}"
+    
+    def _transcribe(self, audio_path: str) -> Union[aai.Transcript, CachedTranscript]:
+        # Configure transcription with speaker diarization
+        config = aai.TranscriptionConfig(
+            speaker_labels=True,
+            punctuate=True
+        )
+        
+        logger.info("Starting transcription with speaker diarization...")
+        transcriber = aai.Transcriber(config=config)
+        transcript = transcriber.transcribe(audio_path)
+        
+        if transcript.status == aai.TranscriptStatus.error:
+            raise Exception(f"Transcription failed: {transcript.error}")
+        
+        return transcript
+    
     def cleanup_temp_files(self):
         try:
             if self.temp_dir.exists():
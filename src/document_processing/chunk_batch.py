@@ -0,0 +1,223 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src.document_processing.doc_processor import DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+# Stand-in for "no value" in the int32 columns, as in the Milvus schema
+MISSING = -1
+
+
+@dataclass
+class ChunkBatch:
+    """Columnar chunks of one source.
+
+    Chunk texts live in one contiguous string addressed by ``offsets``;
+    positions are int32 columns; metadata shared by the whole source is held
+    once in ``metadata``, with only chunk-specific keys in ``chunk_metadata``;
+    and embeddings, once computed, form a single (n, d) float32 matrix.
+    """
+    source_file: str
+    source_type: str
+    text: str
+    offsets: np.ndarray
+    page_numbers: np.ndarray
+    chunk_indexes: np.ndarray
+    start_chars: np.ndarray
+    end_chars: np.ndarray
+    chunk_ids: List[str]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    chunk_metadata: List[Optional[Dict[str, Any]]] = field(default_factory=list)
+    embeddings: Optional[np.ndarray] = None
+    embedding_model: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @classmethod
+    def from_chunks(cls, chunks: Sequence[DocumentChunk]) -> "ChunkBatch":
+        """Pack chunks of a single source, factoring out metadata they share."""
+        first = chunks[0] if chunks else None
+        shared = dict(first.metadata or {}) if first else {}
+        for chunk in chunks[1:]:
+            chunk_metadata = chunk.metadata or {}
+            for key in list(shared):
+                if key not in chunk_metadata or chunk_metadata[key] != shared[key]:
+                    del shared[key]
+
+        contents = [chunk.content for chunk in chunks]
+        offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum([len(content) for content in contents], out=offsets[1:])
+
+        def column(values) -> np.ndarray:
+            return np.array([MISSING if value is None else value for value in values], dtype=np.int32)
+
+        extras = []
+        for chunk in chunks:
+            extra = {k: v for k, v in (chunk.metadata or {}).items() if k not in shared}
+            extras.append(extra or None)
+
+        return cls(
+            source_file=first.source_file if first else "",
+            source_type=first.source_type if first else "",
+            text="".join(contents),
+            offsets=offsets,
+            page_numbers=column(chunk.page_number for chunk in chunks),
+            chunk_indexes=column(chunk.chunk_index for chunk in chunks),
+            start_chars=column(chunk.start_char for chunk in chunks),
+            end_chars=column(chunk.end_char for chunk in chunks),
+            chunk_ids=[chunk.chunk_id for chunk in chunks],
+            metadata=shared,
+            chunk_metadata=extras
+        )
+
+    def content(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def contents(self) -> Iterator[str]:
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield self.text[start:end]
+
+    def metadata_at(self, i: int) -> Dict[str, Any]:
+        extra = self.chunk_metadata[i] if self.chunk_metadata else None
+        return {**self.metadata, **extra} if extra else dict(self.metadata)
+
+    def chunk(self, i: int) -> DocumentChunk:
+        """Materialize one chunk as a DocumentChunk."""
+        def value(column: np.ndarray) -> Optional[int]:
+            item = int(column[i])
+            return None if item == MISSING else item
+
+        return DocumentChunk(
+            content=self.content(i),
+            source_file=self.source_file,
+            source_type=self.source_type,
+            page_number=value(self.page_numbers),
+            chunk_index=int(self.chunk_indexes[i]),
+            start_char=value(self.start_chars),
+            end_char=value(self.end_chars),
+            metadata=self.metadata_at(i),
+            chunk_id=self.chunk_ids[i]
+        )
+
+    def select(self, indices: Sequence[int]) -> "ChunkBatch":
+        """A new batch with only the given chunks, in the given order."""
+        indices = np.asarray(indices, dtype=np.int64)
+        contents = [self.content(i) for i in indices.tolist()]
+        offsets = np.zeros(len(contents) + 1, dtype=np.int64)
+        np.cumsum([len(content) for content in contents], out=offsets[1:])
+
+        return ChunkBatch(
+            source_file=self.source_file,
+            source_type=self.source_type,
+            text="".join(contents),
+            offsets=offsets,
+            page_numbers=self.page_numbers[indices],
+            chunk_indexes=self.chunk_indexes[indices],
+            start_chars=self.start_chars[indices],
+            end_chars=self.end_chars[indices],
+            chunk_ids=[self.chunk_ids[i] for i in indices.tolist()],
+            metadata=self.metadata,
+            chunk_metadata=[self.chunk_metadata[i] for i in indices.tolist()] if self.chunk_metadata else [],
+            embeddings=self.embeddings[indices] if self.embeddings is not None else None,
+            embedding_model=self.embedding_model
+        )
+
+    def iter_rows(self, start: int = 0, stop: Optional[int] = None, vectors: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield vector DB rows for chunks[start:stop].
+
+        Rows carry only chunk-specific metadata; the shared ``metadata`` is
+        stored once per source by the vector DB. With ``vectors`` (which
+        requires embeddings) each row includes its embedding as a list.
+        """
+        if vectors and self.embeddings is None:
+            raise ValueError("ChunkBatch has no embeddings")
+
+        stop = len(self) if stop is None else min(stop, len(self))
+        for i in range(start, stop):
+            row = {
+                'id': self.chunk_ids[i],
+                'content': self.content(i),
+                'source_file': self.source_file,
+                'source_type': self.source_type,
+                'page_number': int(self.page_numbers[i]),
+                'chunk_index': int(self.chunk_indexes[i]),
+                'start_char': int(self.start_chars[i]),
+                'end_char': int(self.end_chars[i]),
+                'metadata': (self.chunk_metadata[i] if self.chunk_metadata else None) or {},
+                'embedding_model': self.embedding_model
+            }
+            if vectors:
+                row['vector'] = self.embeddings[i].tolist()
+            yield row
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the batch's buffers."""
+        arrays = [self.offsets, self.page_numbers, self.chunk_indexes, self.start_chars, self.end_chars]
+        if self.embeddings is not None:
+            arrays.append(self.embeddings)
+        return len(self.text.encode("utf-8")) + sum(array.nbytes for array in arrays)
+
+
+if __name__ == "__main__":
+    import argparse
+    import tracemalloc
+
+    from src.embeddings.embedding_generator import EmbeddedChunk
+
+    parser = argparse.ArgumentParser(description="Memory of per-chunk objects vs a ChunkBatch")
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    page_metadata = {
+        'total_pages': 400,
+        'page_width': 612.0,
+        'page_height': 792.0,
+        'processed_at': "2024-01-01T00:00:00"
+    }
+
+    def make_chunks() -> List[DocumentChunk]:
+        return [
+            DocumentChunk(
+                content=f"chunk {i} " + "lorem ipsum dolor sit amet " * 30,
+                source_file="report.pdf",
+                source_type="pdf",
+                page_number=i // 10 + 1,
+                chunk_index=i % 10,
+                start_char=(i % 10) * 800,
+                end_char=(i % 10) * 800 + 799,
+                metadata=dict(page_metadata)
+            )
+            for i in range(args.chunks)
+        ]
+
+    def measure(build) -> float:
+        tracemalloc.start()
+        result = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        return current / (1024 * 1024)
+
+    def per_chunk_objects():
+        return [
+            EmbeddedChunk(chunk=chunk, embedding=np.random.rand(args.dim).astype(np.float32), embedding_model="m")
+            for chunk in make_chunks()
+        ]
+
+    def columnar():
+        batch = ChunkBatch.from_chunks(make_chunks())
+        batch.embeddings = np.random.rand(len(batch), args.dim).astype(np.float32)
+        return batch
+
+    before = measure(per_chunk_objects)
+    after = measure(columnar)
+    print(f"{args.chunks} chunks, dim {args.dim}")
+    print(f"  DocumentChunk + EmbeddedChunk: {before:8.1f} MB")
+    print(f"  ChunkBatch:                    {after:8.1f} MB")
@@ -0,0 +1,291 @@
+import re
+import logging
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TextSpan:
+    """A chunk's position in the source text (end is exclusive)."""
+    start: int
+    end: int
+
+
+class BoundaryStrategy:
+    """Finds the offsets in a text where a chunk may end.
+
+    A boundary is only used when it leaves the chunk at least ``min_fill`` of
+    the target size, so a boundary near the window start does not produce a
+    tiny chunk. Lookups are bounded to a window, so the chunker never scans
+    more than a window's worth of text per chunk.
+    """
+    name = "boundary"
+
+    def __init__(self, min_fill: float = 0.5):
+        self.min_fill = min_fill
+
+    def last_boundary(self, text: str, lo: int, hi: int) -> Optional[int]:
+        """Largest boundary offset b with lo < b <= hi."""
+        raise NotImplementedError
+
+    def first_boundary(self, text: str, lo: int, hi: int) -> Optional[int]:
+        """Smallest boundary offset b with lo <= b < hi."""
+        raise NotImplementedError
+
+
+class AnchoredBoundary(BoundaryStrategy):
+    """Boundaries found by scanning for a literal anchor with str.rfind/find.
+
+    ``offset`` is the boundary position relative to the start of the anchor,
+    and ``verify`` (matched at the boundary) rejects anchors that are not
+    real boundaries.
+    """
+    anchor = "\n"
+    offset = 1
+    verify: Optional["re.Pattern[str]"] = None
+
+    def _is_valid(self, text: str, position: int) -> bool:
+        return self.verify is None or self.verify.match(text, position) is not None
+
+    def last_boundary(self, text: str, lo: int, hi: int) -> Optional[int]:
+        floor = max(0, lo - self.offset + 1)
+        index = text.rfind(self.anchor, floor, hi - self.offset + len(self.anchor))
+        while index >= 0:
+            position = index + self.offset
+            if self._is_valid(text, position):
+                return position
+            index = text.rfind(self.anchor, floor, index + len(self.anchor) - 1)
+        return None
+
+    def first_boundary(self, text: str, lo: int, hi: int) -> Optional[int]:
+        ceiling = hi - self.offset - 1 + len(self.anchor)
+        index = text.find(self.anchor, max(0, lo - self.offset), ceiling)
+        while index >= 0:
+            position = index + self.offset
+            if position > 0 and self._is_valid(text, position):
+                return position
+            index = text.find(self.anchor, index + 1, ceiling)
+        return None
+
+
+class SentenceBoundary(BoundaryStrategy):
+    """Ends of sentences (., ! or ? plus closing quotes, before whitespace) and lines."""
+    name = "sentence"
+    marks = ".!?"
+    closers = "\"')]"
+
+    def _end_of_sentence(self, text: str, index: int) -> Optional[int]:
+        end = index + 1
+        while end < len(text) and text[end] in self.closers:
+            end += 1
+        if end == len(text) or text[end].isspace():
+            return end
+        return None
+
+    def last_boundary(self, text: str, lo: int, hi: int) -> Optional[int]:
+        # Sentence ends are dense, so search backwards rather than scanning
+        # every sentence in the window
+        best = text.rfind("\n", lo, hi)
+        best = best + 1 if best >= 0 else None
+        for mark in self.marks:
+            index = text.rfind(mark, lo, hi)
+            while index >= lo and (best is None or index >= best):
+                end = self._end_of_sentence(text, index)
+                if end is not None and end <= hi:
+                    best = end
+                    break
+                index = text.rfind(mark, lo, index)
+        return best if best is not None and best > lo else None
+
+    def first_boundary(self, text: str, lo: int, hi: int) -> Optional[int]:
+        best = text.find("\n", max(0, lo - 1), hi - 1)
+        best = best + 1 if best >= 0 else None
+        for mark in self.marks:
+            index = text.find(mark, max(0, lo - 1), hi - 1)
+            while index >= 0 and (best is None or index < best):
+                end = self._end_of_sentence(text, index)
+                if end is not None and lo <= end < hi:
+                    best = end
+                    break
+                index = text.find(mark, index + 1, hi - 1)
+        return best if best is not None and best > 0 else None
+
+
+class ParagraphBoundary(AnchoredBoundary):
+    """Blank lines between paragraphs."""
+    name = "paragraph"
+    anchor = "\n\n"
+    offset = 2
+
+
+class MarkdownHeadingBoundary(AnchoredBoundary):
+    """Cuts right before a markdown heading, so sections start chunks."""
+    name = "markdown_heading"
+    anchor = "\n#"
+    offset = 1
+    verify = re.compile(r"#{1,6}[ \t]")
+
+
+class SpeakerTurnBoundary(AnchoredBoundary):
+    """Cuts before a transcript line such as "[01:23] Speaker A: ..."."""
+    name = "speaker_turn"
+    anchor = "\n"
+    offset = 1
+    verify = re.compile(r"(?:\[[^\]\n]*\][ \t]*)?Speaker [^:\n]+:")
+
+
+# Boundary presets, in priority order. Paragraph breaks are only preferred
+# when they keep a chunk mostly full, so chunk counts stay close to a plain
+# sentence splitter.
+PROSE_BOUNDARIES = (ParagraphBoundary(min_fill=0.8), SentenceBoundary())
+MARKDOWN_BOUNDARIES = (MarkdownHeadingBoundary(min_fill=0.5), ParagraphBoundary(min_fill=0.8), SentenceBoundary())
+TRANSCRIPT_BOUNDARIES = (SpeakerTurnBoundary(min_fill=0.0), SentenceBoundary())
+
+
+class TextChunker:
+    """Sliding-window chunker driven by pluggable boundary strategies.
+
+    Windows are placed in a single forward pass: a chunk ends at the last
+    boundary of the first strategy (in priority order) that keeps it at least
+    ``min_fill`` full, or at ``chunk_size`` when none does. A chunk that ends
+    on a boundary is followed directly by the next one; after a hard cut the
+    next chunk repeats up to ``chunk_overlap`` characters, starting at the
+    first boundary in that range. Every lookup is confined to the current
+    window, so the total work is linear in the length of the text.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        strategies: Optional[Sequence[BoundaryStrategy]] = None
+    ):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be between 0 and chunk_size")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.strategies = list(strategies) if strategies is not None else list(PROSE_BOUNDARIES)
+
+    def split(self, text: str) -> List[TextSpan]:
+        length = len(text)
+        spans = []
+        start = 0
+        previous_end = 0
+        while start < length:
+            end = min(start + self.chunk_size, length)
+            cut_at_boundary = False
+            if end < length:
+                for strategy in self.strategies:
+                    # Never end at or before the previous chunk, or the overlap repeats
+                    lo = max(start + int(self.chunk_size * strategy.min_fill), previous_end)
+                    boundary = strategy.last_boundary(text, lo, end)
+                    if boundary is not None:
+                        end = boundary
+                        cut_at_boundary = True
+                        break
+
+            spans.append(TextSpan(start, end))
+            previous_end = end
+            if end >= length:
+                break
+
+            if cut_at_boundary or not self.chunk_overlap:
+                start = end
+                continue
+
+            # A hard cut split a sentence, so repeat the tail in the next chunk,
+            # starting it at a boundary when there is one
+            start = max(end - self.chunk_overlap, start + 1)
+            for strategy in self.strategies:
+                boundary = strategy.first_boundary(text, start, end)
+                if boundary is not None:
+                    start = boundary
+                    break
+
+        return spans
+
+    def split_many(self, texts: List[str]) -> List[List[TextSpan]]:
+        return [self.split(text) for text in texts]
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[span.start:span.end] for span in self.split(text)]
+
+
+class TokenChunker:
+    """Chunks text by token count with the embedding model's own tokenizer.
+
+    ``tokenizer`` is a HuggingFace ``tokenizers.Tokenizer`` with truncation
+    disabled. Texts are encoded in one batch; each window then covers at most
+    ``chunk_tokens`` tokens and is pulled back to the best boundary in its
+    character range, using the same strategies as TextChunker. As there,
+    ``overlap_tokens`` is only applied after a hard cut.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Any,
+        chunk_tokens: int = 256,
+        overlap_tokens: int = 32,
+        strategies: Optional[Sequence[BoundaryStrategy]] = None
+    ):
+        if chunk_tokens <= 0:
+            raise ValueError("chunk_tokens must be positive")
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError("overlap_tokens must be between 0 and chunk_tokens")
+
+        self.tokenizer = tokenizer
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.strategies = list(strategies) if strategies is not None else list(PROSE_BOUNDARIES)
+
+    def split(self, text: str) -> List[TextSpan]:
+        return self.split_many([text])[0]
+
+    def split_many(self, texts: List[str]) -> List[List[TextSpan]]:
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        return [self._split_encoded(text, encoding.offsets) for text, encoding in zip(texts, encodings)]
+
+    def _split_encoded(self, text: str, offsets: List[Any]) -> List[TextSpan]:
+        if not text.strip():
+            return []
+        if not offsets:
+            return [TextSpan(0, len(text))]
+
+        token_ends = [end for _, end in offsets]
+        spans = []
+        token = 0
+        previous_end = 0
+        while token < len(offsets):
+            start = offsets[token][0] if spans else 0
+            last = min(token + self.chunk_tokens, len(offsets)) - 1
+            end = token_ends[last] if last < len(offsets) - 1 else len(text)
+
+            cut_at_boundary = False
+            if end < len(text):
+                for strategy in self.strategies:
+                    lo = max(start + int((end - start) * strategy.min_fill), previous_end)
+                    boundary = strategy.last_boundary(text, lo, end)
+                    if boundary is not None:
+                        end = boundary
+                        cut_at_boundary = True
+                        break
+
+            spans.append(TextSpan(start, end))
+            previous_end = end
+            if end >= len(text):
+                break
+
+            # First token not fully inside this chunk
+            next_token = max(bisect_right(token_ends, end), token + 1)
+            if not cut_at_boundary and self.overlap_tokens:
+                next_token = max(next_token - self.overlap_tokens, token + 1)
+            token = next_token
+
+        return spans
+
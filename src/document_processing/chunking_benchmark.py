@@ -0,0 +1,164 @@
+"""Microbenchmarks for the chunking engine.
+
+Run with ``python -m src.document_processing.chunking_benchmark [--mb 1 4]``.
+Each case is timed against the rfind/string-concatenation loops the engine
+replaced, on synthetic prose, markdown and transcript inputs. For the
+sliding-window cases the share of text that ends up in some chunk is also
+reported: the old loop skipped text whenever it cut early at a boundary.
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+
+from src.document_processing.chunking import (
+    TextSpan,
+    TextChunker,
+    PROSE_BOUNDARIES,
+    MARKDOWN_BOUNDARIES,
+    TRANSCRIPT_BOUNDARIES
+)
+
+WORDS = [
+    "retrieval", "vector", "index", "chunk", "embedding", "model", "query", "latency",
+    "the", "a", "of", "and", "to", "in", "is", "for", "with", "on", "that", "by",
+    "document", "source", "speaker", "podcast", "notebook", "context", "answer", "citation"
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 24))]
+    return " ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"])
+
+
+def make_prose(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts, length = [], 0
+    while length < size:
+        paragraph = " ".join(_sentence(rng) for _ in range(rng.randint(2, 8))) + "\n\n"
+        parts.append(paragraph)
+        length += len(paragraph)
+    return "".join(parts)
+
+
+def make_markdown(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts, length = [], 0
+    while length < size:
+        section = f"## {_sentence(rng)[:40]}\n\n" + make_prose(rng.randint(500, 4000), rng.random())
+        parts.append(section)
+        length += len(section)
+    return "".join(parts)
+
+
+def make_utterances(size: int, seed: int = 0) -> List[Tuple[str, int, str]]:
+    rng = random.Random(seed)
+    utterances, length, clock = [], 0, 0
+    while length < size:
+        text = " ".join(_sentence(rng) for _ in range(rng.randint(1, 5)))
+        utterances.append((rng.choice("AB"), clock, text))
+        clock += rng.randint(2000, 20000)
+        length += len(text) + 20
+    return utterances
+
+
+def legacy_sliding_window(text: str, chunk_size: int, chunk_overlap: int) -> List[TextSpan]:
+    """The per-window rfind loop previously used by DocumentProcessor."""
+    spans, start = [], 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            boundary = max(text.rfind('.', start, end), text.rfind('\n', start, end))
+            if boundary > start + chunk_size * 0.5:
+                end = boundary + 1
+        spans.append(TextSpan(start, end))
+        start = max(start + chunk_size - chunk_overlap, end)
+    return spans
+
+
+def coverage(spans: List[TextSpan], length: int) -> float:
+    """Fraction of the text that falls inside at least one chunk."""
+    covered, reached = 0, 0
+    for span in spans:
+        covered += max(0, span.end - max(span.start, reached))
+        reached = max(reached, span.end)
+    return covered / length if length else 1.0
+
+
+def legacy_speaker_chunks(utterances, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """The string-concatenation loop previously used by AudioTranscriber."""
+    chunks, current = [], ""
+    for speaker, start, text in utterances:
+        line = f"[{start // 60000:02d}:{start // 1000 % 60:02d}] Speaker {speaker}: {text}\n"
+        if len(current + line) > chunk_size and current:
+            chunks.append(current.strip())
+            current = (current[-chunk_overlap:] if chunk_overlap > 0 else "") + line
+        else:
+            current += line
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def _render_transcript(utterances) -> str:
+    return "".join(
+        f"[{start // 60000:02d}:{start // 1000 % 60:02d}] Speaker {speaker}: {text}\n"
+        for speaker, start, text in utterances
+    )
+
+
+def _time(fn: Callable[[], list], repeat: int) -> Tuple[float, int]:
+    best, count = float("inf"), 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = len(fn())
+        best = min(best, time.perf_counter() - started)
+    return best, count
+
+
+def run(sizes_mb: List[float], chunk_size: int = 1000, chunk_overlap: int = 200, repeat: int = 3):
+    sentence = TextChunker(chunk_size, chunk_overlap, PROSE_BOUNDARIES)
+    markdown = TextChunker(chunk_size, chunk_overlap, MARKDOWN_BOUNDARIES)
+    speaker = TextChunker(chunk_size, chunk_overlap, TRANSCRIPT_BOUNDARIES)
+
+    print(
+        f"{'case':<28}{'MB':>6}{'legacy s':>11}{'engine s':>11}"
+        f"{'legacy n':>10}{'engine n':>10}{'legacy cov':>12}{'engine cov':>12}"
+    )
+    for mb in sizes_mb:
+        size = int(mb * 1024 * 1024)
+        prose = make_prose(size)
+        md = make_markdown(size)
+        utterances = make_utterances(size)
+
+        cases = [
+            ("prose / sentence", prose, lambda: legacy_sliding_window(prose, chunk_size, chunk_overlap),
+             lambda: sentence.split(prose)),
+            ("markdown / heading", md, lambda: legacy_sliding_window(md, chunk_size, chunk_overlap),
+             lambda: markdown.split(md)),
+            ("transcript / speaker turn", None, lambda: legacy_speaker_chunks(utterances, chunk_size, chunk_overlap),
+             lambda: speaker.split(_render_transcript(utterances))),
+        ]
+        for name, text, legacy, engine in cases:
+            legacy_time, legacy_count = _time(legacy, repeat)
+            engine_time, engine_count = _time(engine, repeat)
+            if text is not None:
+                legacy_cov = f"{coverage(legacy(), len(text)):.1%}"
+                engine_cov = f"{coverage(engine(), len(text)):.1%}"
+            else:
+                legacy_cov = engine_cov = "-"
+            print(
+                f"{name:<28}{mb:>6g}{legacy_time:>11.3f}{engine_time:>11.3f}"
+                f"{legacy_count:>10}{engine_count:>10}{legacy_cov:>12}{engine_cov:>12}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, nargs="+", default=[1, 4])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.mb, args.chunk_size, args.chunk_overlap, args.repeat)
@@ -1,17 +1,41 @@
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from dataclasses import dataclass
 from pathlib import Path
 import hashlib
 from datetime import datetime
 
-import pymupdf
+from src.document_processing.chunking import (
+    TextSpan,
+    TextChunker,
+    TokenChunker,
+    PROSE_BOUNDARIES,
+    MARKDOWN_BOUNDARIES
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def stable_chunk_id(
+    source_type: str,
+    source_file: str,
+    page_number: Optional[int],
+    offset: Optional[int],
+    content: str
+) -> str:
+    """Deterministic chunk id from source identity, position and a full content hash.
+    
+    The same chunk of the same source always maps to the same id, so
+    re-ingesting it can upsert in place; chunks from different sources never
+    share an id even when their text is identical.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    key = "\x1f".join([source_file, str(page_number), str(offset), content_hash])
+    return f"{source_type}_{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
 @dataclass
 class DocumentChunk:
     """Represents a processed document chunk with metadata for citations"""
@@ -32,8 +56,13 @@ class DocumentChunk:
             self.metadata = {}
     
     def _generate_chunk_id(self) -> str:
-        content_hash = hashlib.md5(self.content.encode()).hexdigest()[:8]
-        return f"{self.source_type}_{self.chunk_index}_{content_hash}"
+        offset = self.start_char if self.start_char is not None else self.chunk_index
+        return stable_chunk_id(self.source_type, self.source_file, self.page_number, offset, self.content)
+    
+    def refresh_chunk_id(self) -> str:
+        """Regenerate the id after the source or position fields were changed."""
+        self.chunk_id = self._generate_chunk_id()
+        return self.chunk_id
     
     def get_citation_info(self) -> Dict[str, Any]:
         citation = {
@@ -53,10 +82,30 @@ class DocumentChunk:
 
 
 class DocumentProcessor:
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        tokenizer: Any = None,
+        chunk_tokens: int = 256,
+        chunk_overlap_tokens: int = 32
+    ):
+        """Chunks by characters, or by tokens when the embedding model's tokenizer is given."""
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.supported_formats = {'.pdf', '.txt', '.md'} # add other formats if need be
+        
+        # Token-sized chunks always fit the embedding model
+        self.token_sized = tokenizer is not None
+        self.text_chunker: Union[TextChunker, TokenChunker]
+        self.markdown_chunker: Union[TextChunker, TokenChunker]
+        if tokenizer is not None:
+            self.text_chunker = TokenChunker(tokenizer, chunk_tokens, chunk_overlap_tokens, PROSE_BOUNDARIES)
+            self.markdown_chunker = TokenChunker(tokenizer, chunk_tokens, chunk_overlap_tokens, MARKDOWN_BOUNDARIES)
+            logger.info(f"Token-based chunking: {chunk_tokens} tokens, {chunk_overlap_tokens} overlap")
+        else:
+            self.text_chunker = TextChunker(chunk_size, chunk_overlap, PROSE_BOUNDARIES)
+            self.markdown_chunker = TextChunker(chunk_size, chunk_overlap, MARKDOWN_BOUNDARIES)
     
     def process_document(self, file_path: str) -> List[DocumentChunk]:
         file_path = Path(file_path)
@@ -79,11 +128,15 @@ class DocumentProcessor:
             raise
     
     def _process_pdf(self, file_path: Path) -> List[DocumentChunk]:
+        import pymupdf
+        
         chunks = []
         try:
             doc = pymupdf.open(file_path)
             total_pages = len(doc)
             
+            processed_at = datetime.now().isoformat()
+            pages = []
             for page_num in range(total_pages):
                 page = doc.load_page(page_num)
                 text = page.get_text()
@@ -96,19 +149,26 @@ class DocumentProcessor:
                     'total_pages': total_pages,
                     'page_width': page.rect.width,
                     'page_height': page.rect.height,
-                    'processed_at': datetime.now().isoformat()
+                    'processed_at': processed_at
                 }
-                
+                pages.append((page_num + 1, text, page_metadata))
+            
+            doc.close()
+            
+            # Split every page in one call so token mode tokenizes the document as one batch
+            page_spans = self.text_chunker.split_many([text for _, text, _ in pages])
+            
+            for (page_number, text, page_metadata), spans in zip(pages, page_spans):
                 page_chunks = self._create_chunks_from_text(
                     text, 
                     file_path.name, 
                     source_type='pdf', 
-                    page_number=page_num+1,
-                    additional_metadata=page_metadata
+                    page_number=page_number,
+                    additional_metadata=page_metadata,
+                    spans=spans
                 )
                 chunks.extend(page_chunks)
-            
-            doc.close()
+
             logger.info(f"Processed PDF: {len(chunks)} chunks from {total_pages} pages")
             
         except Exception as e:
@@ -133,7 +193,8 @@ class DocumentProcessor:
                 file_path.name, 
                 source_type='txt', 
                 page_number=None,
-                additional_metadata=metadata
+                additional_metadata=metadata,
+                chunker=self.markdown_chunker if file_path.suffix.lower() == '.md' else None
             )
             
             logger.info(f"Processed text file: {len(chunks)} chunks")
@@ -149,46 +210,33 @@ class DocumentProcessor:
         source_file: str, 
         source_type: str,
         page_number: Optional[int] = None,
-        additional_metadata: Dict[str, Any] = None
+        additional_metadata: Dict[str, Any] = None,
+        chunker: Optional[Union[TextChunker, TokenChunker]] = None,
+        spans: Optional[List[TextSpan]] = None
     ) -> List[DocumentChunk]:
         
         if not text.strip():
             return []
         
+        if spans is None:
+            spans = (chunker or self.text_chunker).split(text)
+        
         chunks = []
-        start = 0
-        chunk_index = 0
-        while start < len(text):
-            end = min(start + self.chunk_size, len(text))
-            if end < len(text):
-                last_period = text.rfind('.', start, end)
-                last_newline = text.rfind('\n', start, end)
-                boundary = max(last_period, last_newline)
-                if boundary > start + self.chunk_size * 0.5:
-                    end = boundary + 1
-            
-            chunk_text = text[start:end].strip()
+        for span in spans:
+            chunk_text = text[span.start:span.end].strip()
             
             if chunk_text:
-                chunk_metadata = additional_metadata.copy() if additional_metadata else {}
-                
                 chunk = DocumentChunk(
                     content=chunk_text,
                     source_file=source_file,
                     source_type=source_type,
                     page_number=page_number,
-                    chunk_index=chunk_index,
-                    start_char=start,
-                    end_char=end-1,
-                    metadata=chunk_metadata
+                    chunk_index=len(chunks),
+                    start_char=span.start,
+                    end_char=span.end-1,
+                    metadata=dict(additional_metadata) if additional_metadata else {}
                 )
-                
                 chunks.append(chunk)
-                chunk_index += 1
-            
-            start = max(start + self.chunk_size - self.chunk_overlap, end)
-            if start >= len(text):
-                break
         
         return chunks
     
@@ -1,14 +1,64 @@
 import logging
-from typing import List, Dict, Any, Tuple
+import threading
+from typing import List, Dict, Any, Tuple, Optional, TYPE_CHECKING
 import numpy as np
 from dataclasses import dataclass
 
-from fastembed import TextEmbedding
 from src.document_processing.doc_processor import DocumentChunk
 
+if TYPE_CHECKING:
+    from src.document_processing.chunk_batch import ChunkBatch
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Embedding models are shared by every EmbeddingGenerator in the process
+_shared_models: Dict[str, Tuple[Any, int]] = {}
+_shared_tokenizers: Dict[str, Tuple[Any, int]] = {}
+_shared_models_lock = threading.Lock()
+
+# Used when the tokenizer does not report its truncation length
+DEFAULT_MAX_SEQUENCE_TOKENS = 512
+
+
+def get_shared_model(model_name: str) -> Tuple[Any, int]:
+    """Load (once per process) and return a fastembed model and its dimension."""
+    with _shared_models_lock:
+        if model_name not in _shared_models:
+            from fastembed import TextEmbedding
+            
+            logger.info(f"Loading embedding model: {model_name}")
+            model = TextEmbedding(model_name=model_name)
+            sample_embedding = list(model.embed(["test"]))[0]
+            _shared_models[model_name] = (model, len(sample_embedding))
+        
+        return _shared_models[model_name]
+
+
+def get_shared_tokenizer(model_name: str) -> Optional[Tuple[Any, int]]:
+    """Return the model's own tokenizer and its max sequence length, if exposed.
+    
+    The returned tokenizer is a copy with truncation and padding disabled, so
+    whole documents can be tokenized without affecting the embedding model.
+    """
+    model, _ = get_shared_model(model_name)
+    with _shared_models_lock:
+        if model_name not in _shared_tokenizers:
+            tokenizer = getattr(getattr(model, "model", None), "tokenizer", None)
+            if tokenizer is None:
+                logger.warning(f"No tokenizer exposed by embedding model {model_name}")
+                return None
+            
+            from tokenizers import Tokenizer
+            
+            max_tokens = (tokenizer.truncation or {}).get("max_length", DEFAULT_MAX_SEQUENCE_TOKENS)
+            tokenizer = Tokenizer.from_str(tokenizer.to_str())
+            tokenizer.no_truncation()
+            tokenizer.no_padding()
+            _shared_tokenizers[model_name] = (tokenizer, max_tokens)
+        
+        return _shared_tokenizers[model_name]
+
 
 @dataclass
 class EmbeddedChunk:
@@ -38,15 +88,14 @@ class EmbeddingGenerator:
         self.model_name = model_name
         self.model = None
         self.embedding_dim = None
+        self.truncated_chunks = 0
+        self._tokenizer = None
         self._initialize_model()
     
     def _initialize_model(self):
         try:
             logger.info(f"Initializing embedding model: {self.model_name}")
-            self.model = TextEmbedding(model_name=self.model_name)
-            
-            sample_embedding = list(self.model.embed(["test"]))[0]
-            self.embedding_dim = len(sample_embedding)
+            self.model, self.embedding_dim = get_shared_model(self.model_name)
             
             logger.info(f"Model initialized successfully. Embedding dimension: {self.embedding_dim}")
             
@@ -54,7 +103,32 @@ class EmbeddingGenerator:
             logger.error(f"Failed to initialize embedding model: {str(e)}")
             raise
     
-    def generate_embeddings(self, chunks: List[DocumentChunk]) -> List[EmbeddedChunk]:
+    @property
+    def tokenizer(self) -> Optional[Tuple[Any, int]]:
+        """The model's tokenizer and max sequence length, or None if unavailable."""
+        if self._tokenizer is None:
+            self._tokenizer = get_shared_tokenizer(self.model_name) or False
+        return self._tokenizer or None
+    
+    def count_truncated(self, texts: List[str]) -> int:
+        """Count texts longer than the model's max sequence length."""
+        if not self.tokenizer:
+            return 0
+        tokenizer, max_tokens = self.tokenizer
+        encodings = tokenizer.encode_batch(texts)
+        return sum(1 for encoding in encodings if len(encoding.ids) > max_tokens)
+    
+    def _warn_truncated(self, texts: List[str]) -> None:
+        truncated = self.count_truncated(texts)
+        if truncated:
+            self.truncated_chunks += truncated
+            logger.warning(
+                f"{truncated} of {len(texts)} chunks exceed the {self.model_name} "
+                f"sequence limit and will be truncated"
+            )
+    
+    def generate_embeddings(self, chunks: List[DocumentChunk], check_truncation: bool = True) -> List[EmbeddedChunk]:
+        """Embed chunks; with ``check_truncation`` off they are not re-tokenized to count truncated ones."""
         if not chunks:
             return []
         
@@ -62,6 +136,8 @@ class EmbeddingGenerator:
         
         try:
             texts = [chunk.content for chunk in chunks]
+            if check_truncation:
+                self._warn_truncated(texts)
             
             embeddings = list(self.model.embed(texts))
             embedded_chunks = []
@@ -80,6 +156,35 @@ class EmbeddingGenerator:
             logger.error(f"Error generating embeddings: {str(e)}")
             raise
     
+    def embed_batch(self, batch: "ChunkBatch", batch_size: int = 256, check_truncation: bool = True) -> "ChunkBatch":
+        """Fill ``batch.embeddings`` with one (n, d) float32 matrix.
+        
+        Turn ``check_truncation`` off for chunks already sized in the model's tokens.
+        """
+        if len(batch) == 0:
+            batch.embeddings = np.empty((0, self.embedding_dim), dtype=np.float32)
+            batch.embedding_model = self.model_name
+            return batch
+        
+        logger.info(f"Generating embeddings for {len(batch)} chunks")
+        
+        try:
+            if check_truncation:
+                self._warn_truncated(list(batch.contents()))
+            
+            matrix = np.empty((len(batch), self.embedding_dim), dtype=np.float32)
+            for i, embedding in enumerate(self.model.embed(batch.contents(), batch_size=batch_size)):
+                matrix[i] = embedding
+            
+            batch.embeddings = matrix
+            batch.embedding_model = self.model_name
+            logger.info(f"Successfully generated {len(batch)} embeddings")
+            return batch
+            
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {str(e)}")
+            raise
+    
     def generate_query_embedding(self, query_text: str) -> np.ndarray:
         try:
             embedding = list(self.model.embed([query_text]))[0]
@@ -1,10 +1,12 @@
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
 from dataclasses import dataclass
 
-from crewai import LLM
-from src.vector_database.milvus_vector_db import MilvusVectorDB
-from src.embeddings.embedding_generator import EmbeddingGenerator
+from src.vector_database.filters import source_filter
+
+if TYPE_CHECKING:
+    from src.vector_database.base import VectorStore
+    from src.embeddings.embedding_generator import EmbeddingGenerator
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,15 +38,19 @@ class RAGResult:
 class RAGGenerator:
     def __init__(
         self,
-        embedding_generator: EmbeddingGenerator,
-        vector_db: MilvusVectorDB,
+        embedding_generator: "EmbeddingGenerator",
+        vector_db: "VectorStore",
         gemini_api_key: str,
         model_name: str = "gemini-2.5-flash",
         temperature: float = 0.1,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        two_phase_retrieval: bool = True
     ):
+        from crewai import LLM
+        
         self.embedding_generator = embedding_generator
         self.vector_db = vector_db
+        self.two_phase_retrieval = two_phase_retrieval
         
         self.llm = LLM(
             model=f"google/{model_name}",
@@ -62,7 +68,9 @@ class RAGGenerator:
         max_chunks: int = 8,
         max_context_chars: int = 4000,
         top_k: int = 10,
+        sources: Optional[List[str]] = None
     ) -> RAGResult:
+        """Answer ``query`` from the collection, or only from ``sources`` if given."""
 
         if not query.strip():
             return RAGResult(
@@ -77,9 +85,8 @@ class RAGGenerator:
             
             # Step 1: Retrieve relevant chunks
             query_vector = self.embedding_generator.generate_query_embedding(query)
-            search_results = self.vector_db.search(
-                query_vector=query_vector.tolist(),
-                limit=top_k
+            search_results, retrieval_count = self._retrieve(
+                query_vector.tolist(), top_k, max_chunks, source_filter(sources)
             )
             
             if not search_results:
@@ -106,7 +113,7 @@ class RAGGenerator:
                 query=query,
                 response=response,
                 sources_used=sources_info,
-                retrieval_count=len(search_results)
+                retrieval_count=retrieval_count
             )
             
             logger.info(f"Response generated successfully using {len(sources_info)} sources")
@@ -121,6 +128,38 @@ class RAGGenerator:
                 retrieval_count=0
             )
     
+    def _retrieve(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        max_chunks: int,
+        filter_expr: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Search results to build the context from, and how many hits were retrieved.
+        
+        In two-phase mode the ANN search returns only ids and scores; hits are
+        deduplicated and cut to ``max_chunks`` before one batched query
+        fetches their content and citation fields. ``filter_expr`` is applied
+        inside the search, so all ``top_k`` hits satisfy it.
+        """
+        if not self.two_phase_retrieval:
+            search_results = self.vector_db.search(query_vector=query_vector, limit=top_k, filter_expr=filter_expr)
+            return search_results, len(search_results)
+        
+        hits = self.vector_db.search_ids(query_vector=query_vector, limit=top_k, filter_expr=filter_expr)
+        
+        selected = []
+        seen = set()
+        for hit in hits:
+            if hit['id'] in seen:
+                continue
+            seen.add(hit['id'])
+            selected.append(hit)
+            if len(selected) >= max_chunks:
+                break
+        
+        return self.vector_db.hydrate(selected), len(hits)
+    
     def _format_context_with_citations(
         self,
         search_results: List[Dict[str, Any]],
@@ -130,6 +169,7 @@ class RAGGenerator:
 
         context_parts = []
         sources_info = []
+        cited_results = []
         total_chars = 0
         for i, result in enumerate(search_results[:max_chunks]):
             citation_info = result['citation']
@@ -153,9 +193,16 @@ class RAGGenerator:
                 'source_type': source_type,
                 'page_number': page_number,
                 'chunk_id': result['id'],
+                'content': chunk_content,
                 'relevance_score': result['score']
             }
             sources_info.append(source_info)
+            cited_results.append(result)
+        
+        # Source-level metadata is only fetched for the chunks that made it into the context
+        self.vector_db.join_source_metadata(cited_results)
+        for source_info, result in zip(sources_info, cited_results):
+            source_info['metadata'] = result.get('metadata') or {}
         
         formatted_context = '\n\n'.join(context_parts)
 
@@ -183,14 +230,14 @@ Please provide a comprehensive answer with proper citations. Make sure every fac
     def generate_summary(
         self,
         max_chunks: int = 15,
-        summary_length: str = "medium"
+        summary_length: str = "medium",
+        sources: Optional[List[str]] = None
     ) -> RAGResult:
         try:
             summary_query = "main topics key findings important information overview"
             query_vector = self.embedding_generator.generate_query_embedding(summary_query)
-            search_results = self.vector_db.search(
-                query_vector=query_vector.tolist(),
-                limit=max_chunks
+            search_results, retrieval_count = self._retrieve(
+                query_vector.tolist(), max_chunks, max_chunks, source_filter(sources)
             )
             
             if not search_results:
@@ -230,7 +277,7 @@ Please provide a well-structured summary with proper citations:"""
                 query="Document Summary",
                 response=response,
                 sources_used=sources_info,
-                retrieval_count=len(search_results)
+                retrieval_count=retrieval_count
             )
             
         except Exception as e:
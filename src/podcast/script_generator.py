@@ -1,14 +1,75 @@
 import logging
 import json
-from typing import List, Dict, Any
+import queue
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Iterable
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 
-from crewai import LLM
 from src.document_processing.doc_processor import DocumentProcessor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Documents longer than this are not sent to the LLM in one call
+DIRECT_CONTEXT_CHARS = 8000
+
+# Fragments of streamed LLM responses, by id() of the streaming LLM that produced them
+_stream_sinks: Dict[int, "queue.Queue[str]"] = {}
+_stream_sinks_lock = threading.Lock()
+_stream_forwarder_installed = False
+
+
+def _install_stream_forwarder() -> bool:
+    """Forward crewai LLMStreamChunkEvents to the sink registered for their LLM.
+    
+    Returns False if this crewai version has no streaming events.
+    """
+    global _stream_forwarder_installed
+    
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        try:
+            from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+        except ImportError:
+            return False
+    
+    with _stream_sinks_lock:
+        if not _stream_forwarder_installed:
+            @crewai_event_bus.on(LLMStreamChunkEvent)
+            def forward_chunk(source, event):
+                sink = _stream_sinks.get(id(source))
+                if sink is not None:
+                    sink.put(event.chunk)
+            
+            _stream_forwarder_installed = True
+    return True
+
+
+# Section notes kept per generator, least recently used dropped first
+NOTES_CACHE_SIZE = 256
+
+SCRIPT_RESPONSE_FORMAT = """RESPONSE FORMAT:
+Respond with a valid JSON object containing a 'script' array. Each array element should be an object with either 'Speaker 1' or 'Speaker 2' as the key and their dialogue as the value.
+
+Example format:
+{
+  "script": [
+    {"Speaker 1": "Welcome everyone to our podcast! Today we're diving into some fascinating insights from this document..."},
+    {"Speaker 2": "Thanks for having me! I'm really excited to discuss this topic. The first thing that caught my attention was..."}
+  ]
+}"""
+
+STREAMING_RESPONSE_FORMAT = """RESPONSE FORMAT:
+Respond in JSON Lines: one JSON object per line, one line per dialogue turn, with no surrounding array, no code fences and no other text. Each object has either 'Speaker 1' or 'Speaker 2' as the key and their dialogue as the value.
+
+Example format:
+{"Speaker 1": "Welcome everyone to our podcast! Today we're diving into some fascinating insights from this document..."}
+{"Speaker 2": "Thanks for having me! I'm really excited to discuss this topic. The first thing that caught my attention was..."}"""
+
 
 @dataclass
 class PodcastScript:
@@ -32,22 +93,82 @@ class PodcastScript:
         }, indent=2)
 
 
+class ScriptLineParser:
+    """Incrementally parses line-delimited script output as it streams in"""
+    
+    def __init__(self):
+        self._buffer = ""
+    
+    def feed(self, text: str) -> List[Dict[str, str]]:
+        self._buffer += text
+        *complete, self._buffer = self._buffer.split('\n')
+        return [item for item in map(self._parse_line, complete) if item is not None]
+    
+    def close(self) -> List[Dict[str, str]]:
+        remaining, self._buffer = self._buffer, ""
+        item = self._parse_line(remaining)
+        return [item] if item is not None else []
+    
+    def _parse_line(self, line: str) -> Optional[Dict[str, str]]:
+        line = line.strip().rstrip(',')
+        if not line or line.startswith('```') or line in ('[', ']', '{', '}'):
+            return None
+        
+        try:
+            item = json.loads(line)
+            return item if isinstance(item, dict) else None
+        except json.JSONDecodeError:
+            pass
+        
+        # Tolerate plain "Speaker 1: ..." lines
+        speaker, sep, dialogue = line.partition(':')
+        if sep and speaker.strip().lower().startswith('speaker'):
+            return {speaker.strip(): dialogue.strip()}
+        
+        logger.debug(f"Skipping unparseable script line: {line[:80]}")
+        return None
+
+
 class PodcastScriptGenerator:
-    def __init__(self, gemini_api_key: str, model_name: str = "gemini-2.5-flash"):
-        self.llm = LLM(
-            model=f"google/{model_name}",
-            temperature=0.7,
-            max_tokens=4000,
-            api_key=gemini_api_key
-        )
+    def __init__(
+        self,
+        gemini_api_key: str,
+        model_name: str = "gemini-2.5-flash",
+        section_chars: int = 6000,
+        max_concurrency: int = 4,
+        notes_cache_size: int = NOTES_CACHE_SIZE
+    ):
+        from crewai import LLM
+        
+        # Kept so a streaming copy of the LLM can be built with the same settings
+        self._llm_settings = {
+            "model": f"google/{model_name}",
+            "temperature": 0.7,
+            "max_tokens": 4000,
+            "api_key": gemini_api_key
+        }
+        self.llm = LLM(**self._llm_settings)
         self.doc_processor = DocumentProcessor()
+        self.gemini_api_key = gemini_api_key
+        self.model_name = model_name
+        
+        # Hierarchical (map-reduce) mode settings
+        self.section_chars = section_chars
+        self.max_concurrency = max_concurrency
+        # Notes by section hash, reused when the same document is scripted again
+        # (e.g. another style or duration); lives as long as this generator
+        self._notes_cache: OrderedDict[str, str] = OrderedDict()
+        self.notes_cache_size = notes_cache_size
+        self._cache_lock = threading.Lock()
+        
         logger.info(f"Podcast script generator initialized with {model_name}")
     
     def generate_script_from_document(
         self,
         document_path: str,
         podcast_style: str = "conversational",
-        target_duration: str = "10 minutes"
+        target_duration: str = "10 minutes",
+        hierarchical: Optional[bool] = None
     ) -> PodcastScript:
 
         logger.info(f"Generating podcast script from: {document_path}")
@@ -61,7 +182,8 @@ class PodcastScriptGenerator:
         script_data = self._generate_conversation_script(
             document_content, 
             podcast_style, 
-            target_duration
+            target_duration,
+            hierarchical
         )
         
         podcast_script = PodcastScript(
@@ -79,7 +201,8 @@ class PodcastScriptGenerator:
         text_content: str,
         source_name: str = "Text Input",
         podcast_style: str = "conversational",
-        target_duration: str = "10 minutes"
+        target_duration: str = "10 minutes",
+        hierarchical: Optional[bool] = None
     ) -> PodcastScript:
 
         logger.info("Generating podcast script from text input")
@@ -87,7 +210,8 @@ class PodcastScriptGenerator:
         script_data = self._generate_conversation_script(
             text_content,
             podcast_style,
-            target_duration
+            target_duration,
+            hierarchical
         )
         
         podcast_script = PodcastScript(
@@ -105,7 +229,8 @@ class PodcastScriptGenerator:
         website_chunks: List[Any],
         source_url: str,
         podcast_style: str = "conversational",
-        target_duration: str = "10 minutes"
+        target_duration: str = "10 minutes",
+        hierarchical: Optional[bool] = None
     ) -> PodcastScript:
 
         logger.info(f"Generating podcast script from website: {source_url}")
@@ -117,7 +242,8 @@ class PodcastScriptGenerator:
         script_data = self._generate_conversation_script(
             website_content,
             podcast_style,
-            target_duration
+            target_duration,
+            hierarchical
         )
         
         podcast_script = PodcastScript(
@@ -130,32 +256,147 @@ class PodcastScriptGenerator:
         logger.info(f"Generated website script with {podcast_script.total_lines} lines")
         return podcast_script
     
+    def stream_script_from_text(
+        self,
+        text_content: str,
+        podcast_style: str = "conversational",
+        target_duration: str = "10 minutes",
+        hierarchical: Optional[bool] = None
+    ) -> Iterator[Dict[str, str]]:
+        """Yield cleaned dialogue lines as soon as the LLM produces them.
+        
+        In hierarchical mode the outline is built first; each segment is then
+        streamed line by line, later segments streaming in the background
+        while earlier ones are consumed.
+        """
+        logger.info("Streaming podcast script from text input")
+        
+        if hierarchical is None:
+            hierarchical = len(text_content) > DIRECT_CONTEXT_CHARS
+        
+        if hierarchical:
+            raw_lines = self._stream_hierarchical_lines(text_content, podcast_style, target_duration)
+        else:
+            prompt = self._build_direct_prompt(
+                text_content,
+                podcast_style,
+                target_duration,
+                STREAMING_RESPONSE_FORMAT
+            )
+            raw_lines = self._iter_streamed_lines(prompt)
+        
+        expected_speaker = "Speaker 1"
+        line_count = 0
+        for item in raw_lines:
+            line = self._clean_script_line(item, expected_speaker)
+            if line is None:
+                continue
+            
+            line_count += 1
+            expected_speaker = "Speaker 2" if expected_speaker == "Speaker 1" else "Speaker 1"
+            yield line
+        
+        if line_count < 2:
+            raise ValueError("Generated script is too short or invalid")
+        
+        logger.info(f"Streamed script with {line_count} lines")
+    
+    def _iter_streamed_lines(self, prompt: str) -> Iterator[Dict[str, str]]:
+        parser = ScriptLineParser()
+        for fragment in self._stream_llm(prompt):
+            yield from parser.feed(fragment)
+        yield from parser.close()
+    
+    def _stream_llm(self, prompt: str) -> Iterator[str]:
+        """Yield response fragments from the configured crewai LLM as they arrive.
+        
+        A streaming copy of ``self.llm`` is called on a helper thread and its
+        stream chunk events are forwarded here. Without streaming events the
+        whole response is yielded at once.
+        """
+        from crewai import LLM
+        
+        if not _install_stream_forwarder():
+            yield self.llm.call(prompt)
+            return
+        
+        llm = LLM(**self._llm_settings, stream=True)
+        fragments: "queue.Queue[Any]" = queue.Queue()
+        done = object()
+        outcome: Dict[str, Any] = {}
+        
+        def call():
+            try:
+                outcome['response'] = llm.call(prompt)
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                fragments.put(done)
+        
+        with _stream_sinks_lock:
+            _stream_sinks[id(llm)] = fragments
+        try:
+            threading.Thread(target=call, name="podcast-llm-stream", daemon=True).start()
+            streamed = False
+            while (fragment := fragments.get()) is not done:
+                streamed = True
+                yield fragment
+        finally:
+            with _stream_sinks_lock:
+                _stream_sinks.pop(id(llm), None)
+        
+        if 'error' in outcome:
+            logger.error(f"Error streaming script: {str(outcome['error'])}")
+            raise outcome['error']
+        
+        # The provider answered without streaming
+        if not streamed and outcome.get('response'):
+            yield outcome['response']
+    
     def _generate_conversation_script(
         self,
         document_content: str,
         podcast_style: str,
-        target_duration: str
+        target_duration: str,
+        hierarchical: Optional[bool] = None
     ) -> Dict[str, Any]:
 
-        style_prompts = {
-            "conversational": "Create a natural, friendly conversation between two hosts discussing the document. They should build on each other's points and occasionally ask clarifying questions.",
-            "educational": "Create an educational discussion where one speaker explains concepts and the other asks thoughtful questions to help clarify complex topics for listeners.",
-            "interview": "Create an interview format where Speaker 1 acts as the interviewer asking questions and Speaker 2 provides detailed explanations from the document.",
-            "debate": "Create a thoughtful discussion where speakers present different perspectives on the topics, maintaining respect while exploring various viewpoints."
-        }
+        if hierarchical is None:
+            hierarchical = len(document_content) > DIRECT_CONTEXT_CHARS
         
-        style_instruction = style_prompts.get(podcast_style, style_prompts["conversational"])
-    
-        duration_guidelines = {
-            "5 minutes": "Keep the conversation concise, focusing on 3-4 main points with brief explanations.",
-            "10 minutes": "Cover the key topics thoroughly with good explanations and examples.",
-            "15 minutes": "Provide comprehensive coverage with detailed discussions and multiple examples.",
-            "20 minutes": "Create an in-depth exploration with extensive analysis and supporting details."
-        }
+        if hierarchical:
+            return self._generate_hierarchical_script(
+                document_content,
+                podcast_style,
+                target_duration
+            )
         
-        duration_guide = duration_guidelines.get(target_duration, duration_guidelines["10 minutes"])
+        prompt = self._build_direct_prompt(
+            document_content,
+            podcast_style,
+            target_duration,
+            SCRIPT_RESPONSE_FORMAT
+        )
+        
+        try:
+            response = self.llm.call(prompt)
+            validated_script = self._validate_and_clean_script(self._parse_script_response(response))
+            return {'script': validated_script}
+        
+        except Exception as e:
+            logger.error(f"Error generating script: {str(e)}")
+            raise
+    
+    def _build_direct_prompt(
+        self,
+        document_content: str,
+        podcast_style: str,
+        target_duration: str,
+        response_format: str
+    ) -> str:
+        style_instruction, duration_guide = self._get_style_guidelines(podcast_style, target_duration)
         
-        prompt = f"""Using the following document, create a podcast script for two speakers: 'Speaker 1' and 'Speaker 2'. 
+        return f"""Using the following document, create a podcast script for two speakers: 'Speaker 1' and 'Speaker 2'. 
 
 STYLE GUIDELINES:
 {style_instruction}
@@ -172,33 +413,36 @@ CONVERSATION RULES:
 6. Maintain professional grammar and punctuation throughout
 7. Make it engaging for listeners who haven't read the document
 
-RESPONSE FORMAT:
-Respond with a valid JSON object containing a 'script' array. Each array element should be an object with either 'Speaker 1' or 'Speaker 2' as the key and their dialogue as the value.
-
-Example format:
-{{
-  "script": [
-    {{"Speaker 1": "Welcome everyone to our podcast! Today we're diving into some fascinating insights from this document..."}},
-    {{"Speaker 2": "Thanks for having me! I'm really excited to discuss this topic. The first thing that caught my attention was..."}}
-  ]
-}}
+{response_format}
 
 DOCUMENT CONTENT:
-{document_content[:8000]}  
+{document_content[:DIRECT_CONTEXT_CHARS]}  
 
 Generate an engaging {target_duration} podcast script now:"""
+    
+    def _get_style_guidelines(self, podcast_style: str, target_duration: str) -> Tuple[str, str]:
+        style_prompts = {
+            "conversational": "Create a natural, friendly conversation between two hosts discussing the document. They should build on each other's points and occasionally ask clarifying questions.",
+            "educational": "Create an educational discussion where one speaker explains concepts and the other asks thoughtful questions to help clarify complex topics for listeners.",
+            "interview": "Create an interview format where Speaker 1 acts as the interviewer asking questions and Speaker 2 provides detailed explanations from the document.",
+            "debate": "Create a thoughtful discussion where speakers present different perspectives on the topics, maintaining respect while exploring various viewpoints."
+        }
+        
+        style_instruction = style_prompts.get(podcast_style, style_prompts["conversational"])
+    
+        duration_guidelines = {
+            "5 minutes": "Keep the conversation concise, focusing on 3-4 main points with brief explanations.",
+            "10 minutes": "Cover the key topics thoroughly with good explanations and examples.",
+            "15 minutes": "Provide comprehensive coverage with detailed discussions and multiple examples.",
+            "20 minutes": "Create an in-depth exploration with extensive analysis and supporting details."
+        }
         
+        duration_guide = duration_guidelines.get(target_duration, duration_guidelines["10 minutes"])
+        return style_instruction, duration_guide
+    
+    def _parse_script_response(self, response: str) -> List[Dict[str, str]]:
         try:
-            response = self.llm.call(prompt)
             script_data = json.loads(response)
-            
-            if 'script' not in script_data or not isinstance(script_data['script'], list):
-                raise ValueError("Invalid script format returned by LLM")
-            
-            validated_script = self._validate_and_clean_script(script_data['script'])
-            
-            return {'script': validated_script}
-            
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse LLM response as JSON: {e}")
             response_clean = response.strip()
@@ -209,40 +453,286 @@ Generate an engaging {target_duration} podcast script now:"""
             
             try:
                 script_data = json.loads(response_clean)
-                validated_script = self._validate_and_clean_script(script_data['script'])
-                return {'script': validated_script}
-            except:
+            except json.JSONDecodeError:
                 raise ValueError(f"Could not parse LLM response as valid JSON: {response}")
         
+        if not isinstance(script_data, dict) or not isinstance(script_data.get('script'), list):
+            raise ValueError("Invalid script format returned by LLM")
+        
+        return script_data['script']
+    
+    # ------------------------------------------------------------------
+    # Hierarchical (map-reduce) generation for long documents
+    # ------------------------------------------------------------------
+    
+    def _generate_hierarchical_script(
+        self,
+        document_content: str,
+        podcast_style: str,
+        target_duration: str
+    ) -> Dict[str, Any]:
+        """Summarize sections in parallel, reduce to an outline, then script each outline section."""
+        combined_script = [
+            line
+            for segment in self._iter_hierarchical_segments(document_content, podcast_style, target_duration)
+            for line in segment
+        ]
+        return {'script': self._validate_and_clean_script(combined_script)}
+    
+    def _iter_hierarchical_segments(
+        self,
+        document_content: str,
+        podcast_style: str,
+        target_duration: str
+    ) -> Iterator[List[Dict[str, str]]]:
+        segments = self._plan_segments(document_content, podcast_style, target_duration, SCRIPT_RESPONSE_FORMAT)
+        
+        def script_segment(segment: Tuple[str, str]) -> List[Dict[str, str]]:
+            title, prompt = segment
+            return self._generate_segment_script(title, prompt)
+        
+        # Generate the script segment by segment, yielding segments in episode order
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            yield from executor.map(script_segment, segments)
+    
+    def _stream_hierarchical_lines(
+        self,
+        document_content: str,
+        podcast_style: str,
+        target_duration: str
+    ) -> Iterator[Dict[str, str]]:
+        """Stream every segment concurrently into its own buffer and yield lines in episode order."""
+        segments = self._plan_segments(document_content, podcast_style, target_duration, STREAMING_RESPONSE_FORMAT)
+        buffers = [queue.Queue() for _ in segments]
+        done = object()
+        
+        def stream_segment(position: int):
+            title, prompt = segments[position]
+            try:
+                for line in self._iter_streamed_lines(prompt):
+                    buffers[position].put(line)
+                buffers[position].put(done)
+            except Exception as e:
+                logger.error(f"Error streaming script for segment '{title}': {str(e)}")
+                buffers[position].put(e)
+        
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for position in range(len(segments)):
+                executor.submit(stream_segment, position)
+            
+            for buffer in buffers:
+                while (item := buffer.get()) is not done:
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+    
+    def _plan_segments(
+        self,
+        document_content: str,
+        podcast_style: str,
+        target_duration: str,
+        response_format: str
+    ) -> List[Tuple[str, str]]:
+        """Map sections to notes, reduce them to an outline, and return a (title, prompt) per outline segment."""
+        sections = self._split_into_sections(document_content)
+        logger.info(f"Hierarchical script generation: {len(sections)} sections of ~{self.section_chars} chars")
+        
+        # Map: section notes, cached by content hash
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            notes = list(executor.map(self._summarize_section, sections))
+        notes = [n for n in notes if n.strip()]
+        if not notes:
+            raise ValueError("No section notes could be generated from document")
+        
+        # Reduce: notes -> outline, in bounded batches so each call stays small
+        outline = self._reduce_notes_to_outline(notes, target_duration)
+        logger.info(f"Reduced {len(notes)} section notes into {len(outline)} outline segments")
+        
+        style_instruction, _ = self._get_style_guidelines(podcast_style, target_duration)
+        outline_titles = [segment['title'] for segment in outline]
+        return [
+            (
+                segment['title'],
+                self._build_segment_prompt(
+                    segment,
+                    position,
+                    outline_titles,
+                    style_instruction,
+                    target_duration,
+                    response_format
+                )
+            )
+            for position, segment in enumerate(outline)
+        ]
+    
+    def _split_into_sections(self, document_content: str) -> List[str]:
+        sections = []
+        start = 0
+        text_length = len(document_content)
+        
+        while start < text_length:
+            end = min(start + self.section_chars, text_length)
+            if end < text_length:
+                boundary = document_content.rfind('\n\n', start, end)
+                if boundary <= start + self.section_chars * 0.5:
+                    boundary = document_content.rfind('. ', start, end)
+                if boundary > start + self.section_chars * 0.5:
+                    end = boundary + 1
+            
+            section = document_content[start:end].strip()
+            if section:
+                sections.append(section)
+            start = end
+        
+        return sections
+    
+    def _summarize_section(self, section: str) -> str:
+        cache_key = hashlib.sha256(section.encode()).hexdigest()
+        with self._cache_lock:
+            cached = self._notes_cache.get(cache_key)
+            if cached is not None:
+                self._notes_cache.move_to_end(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt = f"""Write concise section notes for a podcast producer about the following excerpt of a longer document.
+
+List the key points, facts, figures, names and examples as short bullet points (at most 10).
+Only use information from the excerpt. Respond with the bullet points only.
+
+EXCERPT:
+{section}"""
+        
+        try:
+            notes = self.llm.call(prompt).strip()
         except Exception as e:
-            logger.error(f"Error generating script: {str(e)}")
+            logger.error(f"Error summarizing section: {str(e)}")
+            raise
+        
+        with self._cache_lock:
+            self._notes_cache[cache_key] = notes
+            self._notes_cache.move_to_end(cache_key)
+            while len(self._notes_cache) > self.notes_cache_size:
+                self._notes_cache.popitem(last=False)
+        return notes
+    
+    def _reduce_notes_to_outline(self, notes: List[str], target_duration: str) -> List[Dict[str, Any]]:
+        segment_counts = {
+            "5 minutes": 3,
+            "10 minutes": 4,
+            "15 minutes": 6,
+            "20 minutes": 8
+        }
+        max_segments = segment_counts.get(target_duration, 4)
+        
+        # Merge notes pairwise until the input of the final outline call stays small
+        while len(notes) > 1 and sum(len(n) for n in notes) > DIRECT_CONTEXT_CHARS:
+            groups = [notes[i:i + 2] for i in range(0, len(notes), 2)]
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                notes = list(executor.map(self._summarize_section, ["\n\n".join(g) for g in groups]))
+        
+        numbered_notes = "\n\n".join(f"NOTES {i + 1}:\n{n}" for i, n in enumerate(notes))
+        prompt = f"""You are planning a podcast episode from the section notes of a document.
+
+Group the notes into at most {max_segments} segments in a logical listening order.
+For each segment give a short title and the key points to discuss, drawn only from the notes.
+
+RESPONSE FORMAT:
+Respond with a valid JSON object: {{"segments": [{{"title": "...", "points": ["...", "..."]}}]}}
+
+{numbered_notes}"""
+        
+        try:
+            response = self.llm.call(prompt).strip()
+            if response.startswith('```'):
+                response = response.split('\n', 1)[-1].rsplit('```', 1)[0]
+            segments = json.loads(response).get('segments', [])
+            outline = [
+                {
+                    'title': str(segment.get('title', f"Part {i + 1}")),
+                    'points': [str(p) for p in segment.get('points', [])]
+                }
+                for i, segment in enumerate(segments)
+                if isinstance(segment, dict)
+            ]
+        except Exception as e:
+            logger.warning(f"Could not build outline, falling back to grouping the notes in order: {e}")
+            outline = []
+        
+        if not outline:
+            # Spread every note over the segments in order, so none are dropped
+            count = min(len(notes), max_segments)
+            bounds = [len(notes) * i // count for i in range(count + 1)] if count else []
+            outline = [
+                {'title': f"Part {i + 1}", 'points': notes[bounds[i]:bounds[i + 1]]}
+                for i in range(count)
+            ]
+        
+        return outline[:max_segments]
+    
+    def _build_segment_prompt(
+        self,
+        segment: Dict[str, Any],
+        position: int,
+        outline_titles: List[str],
+        style_instruction: str,
+        target_duration: str,
+        response_format: str
+    ) -> str:
+        is_first = position == 0
+        is_last = position == len(outline_titles) - 1
+        
+        if is_first and is_last:
+            framing = "This is the whole episode: open with a brief introduction and close with a wrap-up."
+        elif is_first:
+            framing = "This is the opening segment: start with a brief introduction of the episode and its topics. Do not wrap up the episode."
+        elif is_last:
+            framing = "This is the final segment: continue from the previous segment without re-introducing the show, then close with a wrap-up of the episode."
+        else:
+            framing = "This is a middle segment: continue from the previous segment without introductions or wrap-ups."
+        
+        outline_text = "\n".join(f"{i + 1}. {title}" for i, title in enumerate(outline_titles))
+        points_text = "\n".join(f"- {p}" for p in segment['points'])
+        
+        return f"""You are writing segment {position + 1} of {len(outline_titles)} of a {target_duration} podcast script for two speakers: 'Speaker 1' and 'Speaker 2'.
+
+STYLE GUIDELINES:
+{style_instruction}
+
+EPISODE OUTLINE:
+{outline_text}
+
+SEGMENT: {segment['title']}
+{framing}
+
+KEY POINTS TO COVER:
+{points_text}
+
+CONVERSATION RULES:
+1. Each speaker should speak for 2-4 sentences maximum before alternating
+2. Start with 'Speaker 1' and alternate speakers
+3. Only discuss this segment's key points
+4. Use engaging, conversational language that's easy to understand
+
+{response_format}"""
+    
+    def _generate_segment_script(self, title: str, prompt: str) -> List[Dict[str, str]]:
+        try:
+            response = self.llm.call(prompt)
+            return self._parse_script_response(response)
+        except Exception as e:
+            logger.error(f"Error generating script for segment '{title}': {str(e)}")
             raise
     
     def _validate_and_clean_script(self, script: List[Dict[str, str]]) -> List[Dict[str, str]]:
         cleaned_script = []
         expected_speaker = "Speaker 1"
         for item in script:
-            if not isinstance(item, dict) or len(item) != 1:
+            line = self._clean_script_line(item, expected_speaker)
+            if line is None:
                 continue
             
-            speaker, dialogue = next(iter(item.items()))
-            speaker = speaker.strip()
-
-            if speaker not in ["Speaker 1", "Speaker 2"]:
-                if "1" in speaker or "one" in speaker.lower():
-                    speaker = "Speaker 1"
-                elif "2" in speaker or "two" in speaker.lower():
-                    speaker = "Speaker 2"
-                else:
-                    speaker = expected_speaker
-            
-            dialogue = dialogue.strip()
-            if not dialogue:
-                continue
-            if not dialogue.endswith(('.', '!', '?')):
-                dialogue += '.'
-            
-            cleaned_script.append({speaker: dialogue})
+            cleaned_script.append(line)
 
             expected_speaker = "Speaker 2" if expected_speaker == "Speaker 1" else "Speaker 1"
         
@@ -250,7 +740,31 @@ Generate an engaging {target_duration} podcast script now:"""
             raise ValueError("Generated script is too short or invalid")
         
         return cleaned_script
+    
+    def _clean_script_line(self, item: Any, expected_speaker: str) -> Optional[Dict[str, str]]:
+        if not isinstance(item, dict) or len(item) != 1:
+            return None
+        
+        speaker, dialogue = next(iter(item.items()))
+        speaker = speaker.strip()
 
+        if speaker not in ["Speaker 1", "Speaker 2"]:
+            if "1" in speaker or "one" in speaker.lower():
+                speaker = "Speaker 1"
+            elif "2" in speaker or "two" in speaker.lower():
+                speaker = "Speaker 2"
+            else:
+                speaker = expected_speaker
+        
+        if not isinstance(dialogue, str):
+            return None
+        dialogue = dialogue.strip()
+        if not dialogue:
+            return None
+        if not dialogue.endswith(('.', '!', '?')):
+            dialogue += '.'
+        
+        return {speaker: dialogue}
 
 if __name__ == "__main__":
     import os
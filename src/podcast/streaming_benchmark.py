@@ -0,0 +1,151 @@
+"""Benchmark for streaming podcast script lines into TTS.
+
+Run with ``python -m src.podcast.streaming_benchmark [--lines 40 --llm-ms 150 --tts-ms 300]``.
+A simulated LLM produces each dialogue line after a fixed delay and a
+simulated TTS model voices each line after another, so no API keys or
+models are needed and runs are repeatable. Both paths go through the real
+generator code: the sequential one generates the whole script and then
+voices it, the streamed one feeds ``stream_script_from_text`` into
+``generate_podcast_audio_from_stream``. Time to the first voiced line and
+the total time are reported for a short (direct) and a long (hierarchical)
+document.
+"""
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.podcast.script_generator import (
+    PodcastScriptGenerator,
+    DIRECT_CONTEXT_CHARS,
+    NOTES_CACHE_SIZE
+)
+from src.podcast.text_to_speech import PodcastTTSGenerator
+
+# Outline segments the simulated LLM plans for a long document
+SEGMENTS = 4
+
+
+class SimulatedLLM:
+    """Answers the script generator's prompts after fixed delays."""
+
+    def __init__(self, lines: int, line_seconds: float, notes_seconds: float):
+        self.lines = lines
+        self.line_seconds = line_seconds
+        self.notes_seconds = notes_seconds
+
+    def _script_lines(self, prompt: str) -> List[str]:
+        count = self.lines // SEGMENTS if "You are writing segment" in prompt else self.lines
+        return [
+            json.dumps({f"Speaker {i % 2 + 1}": f"Line {i + 1} of the simulated episode."})
+            for i in range(count)
+        ]
+
+    def call(self, prompt: str) -> str:
+        if "podcast producer" in prompt:
+            time.sleep(self.notes_seconds)
+            return "- A key point from this section"
+        if "planning a podcast" in prompt:
+            time.sleep(self.notes_seconds)
+            return json.dumps({"segments": [
+                {"title": f"Part {i + 1}", "points": ["A key point"]} for i in range(SEGMENTS)
+            ]})
+
+        lines = self._script_lines(prompt)
+        time.sleep(len(lines) * self.line_seconds)
+        return json.dumps({"script": [json.loads(line) for line in lines]})
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        for line in self._script_lines(prompt):
+            time.sleep(self.line_seconds)
+            yield line + "\n"
+
+
+class SimulatedScriptGenerator(PodcastScriptGenerator):
+    def __init__(self, llm: SimulatedLLM, max_concurrency: int = 4):
+        self.llm = llm
+        self.section_chars = 6000
+        self.max_concurrency = max_concurrency
+        self._notes_cache: OrderedDict[str, str] = OrderedDict()
+        self.notes_cache_size = NOTES_CACHE_SIZE
+        self._cache_lock = threading.Lock()
+
+    def _stream_llm(self, prompt: str) -> Iterator[str]:
+        yield from self.llm.stream(prompt)
+
+
+class SimulatedTTS(PodcastTTSGenerator):
+    """Writes 50 ms of silence per line after a fixed synthesis delay."""
+
+    def __init__(self, line_seconds: float, sample_rate: int = 24000):
+        self.sample_rate = sample_rate
+        self.line_seconds = line_seconds
+        self.speaker_voices = {"Speaker 1": "af_heart", "Speaker 2": "am_liam"}
+        self.first_line_at: Optional[float] = None
+
+    def pipeline(self, text: str, voice: str):
+        time.sleep(self.line_seconds)
+        if self.first_line_at is None:
+            self.first_line_at = time.perf_counter()
+        yield None, None, np.zeros(self.sample_rate // 20, dtype=np.float32)
+
+
+def _document(hierarchical: bool) -> str:
+    size = DIRECT_CONTEXT_CHARS * 3 if hierarchical else DIRECT_CONTEXT_CHARS // 2
+    sentence = "Retrieval quality depends on how documents are chunked and indexed. "
+    return sentence * (size // len(sentence))
+
+
+def run_sequential(args, hierarchical: bool) -> Tuple[float, float, int]:
+    generator = SimulatedScriptGenerator(SimulatedLLM(args.lines, args.llm_ms / 1000, args.notes_ms / 1000))
+    tts = SimulatedTTS(args.tts_ms / 1000)
+
+    started = time.perf_counter()
+    script = generator.generate_script_from_text(_document(hierarchical), hierarchical=hierarchical)
+    with tempfile.TemporaryDirectory() as output_dir:
+        tts.generate_podcast_audio(script, output_dir=output_dir, combine_audio=True)
+    return tts.first_line_at - started, time.perf_counter() - started, script.total_lines
+
+
+def run_streamed(args, hierarchical: bool) -> Tuple[float, float, int]:
+    generator = SimulatedScriptGenerator(SimulatedLLM(args.lines, args.llm_ms / 1000, args.notes_ms / 1000))
+    tts = SimulatedTTS(args.tts_ms / 1000)
+
+    started = time.perf_counter()
+    lines = generator.stream_script_from_text(_document(hierarchical), hierarchical=hierarchical)
+    with tempfile.TemporaryDirectory() as output_dir:
+        _, script = tts.generate_podcast_audio_from_stream(lines, output_dir=output_dir, combine_audio=True)
+    return tts.first_line_at - started, time.perf_counter() - started, len(script)
+
+
+def run(args):
+    print(
+        f"{'case':<16}{'lines':>7}{'seq first s':>13}{'stream first s':>16}"
+        f"{'seq total s':>13}{'stream total s':>16}{'saved':>8}"
+    )
+    for name, hierarchical in (("direct", False), ("hierarchical", True)):
+        seq_first, seq_total, seq_lines = run_sequential(args, hierarchical)
+        stream_first, stream_total, stream_lines = run_streamed(args, hierarchical)
+        assert seq_lines == stream_lines, (seq_lines, stream_lines)
+        print(
+            f"{name:<16}{seq_lines:>7}{seq_first:>13.2f}{stream_first:>16.2f}"
+            f"{seq_total:>13.2f}{stream_total:>16.2f}{1 - stream_total / seq_total:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=40, help="dialogue lines per episode")
+    parser.add_argument("--llm-ms", type=float, default=150, help="LLM time per generated line")
+    parser.add_argument("--tts-ms", type=float, default=300, help="TTS time per voiced line")
+    parser.add_argument("--notes-ms", type=float, default=500, help="LLM time per notes or outline call")
+    run(parser.parse_args())
@@ -1,17 +1,15 @@
 import logging
 import os
+import queue
+import threading
+import time
 import soundfile as sf
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple, TYPE_CHECKING
 from pathlib import Path
 from dataclasses import dataclass
 
-try:
-    from kokoro import KPipeline
-except ImportError:
-    print("Kokoro not installed. Install with: pip install kokoro>=0.9.4")
-    KPipeline = None
-
-from src.podcast.script_generator import PodcastScript
+if TYPE_CHECKING:
+    from src.podcast.script_generator import PodcastScript
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,7 +27,9 @@ class AudioSegment:
 
 class PodcastTTSGenerator:
     def __init__(self, lang_code: str = 'a', sample_rate: int = 24000):
-        if KPipeline is None:
+        try:
+            from kokoro import KPipeline
+        except ImportError:
             raise ImportError("Kokoro TTS not available. Install with: pip install kokoro>=0.9.4 soundfile")
         
         self.sample_rate = sample_rate
@@ -44,7 +44,7 @@ class PodcastTTSGenerator:
     
     def generate_podcast_audio(
         self, 
-        podcast_script: PodcastScript,
+        podcast_script: "PodcastScript",
         output_dir: str = "outputs/podcast_audio",
         combine_audio: bool = True
     ) -> List[str]:
@@ -62,29 +62,13 @@ class PodcastTTSGenerator:
             
             logger.info(f"Processing segment {i+1}/{podcast_script.total_lines}: {speaker}")
             
-            try:
-                segment_audio = self._generate_single_segment(speaker, dialogue)
-                segment_filename = f"segment_{i+1:03d}_{speaker.replace(' ', '_').lower()}.wav"
-                segment_path = os.path.join(output_dir, segment_filename)
-                
-                sf.write(segment_path, segment_audio, self.sample_rate)
-                output_files.append(segment_path)
-                
-                if combine_audio:
-                    audio_segment = AudioSegment(
-                        speaker=speaker,
-                        text=dialogue,
-                        audio_data=segment_audio,
-                        duration=len(segment_audio) / self.sample_rate,
-                        file_path=segment_path
-                    )
-                    audio_segments.append(audio_segment)
-                
-                logger.info(f"✓ Generated segment {i+1}: {segment_filename}")
-                
-            except Exception as e:
-                logger.error(f"✗ Failed to generate segment {i+1}: {str(e)}")
+            audio_segment = self._synthesize_line(i, speaker, dialogue, output_dir)
+            if audio_segment is None:
                 continue
+            
+            output_files.append(audio_segment.file_path)
+            if combine_audio:
+                audio_segments.append(audio_segment)
         
         if combine_audio and audio_segments:
             combined_path = self._combine_audio_segments(audio_segments, output_dir)
@@ -93,6 +77,120 @@ class PodcastTTSGenerator:
         logger.info(f"Podcast generation complete! Generated {len(output_files)} files")
         return output_files
     
+    def generate_podcast_audio_from_stream(
+        self,
+        script_lines: Iterable[Dict[str, str]],
+        output_dir: str = "outputs/podcast_audio",
+        combine_audio: bool = True,
+        queue_size: int = 16,
+        on_stage: Optional[Callable[[str], None]] = None
+    ) -> Tuple[List[str], List[Dict[str, str]]]:
+        """Synthesize dialogue lines while they are still being generated.
+        
+        A producer thread drains ``script_lines`` (e.g. from
+        ``PodcastScriptGenerator.stream_script_from_text``) into a bounded queue
+        that this thread consumes, so TTS overlaps script generation.
+        ``on_stage`` is called with ``"tts"`` when the first line arrives and
+        with ``"encode"`` before segments are combined.
+        Returns the generated files and the script lines that were consumed.
+        """
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        logger.info(f"Generating streamed podcast audio into: {output_dir}")
+        
+        line_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        done = object()
+        producer_state: Dict[str, Any] = {'error': None, 'finished_at': None}
+        
+        def produce():
+            try:
+                for line in script_lines:
+                    line_queue.put(line)
+            except Exception as e:
+                producer_state['error'] = e
+            finally:
+                producer_state['finished_at'] = time.perf_counter()
+                line_queue.put(done)
+        
+        started_at = time.perf_counter()
+        producer = threading.Thread(target=produce, name="podcast-script-stream", daemon=True)
+        producer.start()
+        
+        script = []
+        audio_segments = []
+        output_files = []
+        synthesis_seconds = 0.0
+        
+        while True:
+            line_dict = line_queue.get()
+            if line_dict is done:
+                break
+            
+            speaker, dialogue = next(iter(line_dict.items()))
+            script.append(line_dict)
+            if on_stage and len(script) == 1:
+                on_stage("tts")
+            
+            logger.info(f"Processing streamed segment {len(script)}: {speaker}")
+            
+            synth_start = time.perf_counter()
+            audio_segment = self._synthesize_line(len(script) - 1, speaker, dialogue, output_dir)
+            synthesis_seconds += time.perf_counter() - synth_start
+            
+            if audio_segment is None:
+                continue
+            
+            output_files.append(audio_segment.file_path)
+            if combine_audio:
+                audio_segments.append(audio_segment)
+        
+        producer.join()
+        if producer_state['error'] is not None:
+            raise producer_state['error']
+        
+        if combine_audio and audio_segments:
+            if on_stage:
+                on_stage("encode")
+            combined_path = self._combine_audio_segments(audio_segments, output_dir)
+            output_files.append(combined_path)
+        
+        total_seconds = time.perf_counter() - started_at
+        generation_seconds = producer_state['finished_at'] - started_at
+        saved_seconds = max(0.0, generation_seconds + synthesis_seconds - total_seconds)
+        logger.info(
+            f"Streamed podcast complete in {total_seconds:.1f}s "
+            f"(script {generation_seconds:.1f}s, TTS {synthesis_seconds:.1f}s, "
+            f"overlap saved {saved_seconds:.1f}s)"
+        )
+        
+        return output_files, script
+    
+    def _synthesize_line(
+        self,
+        index: int,
+        speaker: str,
+        dialogue: str,
+        output_dir: str
+    ) -> Optional[AudioSegment]:
+        try:
+            segment_audio = self._generate_single_segment(speaker, dialogue)
+            segment_filename = f"segment_{index+1:03d}_{speaker.replace(' ', '_').lower()}.wav"
+            segment_path = os.path.join(output_dir, segment_filename)
+            
+            sf.write(segment_path, segment_audio, self.sample_rate)
+            
+            logger.info(f"✓ Generated segment {index+1}: {segment_filename}")
+            return AudioSegment(
+                speaker=speaker,
+                text=dialogue,
+                audio_data=segment_audio,
+                duration=len(segment_audio) / self.sample_rate,
+                file_path=segment_path
+            )
+            
+        except Exception as e:
+            logger.error(f"✗ Failed to generate segment {index+1}: {str(e)}")
+            return None
+    
     def _generate_single_segment(self, speaker: str, text: str) -> Any:
         voice = self.speaker_voices.get(speaker, "af_heart")
         clean_text = self._clean_text_for_tts(text)
@@ -0,0 +1,98 @@
+from typing import List, Dict, Any, Iterator, Optional, Protocol, TYPE_CHECKING, runtime_checkable
+
+if TYPE_CHECKING:
+    from src.embeddings.embedding_generator import EmbeddedChunk
+    from src.document_processing.chunk_batch import ChunkBatch
+
+
+@runtime_checkable
+class VectorStore(Protocol):
+    """What the RAG generator, API routes and app expect from a vector backend.
+
+    Search results are dicts with ``id``, ``score`` (lower is better),
+    ``content``, ``source_id``, ``citation`` (source_file, source_type,
+    page_number, chunk_index, start_char, end_char), ``metadata`` (chunk-
+    specific only) and ``embedding_model``; see ``results.format_result``.
+    Chunks from ``get_chunks_by_ids`` and ``iter_source`` are flat dicts as
+    built by ``results.format_chunk``, with source metadata joined in.
+    ``filter_expr`` uses Milvus boolean expression syntax; every backend
+    must at least support ``source_file``/``source_type``/``source_id``
+    compared with ``==`` or ``in``. Build filters with ``filters``
+    (``field_equals``, ``field_in``, ``source_filter``) rather than by
+    formatting values into strings.
+
+    ``python -m src.vector_database.conformance`` checks a backend against
+    this contract and reports its insert throughput, latency and recall.
+    """
+
+    collection_exists: bool
+
+    def create_index(self, **kwargs) -> None:
+        ...
+
+    def insert_embeddings(self, embedded_chunks: List["EmbeddedChunk"]) -> List[str]:
+        ...
+
+    def upsert_embeddings(self, embedded_chunks: List["EmbeddedChunk"]) -> List[str]:
+        ...
+
+    def upsert_batch(self, batch: "ChunkBatch", rows_per_request: int = 512) -> List[str]:
+        ...
+
+    def search(
+        self,
+        query_vector: List[float],
+        limit: int = 10,
+        filter_expr: Optional[str] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        ...
+
+    def search_batch(
+        self,
+        query_vectors: List[List[float]],
+        limit: int = 10,
+        filter_expr: Optional[str] = None,
+        **kwargs
+    ) -> List[List[Dict[str, Any]]]:
+        """One result list per query vector, as ``search`` would return it."""
+        ...
+
+    def search_ids(
+        self,
+        query_vector: List[float],
+        limit: int = 10,
+        filter_expr: Optional[str] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Only ``id`` and ``score`` per hit; see ``hydrate``."""
+        ...
+
+    def hydrate(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ...
+
+    def join_source_metadata(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ...
+
+    def get_chunks_by_ids(self, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+        ...
+
+    def get_chunk_by_id(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    def iter_source(self, source_file: str, batch_size: int = 512) -> Iterator[List[Dict[str, Any]]]:
+        """All chunks of a source, in batches, in no particular order."""
+        ...
+
+    def delete_embeddings(self, chunk_ids: List[str]) -> int:
+        ...
+
+    def delete_by_source(self, source_file: str) -> int:
+        """Delete a source's rows and its source metadata; returns rows deleted."""
+        ...
+
+    def delete_collection(self) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
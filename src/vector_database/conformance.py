@@ -0,0 +1,294 @@
+"""Conformance checks and benchmarks shared by every VectorStore backend.
+
+Run with ``python -m src.vector_database.conformance [--backend numpy milvus tiered]``.
+Each backend is built in a temporary directory, loaded with the same
+fixtures (clustered, normalized vectors spread over several sources) and
+checked against the VectorStore contract; then its insert throughput,
+query latency, batch-search throughput and recall@k against exact search
+are reported. ``--precision float32 int8 binary`` repeats the run per
+vector precision, with the in-memory size of the vectors where the
+backend reports it. The exit status is non-zero if any check fails.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.document_processing.chunk_batch import ChunkBatch
+from src.document_processing.doc_processor import DocumentChunk
+from src.vector_database.base import VectorStore
+from src.vector_database.filters import field_equals, field_in
+from src.vector_database.quantization import PRECISIONS
+
+RESULT_KEYS = {'id', 'score', 'content', 'source_id', 'citation', 'metadata', 'embedding_model'}
+CITATION_KEYS = {'source_file', 'source_type', 'page_number', 'chunk_index', 'start_char', 'end_char'}
+
+
+@dataclass
+class Fixtures:
+    batches: List[ChunkBatch]
+    queries: np.ndarray
+    # Exact top-k ids for each query, by cosine similarity
+    expected: List[List[str]] = field(default_factory=list)
+
+    @property
+    def chunk_count(self) -> int:
+        return sum(len(batch) for batch in self.batches)
+
+
+def make_fixtures(sources: int, chunks_per_source: int, dim: int, queries: int, k: int, seed: int = 0) -> Fixtures:
+    rng = np.random.default_rng(seed)
+    batches = []
+    for s in range(sources):
+        centers = rng.standard_normal((8, dim)).astype(np.float32)
+        vectors = centers[rng.integers(0, 8, chunks_per_source)] + 0.5 * rng.standard_normal((chunks_per_source, dim))
+        vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+        chunks = [
+            DocumentChunk(
+                content=f"Source {s} chunk {i}: " + "lorem ipsum dolor sit amet " * 20,
+                source_file=f'source "{s}" – résumé.pdf',
+                source_type="pdf",
+                page_number=i // 4 + 1,
+                chunk_index=i % 4,
+                start_char=(i % 4) * 600,
+                end_char=(i % 4) * 600 + 599,
+                metadata={'total_pages': chunks_per_source // 4 + 1, 'title': f"Source {s}", 'chunk': i}
+            )
+            for i in range(chunks_per_source)
+        ]
+        batch = ChunkBatch.from_chunks(chunks)
+        batch.embeddings = vectors
+        batch.embedding_model = "fixture"
+        batches.append(batch)
+
+    matrix = np.concatenate([batch.embeddings for batch in batches])
+    ids = [chunk_id for batch in batches for chunk_id in batch.chunk_ids]
+    picks = rng.integers(0, len(matrix), queries)
+    query_vectors = matrix[picks] + 0.3 * rng.standard_normal((queries, dim)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+    similarities = query_vectors @ matrix.T
+    expected = [[ids[i] for i in np.argsort(-row, kind="stable")[:k]] for row in similarities]
+    return Fixtures(batches=batches, queries=query_vectors, expected=expected)
+
+
+class Checker:
+    def __init__(self):
+        self.failures: List[str] = []
+        self.passed = 0
+
+    def check(self, name: str, condition: bool, detail: str = ""):
+        if condition:
+            self.passed += 1
+        else:
+            self.failures.append(f"{name}: {detail}" if detail else name)
+
+
+def _source_ids(store: VectorStore, source_file: str) -> List[str]:
+    return [chunk['id'] for chunks in store.iter_source(source_file) for chunk in chunks]
+
+
+def check_conformance(store: VectorStore, fixtures: Fixtures) -> Checker:
+    """Run the contract checks against a store already loaded with ``fixtures``."""
+    checker = Checker()
+    first, second = fixtures.batches[0], fixtures.batches[1]
+    first_ids = list(first.chunk_ids)
+
+    checker.check("implements VectorStore", isinstance(store, VectorStore))
+
+    # Search
+    results = store.search(first.embeddings[0].tolist(), limit=5)
+    checker.check("self query ranks first", bool(results) and results[0]['id'] == first_ids[0],
+                  f"got {results[0]['id'] if results else None}")
+    checker.check("result keys", bool(results) and set(results[0]) >= RESULT_KEYS,
+                  f"missing {RESULT_KEYS - set(results[0]) if results else RESULT_KEYS}")
+    checker.check("citation keys", bool(results) and set(results[0]['citation']) >= CITATION_KEYS)
+    checker.check("scores ascending", all(a['score'] <= b['score'] + 1e-6 for a, b in zip(results, results[1:])))
+    checker.check("content returned", bool(results) and results[0]['content'] == first.content(0))
+
+    hits = store.search_ids(first.embeddings[0].tolist(), limit=5)
+    hydrated = store.hydrate(hits)
+    checker.check("search_ids matches search", [hit['id'] for hit in hits] == [r['id'] for r in results])
+    checker.check("hydrate keeps order", [r['id'] for r in hydrated] == [hit['id'] for hit in hits])
+    checker.check("hydrate drops unknown ids", len(store.hydrate(hits[:1] + [{'id': 'missing', 'score': 0.0}])) == 1)
+
+    queries = fixtures.queries[:5].tolist()
+    batched = store.search_batch(queries, limit=5)
+    single = [store.search(query, limit=5) for query in queries]
+    checker.check("search_batch matches search",
+                  [[r['id'] for r in hits] for hits in batched] == [[r['id'] for r in hits] for hits in single])
+
+    # Filters
+    filtered = store.search(first.embeddings[0].tolist(), limit=50, filter_expr=field_equals("source_file", second.source_file))
+    checker.check("filter ==", bool(filtered) and all(r['citation']['source_file'] == second.source_file for r in filtered))
+    both = store.search(
+        first.embeddings[0].tolist(), limit=50,
+        filter_expr=field_in("source_file", [first.source_file, second.source_file])
+    )
+    checker.check("filter in", bool(both) and {r['citation']['source_file'] for r in both} <= {first.source_file, second.source_file})
+
+    # Lookups
+    chunks = store.get_chunks_by_ids([first_ids[2], "missing", first_ids[1]])
+    checker.check("get_chunks_by_ids order", [c['id'] for c in chunks] == [first_ids[2], first_ids[1]])
+    checker.check("source metadata joined", bool(chunks) and chunks[0]['metadata'].get('title') == "Source 0",
+                  f"got {chunks[0]['metadata'] if chunks else None}")
+    checker.check("chunk metadata kept", bool(chunks) and chunks[0]['metadata'].get('chunk') == 2)
+    checker.check("get_chunk_by_id", (store.get_chunk_by_id(first_ids[0]) or {}).get('content') == first.content(0))
+    checker.check("iter_source", sorted(_source_ids(store, first.source_file)) == sorted(first_ids))
+
+    # Writes
+    store.upsert_batch(first)
+    checker.check("upsert is idempotent", len(_source_ids(store, first.source_file)) == len(first_ids))
+
+    store.delete_embeddings(first_ids[:3])
+    checker.check("delete_embeddings", store.get_chunks_by_ids(first_ids[:3]) == []
+                  and len(_source_ids(store, first.source_file)) == len(first_ids) - 3)
+
+    store.delete_by_source(second.source_file)
+    checker.check("delete_by_source rows", _source_ids(store, second.source_file) == [])
+    checker.check("delete_by_source search", store.search(
+        first.embeddings[0].tolist(), limit=10, filter_expr=field_equals("source_file", second.source_file)) == [])
+
+    return checker
+
+
+def benchmark(make_store: Callable[[], VectorStore], fixtures: Fixtures, k: int) -> Tuple[VectorStore, Dict[str, float]]:
+    """Load the fixtures into a fresh store and measure it; returns the loaded store."""
+    store = make_store()
+    started = time.perf_counter()
+    store.create_index(use_binary_quantization=False)
+    for batch in fixtures.batches:
+        store.upsert_batch(batch)
+    insert_seconds = time.perf_counter() - started
+
+    queries = fixtures.queries.tolist()
+    store.search_ids(queries[0], limit=k)
+    latencies = []
+    recalls = []
+    for query, expected in zip(queries, fixtures.expected):
+        started = time.perf_counter()
+        hits = store.search_ids(query, limit=k)
+        latencies.append(time.perf_counter() - started)
+        recalls.append(len({hit['id'] for hit in hits} & set(expected)) / len(expected))
+
+    started = time.perf_counter()
+    store.search_batch(queries, limit=k)
+    batch_seconds = time.perf_counter() - started
+
+    return store, {
+        'insert_per_s': fixtures.chunk_count / insert_seconds,
+        'p50_ms': float(np.percentile(latencies, 50)) * 1000,
+        'p95_ms': float(np.percentile(latencies, 95)) * 1000,
+        'batch_qps': len(queries) / batch_seconds,
+        'recall': float(np.mean(recalls))
+    }
+
+
+def store_factories(
+    tmp: str,
+    dim: int,
+    precision: str = "float32",
+    rescore: bool = True,
+    rescore_factor: Optional[int] = None
+) -> Dict[str, Callable[[], VectorStore]]:
+    options = {'embedding_dim': dim, 'precision': precision, 'rescore': rescore, 'rescore_factor': rescore_factor}
+
+    def numpy_store():
+        from src.vector_database.numpy_vector_db import NumpyVectorDB
+        return NumpyVectorDB(path=str(Path(tmp) / "numpy" / "vectors"), **options)
+
+    def milvus_store():
+        from src.vector_database.milvus_vector_db import MilvusVectorDB
+        return MilvusVectorDB(db_path=str(Path(tmp) / "milvus.db"), collection_name="conformance", **options)
+
+    def tiered_store():
+        from src.vector_database.tiered_vector_db import TieredVectorDB
+        return TieredVectorDB(
+            vectors_path=str(Path(tmp) / "tiered" / "vectors"),
+            milvus_path=str(Path(tmp) / "tiered_milvus.db"),
+            collection_name="conformance_tiered",
+            source_store_path=str(Path(tmp) / "tiered_sources.sqlite"),
+            **options
+        )
+
+    return {"numpy": numpy_store, "milvus": milvus_store, "tiered": tiered_store}
+
+
+def _vector_megabytes(store: VectorStore) -> str:
+    # TieredVectorDB reports through whichever backend it is using
+    vector_bytes = getattr(getattr(store, 'backend', store), 'vector_bytes', None)
+    return "-" if vector_bytes is None else f"{vector_bytes / 1e6:.2f}"
+
+
+def run(
+    backends: List[str],
+    sources: int,
+    chunks_per_source: int,
+    dim: int,
+    queries: int,
+    k: int,
+    precisions: List[str] = ("float32",),
+    rescore: bool = True,
+    rescore_factor: Optional[int] = None
+) -> bool:
+    fixtures = make_fixtures(sources, chunks_per_source, dim, queries, k)
+    print(f"{fixtures.chunk_count} chunks in {sources} sources, dim {dim}, {queries} queries, k={k}, rescore={rescore}")
+    print(
+        f"{'backend':<10}{'precision':>10}{'checks':>10}{'insert/s':>12}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'batch q/s':>12}{'recall':>9}{'vec MB':>9}"
+    )
+
+    ok = True
+    failures = []
+    for precision in precisions:
+        with tempfile.TemporaryDirectory() as tmp:
+            factories = store_factories(tmp, dim, precision, rescore, rescore_factor)
+            for name in backends:
+                store, stats = benchmark(factories[name], fixtures, k)
+                megabytes = _vector_megabytes(store)
+                try:
+                    checker = check_conformance(store, fixtures)
+                finally:
+                    store.close()
+
+                total = checker.passed + len(checker.failures)
+                print(
+                    f"{name:<10}{precision:>10}{f'{checker.passed}/{total}':>10}{stats['insert_per_s']:>12.0f}"
+                    f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['batch_qps']:>12.0f}"
+                    f"{stats['recall']:>9.3f}{megabytes:>9}"
+                )
+                failures += [f"{name}/{precision}: {failure}" for failure in checker.failures]
+                ok = ok and not checker.failures
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return ok
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", nargs="+", default=["numpy", "milvus", "tiered"],
+                        choices=["numpy", "milvus", "tiered"])
+    parser.add_argument("--sources", type=int, default=10)
+    parser.add_argument("--chunks-per-source", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--precision", nargs="+", default=["float32"], choices=list(PRECISIONS))
+    parser.add_argument("--no-rescore", dest="rescore", action="store_false")
+    parser.add_argument("--rescore-factor", type=int, default=None)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    sys.exit(0 if run(
+        args.backend, args.sources, args.chunks_per_source, args.dim, args.queries, args.k,
+        args.precision, args.rescore, args.rescore_factor
+    ) else 1)
@@ -0,0 +1,75 @@
+"""Building and reading the ``filter_expr`` strings VectorStore searches take.
+
+Values are never pasted into expressions by hand: ``field_equals`` and
+``field_in`` quote them as Milvus string literals, so a source name
+containing quotes or backslashes can neither break the expression nor
+widen it. ``parse_filter`` reads back the expressions they build, for
+backends that evaluate filters themselves.
+"""
+
+import json
+import re
+from typing import Iterable, Optional, Tuple
+
+# Fields every VectorStore can filter on
+FILTER_FIELDS = ("source_file", "source_type", "source_id")
+
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# A filterable field compared to one literal or a list of literals
+FILTER_PATTERN = re.compile(rf'^\s*({"|".join(FILTER_FIELDS)})\s*(==|in)\s*(.+?)\s*$')
+
+# Milvus accepts these control characters escaped, but no \uXXXX escapes
+ALLOWED_CONTROL = "\t\n\r"
+
+
+def quote(value: str) -> str:
+    """``value`` as a double-quoted Milvus string literal."""
+    if not isinstance(value, str):
+        raise ValueError(f"Filter values must be strings, got {type(value).__name__}")
+    if any(ord(ch) < 0x20 and ch not in ALLOWED_CONTROL for ch in value):
+        raise ValueError(f"Filter value contains control characters: {value!r}")
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _check_field(field_name: str):
+    if not FIELD_NAME.match(field_name):
+        raise ValueError(f"Invalid field name in filter: {field_name!r}")
+
+
+def field_equals(field_name: str, value: str) -> str:
+    _check_field(field_name)
+    return f"{field_name} == {quote(value)}"
+
+
+def field_in(field_name: str, values: Iterable[str]) -> str:
+    _check_field(field_name)
+    return f"{field_name} in [{', '.join(quote(value) for value in values)}]"
+
+
+def source_filter(source_files: Optional[Iterable[str]]) -> Optional[str]:
+    """Filter restricting a search to the given sources, or None for all sources."""
+    names = sorted(set(source_files or []))
+    if not names:
+        return None
+    if len(names) == 1:
+        return field_equals("source_file", names[0])
+    return field_in("source_file", names)
+
+
+def parse_filter(filter_expr: str) -> Tuple[str, Tuple[str, ...]]:
+    """The field and the (sorted) values it must match, from a filter expression."""
+    match = FILTER_PATTERN.match(filter_expr)
+    if not match:
+        raise ValueError(f"Unsupported filter expression: {filter_expr}")
+
+    field_name, operator, literal = match.groups()
+    try:
+        value = json.loads(literal)
+    except ValueError:
+        raise ValueError(f"Unsupported filter expression: {filter_expr}")
+
+    values = value if operator == "in" else [value]
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise ValueError(f"Unsupported filter expression: {filter_expr}")
+    return field_name, tuple(sorted(values))
@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.document_processing.chunk_batch import ChunkBatch
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_fingerprint(content: str) -> str:
+    """SHA-256 of a chunk's text with whitespace collapsed."""
+    return hashlib.sha256(" ".join(content.split()).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ChunkDiff:
+    """Result of comparing a fresh chunk batch against what is already indexed."""
+    # Positions in the batch of the chunks that need embedding
+    new_indices: List[int] = field(default_factory=list)
+    unchanged: int = 0
+    duplicates: int = 0
+    stale_ids: List[str] = field(default_factory=list)
+    # fingerprint -> chunk id for every chunk of the new version
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+
+
+class FingerprintIndex:
+    """Whole-source and per-chunk content fingerprints for one vector collection.
+
+    Sources are identified by name (file name, URL, video name). A source
+    hash lets exact re-uploads be skipped before parsing; chunk fingerprints
+    let a changed source re-embed only the chunks whose text changed.
+    """
+
+    def __init__(self):
+        self._source_by_hash: Dict[str, str] = {}
+        self._hash_by_source: Dict[str, str] = {}
+        self._chunks: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+        self.duplicate_sources = 0
+        self.reused_chunks = 0
+        self.embedded_chunks = 0
+        self.removed_chunks = 0
+
+    def find_source(self, source_hash: str) -> Optional[str]:
+        """Return the name of an indexed source with this hash, if any."""
+        with self._lock:
+            name = self._source_by_hash.get(source_hash)
+            if name is not None:
+                self.duplicate_sources += 1
+            return name
+
+    def diff(self, source_name: str, batch: "ChunkBatch") -> ChunkDiff:
+        """Split a batch into chunks that need embedding and ones already indexed.
+
+        Chunks repeated within the same source are indexed once.
+        """
+        with self._lock:
+            existing = dict(self._chunks.get(source_name, {}))
+
+        result = ChunkDiff()
+        for i, content in enumerate(batch.contents()):
+            fingerprint = chunk_fingerprint(content)
+            if fingerprint in result.fingerprints:
+                result.duplicates += 1
+                continue
+
+            if fingerprint in existing:
+                result.fingerprints[fingerprint] = existing.pop(fingerprint)
+                result.unchanged += 1
+            else:
+                result.fingerprints[fingerprint] = batch.chunk_ids[i]
+                result.new_indices.append(i)
+
+        result.stale_ids = list(existing.values())
+        return result
+
+    def commit(self, source_name: str, diff: ChunkDiff, source_hash: Optional[str] = None):
+        """Record the indexed state of a source after its diff was applied."""
+        with self._lock:
+            old_hash = self._hash_by_source.pop(source_name, None)
+            if old_hash is not None:
+                self._source_by_hash.pop(old_hash, None)
+            if source_hash:
+                self._source_by_hash[source_hash] = source_name
+                self._hash_by_source[source_name] = source_hash
+
+            self._chunks[source_name] = dict(diff.fingerprints)
+            self.reused_chunks += diff.unchanged
+            self.embedded_chunks += len(diff.new_indices)
+            self.removed_chunks += len(diff.stale_ids)
+
+        logger.info(
+            f"Indexed {source_name}: {len(diff.new_indices)} new, {diff.unchanged} unchanged, "
+            f"{len(diff.stale_ids)} removed, {diff.duplicates} duplicate chunks"
+        )
+
+    def forget(self, source_name: str) -> List[str]:
+        """Drop a source and return the chunk ids that were indexed for it."""
+        with self._lock:
+            source_hash = self._hash_by_source.pop(source_name, None)
+            if source_hash is not None:
+                self._source_by_hash.pop(source_hash, None)
+            return list(self._chunks.pop(source_name, {}).values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The indexed sources' hashes and chunk fingerprints, for saving with the collection."""
+        with self._lock:
+            return {
+                "source_hashes": dict(self._hash_by_source),
+                "chunks": {name: dict(chunks) for name, chunks in self._chunks.items()}
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FingerprintIndex":
+        index = cls()
+        index._hash_by_source = dict(data.get("source_hashes", {}))
+        index._source_by_hash = {source_hash: name for name, source_hash in index._hash_by_source.items()}
+        index._chunks = {name: dict(chunks) for name, chunks in data.get("chunks", {}).items()}
+        return index
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sources": len(self._chunks),
+                "chunks": sum(len(chunks) for chunks in self._chunks.values()),
+                "duplicate_sources": self.duplicate_sources,
+                "reused_chunks": self.reused_chunks,
+                "embedded_chunks": self.embedded_chunks,
+                "removed_chunks": self.removed_chunks
+            }
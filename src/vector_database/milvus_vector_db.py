@@ -1,28 +1,82 @@
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-import json
+import threading
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+from collections import OrderedDict
 from pathlib import Path
 
-from pymilvus import MilvusClient, DataType, connections, utility
-from src.embeddings.embedding_generator import EmbeddedChunk
+from pymilvus import MilvusClient, DataType
+
+from src.vector_database.filters import field_equals, field_in
+from src.vector_database.quantization import RESCORE_FACTORS
+from src.vector_database.results import RESULT_FIELDS, format_result, format_chunk, join_source_metadata
+from src.vector_database.source_store import SourceStore, source_id_for
+
+if TYPE_CHECKING:
+    from src.embeddings.embedding_generator import EmbeddedChunk
+    from src.document_processing.chunk_batch import ChunkBatch
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Index built by create_index for each vector precision, and its quantizer
+PRECISION_INDEXES = {
+    "float32": ("IVF_FLAT", None),
+    "float16": ("HNSW_SQ", "FP16"),
+    "int8": ("HNSW_SQ", "SQ8"),
+    "binary": ("IVF_RABITQ", None)
+}
+
+# VARCHAR fields searches are commonly filtered on, given inverted indexes
+SCALAR_INDEX_FIELDS = ("source_file", "source_type")
+
+
 class MilvusVectorDB:
+    """VectorStore backed by a Milvus Lite collection with an IVF index.
+    
+    Vectors are stored as FLOAT_VECTOR; ``precision`` picks a quantized
+    index instead of IVF_FLAT (HNSW_SQ with FP16 or SQ8 codes, or
+    IVF_RABITQ's binary codes). With ``rescore`` the index keeps an FP32
+    refine copy and re-ranks ``rescore_factor`` times as many candidates
+    by exact distance (by default ``quantization.RESCORE_FACTORS``). The
+    precision applies when the index is created. ``source_file`` and
+    ``source_type`` get inverted indexes for filtered searches.
+    """
+    
     def __init__(
         self, 
         db_path: str = "./milvus_lite.db",
         collection_name: str = "notebook_lm",
-        embedding_dim: int = 384
+        embedding_dim: int = 384,
+        source_store_path: Optional[str] = None,
+        chunk_cache_size: int = 1024,
+        precision: str = "float32",
+        rescore: bool = True,
+        rescore_factor: Optional[float] = None
     ):
+        if precision not in PRECISION_INDEXES:
+            raise ValueError(f"Unknown vector precision '{precision}', expected one of {', '.join(PRECISION_INDEXES)}")
+        
         self.db_path = db_path
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
+        self.precision = precision
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor or RESCORE_FACTORS[precision]
         self.client = None
         self.collection_exists = False
         
+        # LRU of recently fetched rows (without vectors), for hydration and citations
+        self.chunk_cache_size = chunk_cache_size
+        self._chunk_cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._chunk_cache_lock = threading.Lock()
+        self.chunk_cache_stats = {'hits': 0, 'misses': 0}
+        
+        # Metadata shared by all chunks of a source lives here, not in the rows
+        self.source_store = SourceStore(
+            source_store_path or str(Path(db_path).with_suffix("")) + "_sources.sqlite"
+        )
+        
         self._initialize_client()
         self._setup_collection()
     
@@ -40,6 +94,7 @@ class MilvusVectorDB:
             if self.client.has_collection(collection_name=self.collection_name):
                 logger.info(f"Collection '{self.collection_name}' already exists")
                 self.collection_exists = True
+                self._ensure_scalar_indexes()
                 return
             
             schema = self.client.create_schema(
@@ -81,6 +136,12 @@ class MilvusVectorDB:
                 max_length=32
             )
             
+            schema.add_field(
+                field_name="source_id",
+                datatype=DataType.VARCHAR,
+                max_length=64
+            )
+            
             schema.add_field(
                 field_name="page_number",
                 datatype=DataType.INT32
@@ -101,7 +162,7 @@ class MilvusVectorDB:
                 datatype=DataType.INT32
             )
             
-            # JSON field for additional metadata
+            # JSON field for chunk-specific metadata; source-level metadata is in source_store
             schema.add_field(
                 field_name="metadata",
                 datatype=DataType.JSON
@@ -137,8 +198,12 @@ class MilvusVectorDB:
                 raise Exception("Collection does not exist. Setup collection first.")
             
             index_params = self.client.prepare_index_params()
+            precision = "binary" if use_binary_quantization else self.precision
+            index_type, sq_type = PRECISION_INDEXES[precision]
+            if not enable_refine and self.rescore and precision != "float32":
+                enable_refine, refine_type = True, "FP32"
             
-            if use_binary_quantization:
+            if index_type == "IVF_RABITQ":
                 # IVF_RABITQ with binary quantization
                 index_params.add_index(
                     field_name="vector",
@@ -152,6 +217,21 @@ class MilvusVectorDB:
                     }
                 )
                 logger.info(f"Creating IVF_RABITQ index with nlist={nlist}, refine={enable_refine}")
+            elif index_type == "HNSW_SQ":
+                index_params.add_index(
+                    field_name="vector",
+                    index_type="HNSW_SQ",
+                    index_name="vector_index",
+                    metric_type="L2",
+                    params={
+                        "M": 16,
+                        "efConstruction": 200,
+                        "sq_type": sq_type,
+                        "refine": enable_refine,
+                        "refine_type": refine_type if enable_refine else None
+                    }
+                )
+                logger.info(f"Creating HNSW_SQ index with sq_type={sq_type}, refine={enable_refine}")
             else:
                 # Fallback to IVF_FLAT if BQ not supported
                 index_params.add_index(
@@ -163,6 +243,7 @@ class MilvusVectorDB:
                 )
                 logger.info(f"Creating IVF_FLAT index with nlist={nlist}")
             
+            self._add_scalar_indexes(index_params)
             self.client.create_index(
                 collection_name=self.collection_name,
                 index_params=index_params
@@ -174,26 +255,55 @@ class MilvusVectorDB:
             logger.error(f"Error creating index: {str(e)}")
             raise
     
-    def insert_embeddings(self, embedded_chunks: List[EmbeddedChunk]) -> List[str]:
+    def _add_scalar_indexes(self, index_params) -> int:
+        """Add inverted indexes for SCALAR_INDEX_FIELDS that have none yet."""
+        added = 0
+        for field_name in SCALAR_INDEX_FIELDS:
+            if self.client.list_indexes(collection_name=self.collection_name, field_name=field_name):
+                continue
+            index_params.add_index(
+                field_name=field_name,
+                index_type="INVERTED",
+                index_name=f"{field_name}_index"
+            )
+            added += 1
+        return added
+    
+    def _ensure_scalar_indexes(self):
+        """Give collections created before scalar indexing their source filter indexes."""
+        try:
+            index_params = self.client.prepare_index_params()
+            if self._add_scalar_indexes(index_params):
+                self.client.create_index(
+                    collection_name=self.collection_name,
+                    index_params=index_params
+                )
+                logger.info(f"Added scalar indexes on {', '.join(SCALAR_INDEX_FIELDS)}")
+        except Exception as e:
+            logger.warning(f"Could not add scalar indexes: {str(e)}")
+    
+    def _to_rows(self, embedded_chunks: List["EmbeddedChunk"]) -> List[Dict[str, Any]]:
+        data = []
+        for embedded_chunk in embedded_chunks:
+            chunk_data = embedded_chunk.to_vector_db_format()  
+            chunk_data['page_number'] = chunk_data['page_number'] or -1
+            chunk_data['start_char'] = chunk_data['start_char'] or -1
+            chunk_data['end_char'] = chunk_data['end_char'] or -1
+            chunk_data['source_id'] = source_id_for(chunk_data['source_file'])
+            data.append(chunk_data)
+        return data
+    
+    def insert_embeddings(self, embedded_chunks: List["EmbeddedChunk"]) -> List[str]:
         if not embedded_chunks:
             return []
         try:
-            data = []
-            for embedded_chunk in embedded_chunks:
-                chunk_data = embedded_chunk.to_vector_db_format()  
-                chunk_data['page_number'] = chunk_data['page_number'] or -1
-                chunk_data['start_char'] = chunk_data['start_char'] or -1
-                chunk_data['end_char'] = chunk_data['end_char'] or -1
-                
-                if isinstance(chunk_data['metadata'], dict):
-                    chunk_data['metadata'] = chunk_data['metadata']
-                
-                data.append(chunk_data)
+            data = self._to_rows(embedded_chunks)
             
             result = self.client.insert(
                 collection_name=self.collection_name,
                 data=data
             )
+            self._invalidate_chunks(item['id'] for item in data)
             
             inserted_ids = [item['id'] for item in data]
             logger.info(f"Inserted {len(inserted_ids)} embeddings into database")
@@ -204,77 +314,263 @@ class MilvusVectorDB:
             logger.error(f"Error inserting embeddings: {str(e)}")
             raise
     
+    def upsert_embeddings(self, embedded_chunks: List["EmbeddedChunk"]) -> List[str]:
+        """Insert chunks, replacing any rows that already have the same chunk id.
+        
+        With stable chunk ids this makes re-ingesting a source idempotent.
+        """
+        if not embedded_chunks:
+            return []
+        try:
+            # Later duplicates of an id win, as they would with sequential upserts
+            rows = {row['id']: row for row in self._to_rows(embedded_chunks)}
+            
+            self.client.upsert(
+                collection_name=self.collection_name,
+                data=list(rows.values())
+            )
+            self._invalidate_chunks(rows)
+            
+            logger.info(f"Upserted {len(rows)} embeddings into database")
+            return list(rows)
+            
+        except Exception as e:
+            logger.error(f"Error upserting embeddings: {str(e)}")
+            raise
+    
+    def upsert_batch(self, batch: "ChunkBatch", rows_per_request: int = 512) -> List[str]:
+        """Upsert an embedded ChunkBatch, building row dicts one request at a time.
+        
+        The batch's shared metadata goes to the source store once; rows carry
+        the source id and only chunk-specific metadata.
+        """
+        if len(batch) == 0:
+            return []
+        try:
+            source_id = self.source_store.put(batch.source_file, batch.source_type, batch.metadata)
+            for start in range(0, len(batch), rows_per_request):
+                rows = list(batch.iter_rows(start, start + rows_per_request))
+                for row in rows:
+                    row['source_id'] = source_id
+                self.upsert_rows(rows)
+            
+            logger.info(f"Upserted {len(batch)} embeddings into database")
+            return list(batch.chunk_ids)
+            
+        except Exception as e:
+            logger.error(f"Error upserting embeddings: {str(e)}")
+            raise
+    
+    def upsert_rows(self, rows: List[Dict[str, Any]]):
+        """Upsert rows that are already in the collection's schema."""
+        self.client.upsert(
+            collection_name=self.collection_name,
+            data=rows
+        )
+        self._invalidate_chunks(row['id'] for row in rows)
+    
+    def delete_embeddings(self, chunk_ids: List[str]) -> int:
+        if not chunk_ids:
+            return 0
+        try:
+            self.client.delete(
+                collection_name=self.collection_name,
+                ids=list(chunk_ids)
+            )
+            self._invalidate_chunks(chunk_ids)
+            logger.info(f"Deleted {len(chunk_ids)} embeddings from database")
+            return len(chunk_ids)
+            
+        except Exception as e:
+            logger.error(f"Error deleting embeddings: {str(e)}")
+            raise
+    
+    def delete_by_source(self, source_file: str) -> int:
+        """Delete every row of a source and its source metadata."""
+        try:
+            result = self.client.delete(
+                collection_name=self.collection_name,
+                filter=field_equals("source_file", source_file)
+            )
+            self._invalidate_chunks()
+            self.source_store.delete(source_file)
+            
+            deleted = result.get('delete_count', 0) if isinstance(result, dict) else 0
+            logger.info(f"Deleted {deleted} embeddings of {source_file} from database")
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"Error deleting source {source_file}: {str(e)}")
+            raise
+    
+    def iter_source(self, source_file: str, batch_size: int = 512) -> Iterator[List[Dict[str, Any]]]:
+        """All chunks of a source, in batches, with source metadata joined in."""
+        iterator = self.client.query_iterator(
+            collection_name=self.collection_name,
+            batch_size=batch_size,
+            filter=field_equals("source_file", source_file),
+            output_fields=["id"] + RESULT_FIELDS
+        )
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                yield self.join_source_metadata([format_chunk(row) for row in rows])
+        finally:
+            iterator.close()
+    
+    def join_source_metadata(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge source-level metadata into the metadata of the given results.
+        
+        Meant for the few chunks that are actually cited, so searches do not
+        carry source metadata for every candidate.
+        """
+        return join_source_metadata(self.source_store, results)
+    
+    def _search_params(
+        self,
+        limit: int,
+        nprobe: int,
+        rbq_query_bits: int,
+        refine_k: Optional[float],
+        use_binary_quantization: bool
+    ) -> Dict[str, Any]:
+        if refine_k is None:
+            refine_k = self.rescore_factor if self.rescore else 1.0
+        
+        index_type = "IVF_RABITQ" if use_binary_quantization else PRECISION_INDEXES[self.precision][0]
+        if index_type == "IVF_RABITQ":
+            return {
+                "params": {
+                    "nprobe": nprobe,
+                    "rbq_query_bits": rbq_query_bits,
+                    "refine_k": refine_k
+                }
+            }
+        if index_type == "HNSW_SQ":
+            params = {"ef": max(64, int(limit * refine_k))}
+            if self.rescore:
+                params["refine_k"] = refine_k
+            return {"params": params}
+        return {
+            "params": {
+                "nprobe": nprobe
+            }
+        }
+    
     def search(
         self,
         query_vector: List[float],
         limit: int = 10,
         nprobe: int = 128,
         rbq_query_bits: int = 0,
-        refine_k: float = 1.0,
+        refine_k: Optional[float] = None,
         filter_expr: Optional[str] = None,
         use_binary_quantization: bool = False
     ) -> List[Dict[str, Any]]:
+        return self.search_batch(
+            [query_vector],
+            limit=limit,
+            nprobe=nprobe,
+            rbq_query_bits=rbq_query_bits,
+            refine_k=refine_k,
+            filter_expr=filter_expr,
+            use_binary_quantization=use_binary_quantization
+        )[0]
+    
+    def search_batch(
+        self,
+        query_vectors: List[List[float]],
+        limit: int = 10,
+        nprobe: int = 128,
+        rbq_query_bits: int = 0,
+        refine_k: Optional[float] = None,
+        filter_expr: Optional[str] = None,
+        use_binary_quantization: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """Search several query vectors in one request; one result list per query."""
+        if not query_vectors:
+            return []
         try:
-            if use_binary_quantization:
-                search_params = {
-                    "params": {
-                        "nprobe": nprobe,
-                        "rbq_query_bits": rbq_query_bits,
-                        "refine_k": refine_k
-                    }
-                }
-            else:
-                search_params = {
-                    "params": {
-                        "nprobe": nprobe
-                    }
-                }
-            
             # Perform vector similarity search
             results = self.client.search(
                 collection_name=self.collection_name,
-                data=[query_vector],
+                data=list(query_vectors),
                 anns_field="vector",
                 limit=limit,
-                search_params=search_params,
+                search_params=self._search_params(limit, nprobe, rbq_query_bits, refine_k, use_binary_quantization),
                 filter=filter_expr,
-                output_fields=[
-                    "content", "source_file", "source_type", "page_number",
-                    "chunk_index", "start_char", "end_char", "metadata", "embedding_model"
-                ]
+                output_fields=RESULT_FIELDS
             )
             
-            formatted_results = []
-            if results and len(results) > 0:
-                for result in results[0]:
-                    formatted_result = {
-                        'id': result['id'],
-                        'score': result['distance'],
-                        'content': result['entity']['content'],
-                        'citation': {
-                            'source_file': result['entity']['source_file'],
-                            'source_type': result['entity']['source_type'],
-                            'page_number': result['entity']['page_number'] if result['entity']['page_number'] != -1 else None,
-                            'chunk_index': result['entity']['chunk_index'],
-                            'start_char': result['entity']['start_char'] if result['entity']['start_char'] != -1 else None,
-                            'end_char': result['entity']['end_char'] if result['entity']['end_char'] != -1 else None,
-                        },
-                        'metadata': result['entity']['metadata'],
-                        'embedding_model': result['entity']['embedding_model']
-                    }
-                    formatted_results.append(formatted_result)
+            formatted_results = [
+                [format_result(result['id'], result['distance'], result['entity']) for result in hits]
+                for hits in (results or [])
+            ]
+            formatted_results += [[] for _ in range(len(query_vectors) - len(formatted_results))]
             
-            logger.info(f"Search completed: {len(formatted_results)} results found")
+            logger.info(f"Search completed: {sum(len(hits) for hits in formatted_results)} results found")
             return formatted_results
             
         except Exception as e:
             logger.error(f"Error during search: {str(e)}")
             raise
     
+    def search_ids(
+        self,
+        query_vector: List[float],
+        limit: int = 10,
+        nprobe: int = 128,
+        rbq_query_bits: int = 0,
+        refine_k: Optional[float] = None,
+        filter_expr: Optional[str] = None,
+        use_binary_quantization: bool = False
+    ) -> List[Dict[str, Any]]:
+        """First phase of two-phase retrieval: ids and scores only, no payload."""
+        try:
+            results = self.client.search(
+                collection_name=self.collection_name,
+                data=[query_vector],
+                anns_field="vector",
+                limit=limit,
+                search_params=self._search_params(limit, nprobe, rbq_query_bits, refine_k, use_binary_quantization),
+                filter=filter_expr,
+                output_fields=[]
+            )
+            
+            hits = [{'id': result['id'], 'score': result['distance']} for result in (results[0] if results else [])]
+            logger.info(f"Search completed: {len(hits)} ids found")
+            return hits
+            
+        except Exception as e:
+            logger.error(f"Error during search: {str(e)}")
+            raise
+    
+    def hydrate(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Second phase: fetch content and citation fields for selected hits in one query.
+        
+        Results come back in the order of ``hits``, formatted like ``search``
+        results; hits whose rows no longer exist are dropped.
+        """
+        if not hits:
+            return []
+        try:
+            entities = self._fetch_rows(hit['id'] for hit in hits)
+            return [
+                format_result(hit['id'], hit['score'], entities[hit['id']])
+                for hit in hits if hit['id'] in entities
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error hydrating search results: {str(e)}")
+            raise
+    
     def delete_collection(self):
         try:
             if self.client.has_collection(collection_name=self.collection_name):
                 self.client.drop_collection(collection_name=self.collection_name)
+                self._invalidate_chunks()
                 logger.info(f"Collection '{self.collection_name}' deleted")
                 self.collection_exists = False
             else:
@@ -284,49 +580,65 @@ class MilvusVectorDB:
             logger.error(f"Error deleting collection: {str(e)}")
             raise
     
-    def get_chunk_by_id(self, chunk_id: str) -> Optional[Dict[str, Any]]:
-        try:
-            if not self.collection_exists:
-                logger.warning("Collection does not exist")
-                return None
-            
-            logger.info(f"Attempting to retrieve chunk with ID: {chunk_id}")
-            
-            results = self.client.query(
+    def _invalidate_chunks(self, chunk_ids: Optional[Iterable[str]] = None):
+        """Drop rows from the chunk cache; all of them when no ids are given."""
+        with self._chunk_cache_lock:
+            if chunk_ids is None:
+                self._chunk_cache.clear()
+                return
+            for chunk_id in chunk_ids:
+                self._chunk_cache.pop(chunk_id, None)
+    
+    def _fetch_rows(self, chunk_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Rows by id, from the chunk cache or one ``id in [...]`` query for the rest."""
+        rows = {}
+        missing = []
+        with self._chunk_cache_lock:
+            for chunk_id in dict.fromkeys(chunk_ids):
+                row = self._chunk_cache.get(chunk_id)
+                if row is None:
+                    missing.append(chunk_id)
+                else:
+                    self._chunk_cache.move_to_end(chunk_id)
+                    rows[chunk_id] = row
+            self.chunk_cache_stats['hits'] += len(rows)
+            self.chunk_cache_stats['misses'] += len(missing)
+        
+        if missing:
+            fetched = self.client.query(
                 collection_name=self.collection_name,
-                filter=f'id == "{chunk_id}"',
-                output_fields=["id", "content", "metadata", "source_file", "source_type", "page_number", "chunk_index"]
+                filter=field_in("id", missing),
+                output_fields=["id"] + RESULT_FIELDS
             )
-            
-            logger.info(f"Query returned {len(results) if results else 0} results")
-            
-            if results and len(results) > 0:
-                chunk_data = results[0]
-                logger.info(f"Successfully retrieved chunk: {chunk_data.get('id')}")
-                
-                metadata = chunk_data.get("metadata", {})
-                if isinstance(metadata, str):
-                    try:
-                        metadata = json.loads(metadata)
-                    except:
-                        metadata = {}
-                
-                return {
-                    "id": chunk_data.get("id"),
-                    "content": chunk_data.get("content"),
-                    "metadata": metadata,
-                    "source_file": chunk_data.get("source_file"),
-                    "source_type": chunk_data.get("source_type"),
-                    "page_number": chunk_data.get("page_number"),
-                    "chunk_index": chunk_data.get("chunk_index")
-                }
-            
-            logger.warning(f"No chunk found with ID: {chunk_id}")
-            return None
+            with self._chunk_cache_lock:
+                for row in fetched:
+                    rows[row['id']] = row
+                    self._chunk_cache[row['id']] = row
+                    self._chunk_cache.move_to_end(row['id'])
+                while len(self._chunk_cache) > self.chunk_cache_size:
+                    self._chunk_cache.popitem(last=False)
+        
+        return rows
+    
+    def get_chunks_by_ids(self, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+        """Chunks for the given ids, in order, with source metadata joined in.
+        
+        Ids that are not in the collection are skipped.
+        """
+        if not self.collection_exists or not chunk_ids:
+            return []
+        
+        rows = self._fetch_rows(chunk_ids)
+        chunks = [format_chunk(rows[chunk_id]) for chunk_id in chunk_ids if chunk_id in rows]
+        return self.join_source_metadata(chunks)
+    
+    def get_chunk_by_id(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            chunks = self.get_chunks_by_ids([chunk_id])
+            return chunks[0] if chunks else None
             
         except Exception as e:
             logger.error(f"Error retrieving chunk by ID {chunk_id}: {str(e)}")
-            logger.error(f"Exception details: {type(e).__name__}: {str(e)}")
             return None
     
     def close(self):
@@ -334,6 +646,7 @@ class MilvusVectorDB:
             if self.client:
                 self.client.close()
                 logger.info("Milvus client connection closed")
+            self.source_store.close()
         except Exception as e:
             logger.error(f"Error closing connection: {str(e)}")
 
@@ -0,0 +1,607 @@
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from src.vector_database.filters import field_equals, parse_filter
+from src.vector_database.quantization import BLOCK_ROWS, RESCORE_FACTORS, ExactVectorFile, make_codec
+from src.vector_database.results import format_result, format_chunk, join_source_metadata
+from src.vector_database.source_store import SourceStore, source_id_for
+
+if TYPE_CHECKING:
+    from src.embeddings.embedding_generator import EmbeddedChunk
+    from src.document_processing.chunk_batch import ChunkBatch
+
+logger = logging.getLogger(__name__)
+
+
+class NumpyVectorDB:
+    """In-process exact-search VectorStore for small collections.
+
+    Embeddings are L2-normalized and kept in one contiguous float32 matrix
+    that grows by doubling; a search is a single matrix-vector product plus
+    ``argpartition``. Scores are squared L2 distances between the
+    normalized vectors (lower is better), as MilvusVectorDB reports them.
+
+    With ``precision`` "float16", "int8" or "binary" the matrix holds
+    compact codes instead (2x, ~4x and 32x smaller; see ``quantization``)
+    and the float32 vectors live in a scratch file on disk. With
+    ``rescore`` the best ``rescore_factor * limit`` candidates by code are
+    re-ranked by their exact float32 similarity, read from that file;
+    the factor defaults to ``quantization.RESCORE_FACTORS[precision]``.
+
+    The collection persists as a snapshot, ``{path}.g{N}.npy`` (float32
+    whatever the precision; memory-mapped on load) and ``{path}.g{N}.json``
+    for the row payloads, named by ``{path}.manifest.json``, which is
+    replaced last so a snapshot is only used once both files are complete.
+    With ``autosave`` every insert, upsert or delete batch is appended to a
+    log of changes since the snapshot (``{path}.g{N}.log.jsonl`` and
+    ``.log.f32``), replayed on load, so a crash loses at most the batch in
+    flight. ``save()`` and ``close()`` fold the log into a new snapshot, as
+    does a write once the log holds more rows than the snapshot. Source
+    filters are answered with boolean masks that are cached until the next
+    write.
+    """
+
+    def __init__(
+        self,
+        path: str = "./data/vectors",
+        embedding_dim: int = 384,
+        source_store_path: Optional[str] = None,
+        initial_capacity: int = 1024,
+        precision: str = "float32",
+        rescore: bool = True,
+        rescore_factor: Optional[int] = None,
+        autosave: bool = True
+    ):
+        self.path = path
+        self.embedding_dim = embedding_dim
+        self.initial_capacity = initial_capacity
+        self.precision = precision
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor or RESCORE_FACTORS.get(precision, 1)
+        self.autosave = autosave
+        self.collection_exists = True
+        self.source_store = SourceStore(source_store_path or f"{path}_sources.sqlite")
+
+        self._size = 0
+        self._set_dim(embedding_dim)
+        self._ids: List[str] = []
+        self._rows: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._masks: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+        self._dirty = False
+        # Snapshot the log applies to (0: none, or the unversioned files of
+        # older releases), the vectors in its log, and the rows it touches
+        self._generation = 0
+        self._log_vectors = 0
+        self._log_entries = 0
+        self._lock = threading.RLock()
+
+        self._load()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _set_dim(self, embedding_dim: int):
+        """(Re)create empty storage for ``embedding_dim``."""
+        self.embedding_dim = embedding_dim
+        self._codec = make_codec(self.precision, embedding_dim)
+        self._codes = np.empty((0, self._codec.width), dtype=self._codec.dtype)
+        # Float32 copy of the vectors when the codes are lossy
+        self._exact = None
+        if not self._codec.exact:
+            self._exact = ExactVectorFile(Path(f"{self.path}.exact.f32"), embedding_dim)
+            self._exact.clear()
+
+    @property
+    def vector_bytes(self) -> int:
+        """Memory taken by the stored vectors' codes."""
+        return self._size * self._codec.bytes_per_vector
+
+    @property
+    def manifest_path(self) -> Path:
+        return Path(f"{self.path}.manifest.json")
+
+    def _snapshot_paths(self, generation: int) -> Tuple[Path, Path]:
+        """Vector and row files of a snapshot."""
+        if generation == 0:
+            return Path(f"{self.path}.npy"), Path(f"{self.path}.json")
+        return Path(f"{self.path}.g{generation}.npy"), Path(f"{self.path}.g{generation}.json")
+
+    def _log_paths(self, generation: int) -> Tuple[Path, Path]:
+        """Row records and vectors of the log of changes since a snapshot."""
+        return Path(f"{self.path}.g{generation}.log.jsonl"), Path(f"{self.path}.g{generation}.log.f32")
+
+    @property
+    def vectors_path(self) -> Path:
+        return self._snapshot_paths(self._generation)[0]
+
+    @property
+    def rows_path(self) -> Path:
+        return self._snapshot_paths(self._generation)[1]
+
+    def _load(self):
+        with self._lock:
+            size = None
+            if self.manifest_path.exists():
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+                self._generation = manifest["generation"]
+                size = manifest["size"]
+
+            if self.vectors_path.exists() and self.rows_path.exists():
+                self._load_snapshot(size)
+            self._replay_log()
+
+    def _load_snapshot(self, size: Optional[int]):
+        vectors = np.load(self.vectors_path, mmap_mode="r")
+        with open(self.rows_path, encoding="utf-8") as f:
+            rows = json.load(f)
+
+        if len(rows) != len(vectors) or size not in (None, len(rows)):
+            logger.warning(f"Ignoring {self.vectors_path}: {len(vectors)} vectors but {len(rows)} rows")
+            return
+
+        if len(rows):
+            self._set_dim(vectors.shape[1])
+        if self._codec.exact:
+            self._codes = vectors
+        elif len(rows):
+            self._codes = np.concatenate([
+                self._codec.encode(vectors[start:start + BLOCK_ROWS]) for start in range(0, len(vectors), BLOCK_ROWS)
+            ])
+            self._exact.copy_from(vectors)
+
+        self._size = len(rows)
+        self._ids = [row['id'] for row in rows]
+        self._rows = rows
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+        logger.info(f"Loaded {self._size} vectors from {self.vectors_path} as {self.precision}")
+
+    def _replay_log(self):
+        """Apply the changes logged since the snapshot. Caller holds the lock."""
+        log_rows, log_vectors = self._log_paths(self._generation)
+        if not log_rows.exists():
+            return
+
+        vectors = np.fromfile(log_vectors, dtype=np.float32) if log_vectors.exists() else np.empty(0, np.float32)
+        complete = True
+        with open(log_rows, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn by a crash mid-append
+                    complete = False
+                    break
+
+                if "delete" in record:
+                    self._remove_rows(record["delete"])
+                    self._log_entries += len(record["delete"])
+                    continue
+
+                rows, dim, offset = record["put"], record["dim"], record["offset"]
+                block = vectors[offset * dim:(offset + len(rows)) * dim]
+                if len(block) != len(rows) * dim:
+                    complete = False
+                    break
+                self._put_rows(block.reshape(len(rows), dim), rows)
+                self._log_vectors = offset + len(rows)
+                self._log_entries += len(rows)
+
+        logger.info(f"Replayed {self._log_entries} logged changes onto {self.vectors_path}")
+        if not complete or len(vectors) != self._log_vectors * self.embedding_dim:
+            # Appends after a torn record would be unreadable, so start a clean log
+            logger.warning(f"Discarding the incomplete end of {log_rows}")
+            self.save()
+
+    def _reserve(self, extra: int):
+        """Make room for ``extra`` more rows in a writable matrix. Caller holds the lock."""
+        needed = self._size + extra
+        if self._codes.flags.writeable and len(self._codes) >= needed:
+            return
+
+        capacity = max(needed, 2 * len(self._codes), self.initial_capacity)
+        codes = np.empty((capacity, self._codec.width), dtype=self._codec.dtype)
+        codes[:self._size] = self._codes[:self._size]
+        self._codes = codes
+
+    def create_index(self, **kwargs):
+        """Exact search needs no index; accepted for compatibility with MilvusVectorDB."""
+        pass
+
+    def _upsert(self, vectors: np.ndarray, rows: List[Dict[str, Any]]) -> List[str]:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(rows):
+            raise ValueError("Expected one vector per row")
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._put_rows(vectors, rows)
+            self._log({"put": rows, "dim": vectors.shape[1], "offset": self._log_vectors}, len(rows), vectors)
+
+        return [row['id'] for row in rows]
+
+    def _put_rows(self, vectors: np.ndarray, rows: List[Dict[str, Any]]):
+        """Insert or replace rows with normalized vectors. Caller holds the lock."""
+        if self._size == 0 and vectors.shape[1] != self.embedding_dim:
+            self._set_dim(vectors.shape[1])
+        elif vectors.shape[1] != self.embedding_dim:
+            raise ValueError(f"Expected {self.embedding_dim}-dimensional vectors, got {vectors.shape[1]}")
+
+        self._reserve(len(rows))
+        positions = []
+        for code, row in zip(self._codec.encode(vectors), rows):
+            position = self._positions.get(row['id'])
+            if position is None:
+                position = self._size
+                self._size += 1
+                self._positions[row['id']] = position
+                self._ids.append(row['id'])
+                self._rows.append(row)
+            else:
+                self._rows[position] = row
+            self._codes[position] = code
+            positions.append(position)
+        if self._exact is not None:
+            self._exact.write(positions, vectors)
+
+        self._masks.clear()
+        self._dirty = True
+
+    def _embedded_rows(self, embedded_chunks: List["EmbeddedChunk"]) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        rows = []
+        for embedded_chunk in embedded_chunks:
+            row = embedded_chunk.to_vector_db_format()
+            row.pop('vector')
+            row['page_number'] = row['page_number'] or -1
+            row['start_char'] = row['start_char'] or -1
+            row['end_char'] = row['end_char'] or -1
+            row['source_id'] = source_id_for(row['source_file'])
+            rows.append(row)
+        return np.stack([embedded_chunk.embedding for embedded_chunk in embedded_chunks]), rows
+
+    def insert_embeddings(self, embedded_chunks: List["EmbeddedChunk"]) -> List[str]:
+        return self.upsert_embeddings(embedded_chunks)
+
+    def upsert_embeddings(self, embedded_chunks: List["EmbeddedChunk"]) -> List[str]:
+        if not embedded_chunks:
+            return []
+        vectors, rows = self._embedded_rows(embedded_chunks)
+        ids = self._upsert(vectors, rows)
+        logger.info(f"Upserted {len(ids)} embeddings into memory")
+        return ids
+
+    def upsert_batch(self, batch: "ChunkBatch", rows_per_request: int = 512) -> List[str]:
+        """Upsert an embedded ChunkBatch; ``rows_per_request`` is unused here."""
+        if len(batch) == 0:
+            return []
+
+        source_id = self.source_store.put(batch.source_file, batch.source_type, batch.metadata)
+        rows = list(batch.iter_rows(vectors=False))
+        for row in rows:
+            row['source_id'] = source_id
+
+        ids = self._upsert(batch.embeddings, rows)
+        logger.info(f"Upserted {len(ids)} embeddings into memory")
+        return ids
+
+    def delete_embeddings(self, chunk_ids: List[str]) -> int:
+        with self._lock:
+            deleted = self._remove_rows(chunk_ids)
+            if deleted:
+                self._log({"delete": list(chunk_ids)}, deleted)
+
+        if deleted:
+            logger.info(f"Deleted {deleted} embeddings from memory")
+        return deleted
+
+    def _remove_rows(self, chunk_ids: List[str]) -> int:
+        """Remove rows, moving the last row into each freed slot to stay contiguous.
+
+        Caller holds the lock.
+        """
+        deleted = 0
+        moves = []
+        for chunk_id in chunk_ids:
+            position = self._positions.pop(chunk_id, None)
+            if position is None:
+                continue
+
+            if not self._codes.flags.writeable:
+                self._reserve(0)
+
+            last = self._size - 1
+            if position != last:
+                self._codes[position] = self._codes[last]
+                moves.append((last, position))
+                self._ids[position] = self._ids[last]
+                self._rows[position] = self._rows[last]
+                self._positions[self._ids[position]] = position
+            self._ids.pop()
+            self._rows.pop()
+            self._size -= 1
+            deleted += 1
+
+        if deleted:
+            if self._exact is not None:
+                self._exact.move_and_truncate(moves, self._size)
+            self._masks.clear()
+            self._dirty = True
+        return deleted
+
+    def delete_by_source(self, source_file: str) -> int:
+        """Delete every row of a source and its source metadata."""
+        with self._lock:
+            chunk_ids = [self._ids[i] for i in np.flatnonzero(self._mask(field_equals("source_file", source_file)))]
+        deleted = self.delete_embeddings(chunk_ids)
+        self.source_store.delete(source_file)
+        return deleted
+    
+    def iter_source(self, source_file: str, batch_size: int = 512) -> Iterator[List[Dict[str, Any]]]:
+        """All chunks of a source, in batches, with source metadata joined in."""
+        with self._lock:
+            positions = np.flatnonzero(self._mask(field_equals("source_file", source_file))).tolist()
+            chunks = [format_chunk({**self._rows[i], 'id': self._ids[i]}) for i in positions]
+        for start in range(0, len(chunks), batch_size):
+            yield self.join_source_metadata(chunks[start:start + batch_size])
+
+    def join_source_metadata(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return join_source_metadata(self.source_store, results)
+
+    def _mask(self, filter_expr: str) -> np.ndarray:
+        """Boolean row mask for a filter expression. Caller holds the lock."""
+        key = parse_filter(filter_expr)
+        field_name, values = key
+        mask = self._masks.get(key)
+        if mask is None:
+            wanted = set(values)
+            mask = np.fromiter((row[field_name] in wanted for row in self._rows), dtype=bool, count=self._size)
+            self._masks[key] = mask
+        return mask
+
+    def _top_k(
+        self,
+        query_vectors: List[List[float]],
+        limit: int,
+        filter_expr: Optional[str]
+    ) -> List[List[Tuple[int, float]]]:
+        """(position, score) of the best rows for each query. Caller holds the lock."""
+        if self._size == 0 or limit <= 0:
+            return [[] for _ in query_vectors]
+
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        codes = self._codes[:self._size]
+        candidates = self._size
+        mask = positions = None
+        if filter_expr:
+            mask = self._mask(filter_expr)
+            candidates = int(mask.sum())
+            if candidates * 2 < self._size:
+                # Scoring a copy of the few matching rows beats scoring and masking all
+                positions = np.flatnonzero(mask)
+                codes = codes[positions]
+                mask = None
+
+        k = min(limit, candidates)
+        if k == 0:
+            return [[] for _ in query_vectors]
+
+        # One BLAS call for all queries, (m, d) @ (d, n), or its estimate from the codes
+        similarities = self._codec.similarities(queries, codes)
+        if mask is not None:
+            similarities[:, ~mask] = -np.inf
+
+        rescore = self._exact is not None and self.rescore
+        pool = min(k * self.rescore_factor, candidates) if rescore else k
+
+        results = []
+        for query, row in zip(queries, similarities):
+            if pool < len(codes):
+                top = np.argpartition(-row, pool - 1)[:pool]
+            else:
+                top = np.arange(len(codes))
+            rows = top if positions is None else positions[top]
+            if rescore:
+                # Sorted positions read the scratch file front to back
+                rows = np.sort(rows)
+                scores = self._exact.read(rows) @ query
+            else:
+                scores = row[top]
+            order = np.argsort(-scores, kind="stable")[:k]
+            results.append([(int(rows[j]), float(2.0 - 2.0 * scores[j])) for j in order])
+        return results
+
+    def search(
+        self,
+        query_vector: List[float],
+        limit: int = 10,
+        filter_expr: Optional[str] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Top-k search, exact for float32; ANN parameters such as ``nprobe`` are ignored."""
+        return self.search_batch([query_vector], limit=limit, filter_expr=filter_expr)[0]
+
+    def search_batch(
+        self,
+        query_vectors: List[List[float]],
+        limit: int = 10,
+        filter_expr: Optional[str] = None,
+        **kwargs
+    ) -> List[List[Dict[str, Any]]]:
+        if not len(query_vectors):
+            return []
+        with self._lock:
+            results = [
+                [format_result(self._ids[i], score, self._rows[i]) for i, score in hits]
+                for hits in self._top_k(query_vectors, limit, filter_expr)
+            ]
+        logger.info(f"Search completed: {sum(len(hits) for hits in results)} results found")
+        return results
+
+    def search_ids(
+        self,
+        query_vector: List[float],
+        limit: int = 10,
+        filter_expr: Optional[str] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            hits = [
+                {'id': self._ids[i], 'score': score}
+                for i, score in self._top_k([query_vector], limit, filter_expr)[0]
+            ]
+        logger.info(f"Search completed: {len(hits)} ids found")
+        return hits
+
+    def hydrate(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                format_result(hit['id'], hit['score'], self._rows[self._positions[hit['id']]])
+                for hit in hits if hit['id'] in self._positions
+            ]
+
+    def get_chunks_by_ids(self, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            chunks = [
+                format_chunk({'id': chunk_id, **self._rows[self._positions[chunk_id]]})
+                for chunk_id in chunk_ids if chunk_id in self._positions
+            ]
+        return self.join_source_metadata(chunks)
+
+    def get_chunk_by_id(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        chunks = self.get_chunks_by_ids([chunk_id])
+        return chunks[0] if chunks else None
+
+    def export_rows(self, rows_per_batch: int = 512) -> Iterator[List[Dict[str, Any]]]:
+        """All rows with their vectors, in batches, e.g. to move to another store."""
+        with self._lock:
+            vectors = self._exact_vectors()
+            for start in range(0, self._size, rows_per_batch):
+                stop = min(start + rows_per_batch, self._size)
+                yield [
+                    {**self._rows[i], 'id': self._ids[i], 'vector': vectors[i].tolist()}
+                    for i in range(start, stop)
+                ]
+
+    def _exact_vectors(self) -> np.ndarray:
+        """All float32 vectors, from memory or the scratch file. Caller holds the lock."""
+        if self._exact is None:
+            return self._codes[:self._size]
+        return self._exact.rows()
+
+    def _log(self, record: Dict[str, Any], entries: int, vectors: Optional[np.ndarray] = None):
+        """Append a finished write batch to the log when autosaving. Caller holds the lock.
+
+        Vectors go first; the record line that refers to them commits the batch.
+        """
+        if not self.autosave:
+            return
+
+        # A failed append leaves the log unusable until the next snapshot
+        if self._log_entries >= 0:
+            log_rows, log_vectors = self._log_paths(self._generation)
+            try:
+                log_rows.parent.mkdir(parents=True, exist_ok=True)
+                if vectors is not None:
+                    with open(log_vectors, "ab") as f:
+                        f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                    self._log_vectors += len(vectors)
+                with open(log_rows, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+                self._log_entries += entries
+            except Exception as e:
+                logger.error(f"Error logging vectors, saving a snapshot instead: {str(e)}")
+                self._log_entries = -1
+
+        # Keep replay shorter than loading the snapshot itself
+        if self._log_entries < 0 or self._log_entries > max(self._size, self.initial_capacity):
+            try:
+                self.save()
+            except Exception as e:
+                logger.error(f"Error saving vectors: {str(e)}")
+
+    def save(self):
+        """Write the collection as a new snapshot if it changed since it was loaded or saved.
+
+        The snapshot's files are written and synced before the manifest is
+        replaced to point at them; the previous snapshot and the log are
+        removed after.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+
+            generation = self._generation + 1
+            vectors_path, rows_path = self._snapshot_paths(generation)
+            vectors_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(vectors_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(self._exact_vectors()))
+                f.flush()
+                os.fsync(f.fileno())
+            with open(rows_path, "w", encoding="utf-8") as f:
+                json.dump([{**row, 'id': chunk_id} for chunk_id, row in zip(self._ids, self._rows)], f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+
+            tmp_manifest = self.manifest_path.with_suffix(".json.tmp")
+            with open(tmp_manifest, "w", encoding="utf-8") as f:
+                json.dump({"generation": generation, "size": self._size}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_manifest, self.manifest_path)
+
+            self._remove_files(generation)
+            self._generation = generation
+            self._log_vectors = 0
+            self._log_entries = 0
+            self._dirty = False
+
+        logger.debug(f"Saved {self._size} vectors to {self.vectors_path}")
+
+    def _remove_files(self, keep: Optional[int] = None):
+        """Remove every snapshot and log except generation ``keep``'s snapshot."""
+        keep_paths = set(self._snapshot_paths(keep)) if keep is not None else set()
+        path = Path(self.path)
+        stale = [*self._snapshot_paths(0), *path.parent.glob(f"{path.name}.g*")]
+        for stale_path in stale:
+            if stale_path in keep_paths:
+                continue
+            try:
+                stale_path.unlink(missing_ok=True)
+            except OSError as e:
+                # E.g. a snapshot still memory-mapped on Windows; removed by a later save
+                logger.debug(f"Could not remove {stale_path}: {e}")
+
+    def delete_collection(self):
+        with self._lock:
+            self._size = 0
+            self._set_dim(self.embedding_dim)
+            self._ids, self._rows, self._positions = [], [], {}
+            self._masks.clear()
+            self._dirty = False
+            self.manifest_path.unlink(missing_ok=True)
+            self._remove_files()
+            self._generation = 0
+            self._log_vectors = 0
+            self._log_entries = 0
+        logger.info(f"Collection at {self.path} deleted")
+
+    def close(self):
+        try:
+            self.save()
+        except Exception as e:
+            logger.error(f"Error saving vectors: {str(e)}")
+        if self._exact is not None:
+            self._exact.clear()
+        self.source_store.close()
@@ -0,0 +1,220 @@
+"""Compact in-memory encodings of normalized vectors, used by NumpyVectorDB.
+
+A codec turns L2-normalized float32 vectors into fixed-width rows of
+codes and estimates the cosine similarity of queries to those rows:
+
+- ``float32``: the vectors themselves (4 bytes per dimension, exact)
+- ``float16``: half precision (2 bytes per dimension)
+- ``int8``: each row scaled by its largest component (1 byte per dimension)
+- ``binary``: one sign bit per dimension, compared by Hamming distance
+
+The exact vectors behind lossy codes are kept on disk in an
+``ExactVectorFile`` so the best candidates can be re-scored in float32.
+"""
+
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8", "binary")
+
+# Default candidates re-scored per requested result; sign bits rank
+# neighbours far more coarsely than float16 or int8 codes
+RESCORE_FACTORS = {"float32": 1, "float16": 4, "int8": 4, "binary": 40}
+
+# Rows decoded to float32 at a time while scoring
+BLOCK_ROWS = 8192
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(codes: np.ndarray) -> np.ndarray:
+        return _POPCOUNT_TABLE[codes]
+
+
+class VectorCodec:
+    """Stores vectors unchanged as float32."""
+
+    dtype = np.float32
+    exact = True
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    @property
+    def width(self) -> int:
+        """Codes per row."""
+        return self.dim
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.width * np.dtype(self.dtype).itemsize
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.asarray(vectors, dtype=self.dtype)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.asarray(codes, dtype=np.float32)
+
+    def similarities(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Estimated cosine similarity of each normalized query to each row, shape (m, n)."""
+        if self.exact:
+            return queries @ codes.T
+
+        similarities = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), BLOCK_ROWS):
+            block = self.decode(codes[start:start + BLOCK_ROWS])
+            similarities[:, start:start + len(block)] = queries @ block.T
+        return similarities
+
+
+class Float16Codec(VectorCodec):
+    dtype = np.float16
+    exact = False
+
+
+class Int8Codec(VectorCodec):
+    """Rows of int8 codes followed by the row's float32 scale in four more bytes."""
+
+    dtype = np.int8
+    exact = False
+
+    @property
+    def width(self) -> int:
+        return self.dim + 4
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        scales = np.abs(vectors).max(axis=1, keepdims=True) / 127
+        scales[scales == 0] = 1
+
+        codes = np.empty((len(vectors), self.width), dtype=np.int8)
+        codes[:, :self.dim] = np.rint(vectors / scales)
+        codes[:, self.dim:] = scales.view(np.int8)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes[:, :self.dim].astype(np.float32) * codes[:, self.dim:].view(np.float32)
+
+    def similarities(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        # Scale the (m, n) products rather than decoding all n * dim codes
+        similarities = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), BLOCK_ROWS):
+            block = codes[start:start + BLOCK_ROWS]
+            scales = block[:, self.dim:].view(np.float32).T
+            similarities[:, start:start + len(block)] = (queries @ block[:, :self.dim].astype(np.float32).T) * scales
+        return similarities
+
+
+class BinaryCodec(VectorCodec):
+    """Packed sign bits; similarity is estimated from the Hamming distance."""
+
+    dtype = np.uint8
+    exact = False
+
+    @property
+    def width(self) -> int:
+        return (self.dim + 7) // 8
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        signs = np.unpackbits(codes, axis=1, count=self.dim).astype(np.float32)
+        return (2 * signs - 1) / np.sqrt(self.dim)
+
+    def similarities(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        similarities = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for i, bits in enumerate(self.encode(queries)):
+            distances = _popcount(np.bitwise_xor(codes, bits)).sum(axis=1, dtype=np.int32)
+            # Angle between sign vectors ~ pi * (fraction of differing bits)
+            similarities[i] = np.cos(np.pi * distances / self.dim)
+        return similarities
+
+
+CODECS = {
+    "float32": VectorCodec,
+    "float16": Float16Codec,
+    "int8": Int8Codec,
+    "binary": BinaryCodec
+}
+
+
+def make_codec(precision: str, dim: int) -> VectorCodec:
+    if precision not in CODECS:
+        raise ValueError(f"Unknown vector precision '{precision}', expected one of {', '.join(PRECISIONS)}")
+    return CODECS[precision](dim)
+
+
+class ExactVectorFile:
+    """Float32 rows in a flat scratch file, read through a memory map.
+
+    Rows are addressed by position like the in-memory codes and mirror
+    their writes, moves and truncation, so re-scoring reads only the
+    candidate rows and the full-precision copy costs page cache rather
+    than process memory.
+    """
+
+    def __init__(self, path: Path, dim: int):
+        self.path = path
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self._map = None
+
+    def __len__(self) -> int:
+        return self.path.stat().st_size // self.row_bytes if self.path.exists() else 0
+
+    def rows(self) -> np.ndarray:
+        """Read-only view of all rows."""
+        size = len(self)
+        if self._map is None or len(self._map) != size:
+            self._map = None
+            if size == 0:
+                return np.empty((0, self.dim), dtype=np.float32)
+            self._map = np.memmap(self.path, dtype=np.float32, mode="r", shape=(size, self.dim))
+        return self._map
+
+    def read(self, positions: np.ndarray) -> np.ndarray:
+        return np.asarray(self.rows()[positions])
+
+    def write(self, positions: List[int], vectors: np.ndarray):
+        """Write rows at ``positions``, extending the file for new positions."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "r+b" if self.path.exists() else "wb") as f:
+            start = 0
+            while start < len(positions):
+                # Consecutive positions, such as appended rows, go out in one write
+                stop = start + 1
+                while stop < len(positions) and positions[stop] == positions[stop - 1] + 1:
+                    stop += 1
+                f.seek(positions[start] * self.row_bytes)
+                f.write(vectors[start:stop].tobytes())
+                start = stop
+
+    def copy_from(self, vectors: np.ndarray):
+        """Replace the contents with ``vectors``, block by block."""
+        self.clear()
+        for start in range(0, len(vectors), BLOCK_ROWS):
+            block = vectors[start:start + BLOCK_ROWS]
+            self.write(list(range(start, start + len(block))), block)
+
+    def move_and_truncate(self, moves: List[Tuple[int, int]], size: int):
+        """Copy rows ``source -> target`` in order, then keep the first ``size`` rows."""
+        self._map = None
+        if not self.path.exists():
+            return
+        with open(self.path, "r+b") as f:
+            for source, target in moves:
+                f.seek(source * self.row_bytes)
+                row = f.read(self.row_bytes)
+                f.seek(target * self.row_bytes)
+                f.write(row)
+            f.truncate(size * self.row_bytes)
+
+    def clear(self):
+        self._map = None
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,66 @@
+import json
+from typing import Any, Dict, List
+
+from src.vector_database.source_store import SourceStore
+
+# Fields returned with each search result
+RESULT_FIELDS = [
+    "content", "source_file", "source_type", "source_id", "page_number",
+    "chunk_index", "start_char", "end_char", "metadata", "embedding_model"
+]
+
+
+def _optional(value: Any) -> Any:
+    """Map the -1 stored for missing int fields back to None."""
+    return None if value == -1 else value
+
+
+def format_result(chunk_id: str, score: float, entity: Dict[str, Any]) -> Dict[str, Any]:
+    """A search result, from a stored row's RESULT_FIELDS."""
+    return {
+        'id': chunk_id,
+        'score': score,
+        'content': entity['content'],
+        'source_id': entity.get('source_id'),
+        'citation': {
+            'source_file': entity['source_file'],
+            'source_type': entity['source_type'],
+            'page_number': _optional(entity['page_number']),
+            'chunk_index': entity['chunk_index'],
+            'start_char': _optional(entity['start_char']),
+            'end_char': _optional(entity['end_char']),
+        },
+        'metadata': entity['metadata'],
+        'embedding_model': entity['embedding_model']
+    }
+
+
+def format_chunk(row: Dict[str, Any]) -> Dict[str, Any]:
+    """A chunk as returned by get_chunks_by_ids."""
+    metadata = row.get("metadata") or {}
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            metadata = {}
+
+    return {
+        "id": row.get("id"),
+        "content": row.get("content"),
+        "metadata": metadata,
+        "source_id": row.get("source_id"),
+        "source_file": row.get("source_file"),
+        "source_type": row.get("source_type"),
+        "page_number": _optional(row.get("page_number")),
+        "chunk_index": row.get("chunk_index")
+    }
+
+
+def join_source_metadata(source_store: SourceStore, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge source-level metadata into the metadata of the given results."""
+    sources = source_store.get_many(result.get('source_id') for result in results)
+    for result in results:
+        source_metadata = sources.get(result.get('source_id'))
+        if source_metadata:
+            result['metadata'] = {**source_metadata, **(result.get('metadata') or {})}
+    return results
@@ -0,0 +1,112 @@
+"""Benchmark of single-phase vs two-phase retrieval on Milvus Lite.
+
+Run with ``python -m src.vector_database.retrieval_benchmark [--chunks 20000]``.
+A temporary collection is filled with random vectors and ~1000-character
+chunks. For each ``top_k`` the full search (content and citation fields
+for every hit) is timed against an id-only search followed by one batched
+query that hydrates the ``--keep`` best hits, which is what the RAG
+generator uses from a search.
+"""
+
+import argparse
+import json
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+from src.document_processing.chunk_batch import ChunkBatch
+from src.document_processing.chunking_benchmark import make_prose
+from src.document_processing.doc_processor import DocumentChunk
+from src.vector_database.milvus_vector_db import MilvusVectorDB
+
+
+def _fill(vector_db: MilvusVectorDB, count: int, dim: int, seed: int = 0) -> None:
+    text = make_prose(count * 1000, seed)
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, 2000):
+        stop = min(start + 2000, count)
+        chunks = [
+            DocumentChunk(
+                content=text[i * 1000:(i + 1) * 1000],
+                source_file=f"document_{i // 500}.pdf",
+                source_type="pdf",
+                page_number=i % 500 // 5 + 1,
+                chunk_index=i % 5,
+                start_char=(i % 5) * 1000,
+                end_char=(i % 5) * 1000 + 999,
+                metadata={'total_pages': 100}
+            )
+            for i in range(start, stop)
+        ]
+        batch = ChunkBatch.from_chunks(chunks)
+        vectors = rng.standard_normal((len(batch), dim)).astype(np.float32)
+        batch.embeddings = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        batch.embedding_model = "random"
+        vector_db.upsert_batch(batch)
+
+
+def _time(fn: Callable[[List[float]], list], queries: List[List[float]]) -> float:
+    """Mean seconds per query."""
+    started = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - started) / len(queries)
+
+
+def run(count: int, dim: int, top_ks: List[int], keep: int, queries: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        vector_db = MilvusVectorDB(
+            db_path=str(Path(tmp) / "bench.db"),
+            collection_name="retrieval_benchmark",
+            embedding_dim=dim
+        )
+        try:
+            _fill(vector_db, count, dim)
+            vector_db.create_index()
+
+            rng = random.Random(1)
+            query_vectors = [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(queries)]
+
+            print(f"{count} chunks, dim {dim}, hydrating {keep} hits, {queries} queries")
+            print(f"{'top_k':>6}{'full ms':>10}{'2-phase ms':>12}{'full KB':>10}{'2-phase KB':>12}")
+            for top_k in top_ks:
+                def full(query):
+                    return vector_db.search(query, limit=top_k)[:keep]
+
+                def two_phase(query):
+                    return vector_db.hydrate(vector_db.search_ids(query, limit=top_k)[:keep])
+
+                # Warm up both paths before timing
+                full(query_vectors[0])
+                two_phase(query_vectors[0])
+
+                full_time = _time(full, query_vectors)
+                two_phase_time = _time(two_phase, query_vectors)
+                full_payload = len(json.dumps(vector_db.search(query_vectors[0], limit=top_k), default=str))
+                two_phase_payload = (
+                    len(json.dumps(vector_db.search_ids(query_vectors[0], limit=top_k)))
+                    + len(json.dumps(two_phase(query_vectors[0]), default=str))
+                )
+                print(
+                    f"{top_k:>6}{full_time * 1000:>10.2f}{two_phase_time * 1000:>12.2f}"
+                    f"{full_payload / 1024:>10.1f}{two_phase_payload / 1024:>12.1f}"
+                )
+        finally:
+            vector_db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--keep", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    run(args.chunks, args.dim, args.top_k, args.keep, args.queries)
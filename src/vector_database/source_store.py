@@ -0,0 +1,88 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def source_id_for(source_file: str) -> str:
+    """Stable id of a source, stored on each of its vector rows."""
+    return hashlib.sha256(source_file.encode("utf-8")).hexdigest()[:32]
+
+
+class SourceStore:
+    """Per-source metadata kept beside a vector collection.
+
+    Metadata that is the same for every chunk of a source (page count,
+    title, description, keywords, ...) is stored once here, keyed by source
+    id, instead of in every vector row. Searches join it back in only for
+    the chunks that end up being cited.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sources (
+                source_id TEXT PRIMARY KEY,
+                source_file TEXT NOT NULL,
+                source_type TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def put(self, source_file: str, source_type: str, metadata: Dict[str, Any]) -> str:
+        source_id = source_id_for(source_file)
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO sources
+                   (source_id, source_file, source_type, metadata, updated_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (source_id, source_file, source_type, json.dumps(metadata, default=str), time.time())
+            )
+            self._conn.commit()
+        return source_id
+
+    def get(self, source_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([source_id]).get(source_id)
+
+    def get_many(self, source_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Metadata of each known source id; unknown ids are left out."""
+        ids = sorted({source_id for source_id in source_ids if source_id})
+        if not ids:
+            return {}
+
+        placeholders = ", ".join("?" for _ in ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT source_id, metadata FROM sources WHERE source_id IN ({placeholders})",
+                ids
+            ).fetchall()
+        return {source_id: json.loads(metadata) for source_id, metadata in rows}
+
+    def delete(self, source_file: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sources WHERE source_id = ?", (source_id_for(source_file),))
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(metadata)), 0) FROM sources"
+            ).fetchone()
+        return {"sources": count, "metadata_bytes": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,207 @@
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, TYPE_CHECKING
+
+from src.vector_database.numpy_vector_db import NumpyVectorDB
+
+if TYPE_CHECKING:
+    from src.embeddings.embedding_generator import EmbeddedChunk
+    from src.document_processing.chunk_batch import ChunkBatch
+
+logger = logging.getLogger(__name__)
+
+
+class TieredVectorDB:
+    """VectorStore using exact NumPy search for small collections, Milvus Lite above a threshold.
+
+    A collection starts in a NumpyVectorDB. When a write would take it past
+    ``max_exact_chunks`` rows, everything is copied into a MilvusVectorDB,
+    which serves all later calls. Both share one source store. The move is
+    committed by writing ``<milvus_path>.complete`` once the copy is flushed
+    and the NumPy files are removed, and a committed Milvus database is used
+    from the start. A Milvus database left by an interrupted move is
+    discarded in favour of the NumPy collection it was copied from.
+    ``precision``, ``rescore`` and ``rescore_factor`` are passed to both
+    backends. Writes, and the move they may trigger, hold one lock.
+    """
+
+    def __init__(
+        self,
+        vectors_path: str,
+        milvus_path: str,
+        collection_name: str,
+        source_store_path: str,
+        embedding_dim: int = 384,
+        max_exact_chunks: int = 20000,
+        precision: str = "float32",
+        rescore: bool = True,
+        rescore_factor: Optional[int] = None
+    ):
+        self.milvus_path = milvus_path
+        self.collection_name = collection_name
+        self.source_store_path = source_store_path
+        self.embedding_dim = embedding_dim
+        self.max_exact_chunks = max_exact_chunks
+        self.precision = precision
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+        self._lock = threading.Lock()
+
+        if self.migrated_marker.exists():
+            self.backend = self._open_milvus()
+            return
+
+        exact = NumpyVectorDB(
+            path=vectors_path,
+            embedding_dim=embedding_dim,
+            source_store_path=source_store_path,
+            precision=precision,
+            rescore=rescore,
+            rescore_factor=rescore_factor
+        )
+        if not Path(milvus_path).exists():
+            self.backend = exact
+        elif len(exact):
+            # The NumPy files are only removed once the copy is complete
+            logger.warning(f"{collection_name}: discarding Milvus database from an interrupted move")
+            self._remove_milvus_files()
+            self.backend = exact
+        else:
+            # The move finished but was not marked, or predates the marker
+            exact.close()
+            self._mark_migrated()
+            self.backend = self._open_milvus()
+
+    @property
+    def is_exact(self) -> bool:
+        return isinstance(self.backend, NumpyVectorDB)
+
+    @property
+    def collection_exists(self) -> bool:
+        return self.backend.collection_exists
+
+    @property
+    def migrated_marker(self) -> Path:
+        return Path(f"{self.milvus_path}.complete")
+
+    def _mark_migrated(self):
+        with open(self.migrated_marker, "w") as f:
+            f.write(self.collection_name)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _remove_milvus_files(self):
+        milvus_path = Path(self.milvus_path)
+        if milvus_path.is_dir():
+            shutil.rmtree(milvus_path)
+        else:
+            milvus_path.unlink(missing_ok=True)
+        # Milvus Lite keeps a lock file beside the database
+        Path(milvus_path.parent, f".{milvus_path.name}.lock").unlink(missing_ok=True)
+
+    def _open_milvus(self):
+        from src.vector_database.milvus_vector_db import MilvusVectorDB
+
+        return MilvusVectorDB(
+            db_path=self.milvus_path,
+            collection_name=self.collection_name,
+            embedding_dim=self.embedding_dim,
+            source_store_path=self.source_store_path,
+            precision=self.precision,
+            rescore=self.rescore,
+            rescore_factor=self.rescore_factor
+        )
+
+    def _make_room(self, incoming: int):
+        """Move to Milvus if ``incoming`` more rows would pass the threshold.
+
+        Called with ``self._lock`` held, by the write that needs the room.
+        """
+        if not self.is_exact or len(self.backend) + incoming <= self.max_exact_chunks:
+            return
+
+        exact = self.backend
+        self.embedding_dim = exact.embedding_dim
+        logger.info(
+            f"{self.collection_name}: {len(exact)} + {incoming} chunks exceed "
+            f"{self.max_exact_chunks}, moving to Milvus"
+        )
+
+        # Left over from an earlier move that failed part way
+        self._remove_milvus_files()
+        milvus = self._open_milvus()
+        try:
+            milvus.create_index(use_binary_quantization=False)
+            for rows in exact.export_rows():
+                milvus.upsert_rows(rows)
+            milvus.client.flush(collection_name=self.collection_name)
+        except Exception:
+            milvus.close()
+            self._remove_milvus_files()
+            raise
+
+        exact.delete_collection()
+        exact.close()
+        self._mark_migrated()
+        self.backend = milvus
+
+    def create_index(self, **kwargs):
+        self.backend.create_index(**kwargs)
+
+    def insert_embeddings(self, embedded_chunks: List["EmbeddedChunk"]) -> List[str]:
+        with self._lock:
+            self._make_room(len(embedded_chunks))
+            return self.backend.insert_embeddings(embedded_chunks)
+
+    def upsert_embeddings(self, embedded_chunks: List["EmbeddedChunk"]) -> List[str]:
+        with self._lock:
+            self._make_room(len(embedded_chunks))
+            return self.backend.upsert_embeddings(embedded_chunks)
+
+    def upsert_batch(self, batch: "ChunkBatch", rows_per_request: int = 512) -> List[str]:
+        with self._lock:
+            self._make_room(len(batch))
+            return self.backend.upsert_batch(batch, rows_per_request)
+
+    def delete_embeddings(self, chunk_ids: List[str]) -> int:
+        with self._lock:
+            return self.backend.delete_embeddings(chunk_ids)
+
+    def delete_by_source(self, source_file: str) -> int:
+        with self._lock:
+            return self.backend.delete_by_source(source_file)
+
+    def iter_source(self, source_file: str, batch_size: int = 512) -> Iterator[List[Dict[str, Any]]]:
+        return self.backend.iter_source(source_file, batch_size)
+
+    def join_source_metadata(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.backend.join_source_metadata(results)
+
+    def search(self, query_vector: List[float], limit: int = 10, filter_expr: Optional[str] = None, **kwargs) -> List[Dict[str, Any]]:
+        return self.backend.search(query_vector, limit=limit, filter_expr=filter_expr, **kwargs)
+
+    def search_batch(self, query_vectors: List[List[float]], limit: int = 10, filter_expr: Optional[str] = None, **kwargs) -> List[List[Dict[str, Any]]]:
+        return self.backend.search_batch(query_vectors, limit=limit, filter_expr=filter_expr, **kwargs)
+
+    def search_ids(self, query_vector: List[float], limit: int = 10, filter_expr: Optional[str] = None, **kwargs) -> List[Dict[str, Any]]:
+        return self.backend.search_ids(query_vector, limit=limit, filter_expr=filter_expr, **kwargs)
+
+    def hydrate(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.backend.hydrate(hits)
+
+    def get_chunks_by_ids(self, chunk_ids: List[str]) -> List[Dict[str, Any]]:
+        return self.backend.get_chunks_by_ids(chunk_ids)
+
+    def get_chunk_by_id(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        return self.backend.get_chunk_by_id(chunk_id)
+
+    def delete_collection(self):
+        with self._lock:
+            self.backend.delete_collection()
+
+    def close(self):
+        with self._lock:
+            self.backend.close()
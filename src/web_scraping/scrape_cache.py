@@ -0,0 +1,275 @@
+import http.client
+import ipaddress
+import json
+import logging
+import socket
+import sqlite3
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+@dataclass
+class CachedPage:
+    """A scraped page stored in the scrape cache"""
+    url: str
+    markdown: str
+    metadata: Dict[str, Any]
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def normalize_url(url: str) -> str:
+    """Canonical cache key: lowercase scheme/host, no default port or fragment, sorted query."""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    
+    netloc = host
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parsed.port}"
+    
+    path = parsed.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+    
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, path, '', query, ''))
+
+
+def public_address(host: str, port: int) -> Optional[str]:
+    """An address ``host`` resolves to, or None unless every address it resolves to is public.
+    
+    Private, loopback, link-local, reserved and multicast addresses (including
+    IPv4-mapped IPv6 forms) are refused, so revalidation cannot be pointed at
+    internal services.
+    """
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError):
+        return None
+    
+    addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if getattr(ip, 'ipv4_mapped', None):
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            return None
+    return addresses[0] if addresses else None
+
+
+class _PinnedHTTPConnection(http.client.HTTPConnection):
+    """Connects to an already vetted address; the URL's host is still sent as Host."""
+    
+    def __init__(self, host: str, port: int, address: str, timeout: float):
+        super().__init__(host, port, timeout=timeout)
+        self.address = address
+    
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+
+class _PinnedHTTPSConnection(http.client.HTTPSConnection):
+    """Connects to an already vetted address and verifies the certificate for the URL's host."""
+    
+    def __init__(self, host: str, port: int, address: str, timeout: float):
+        super().__init__(host, port, timeout=timeout, context=ssl.create_default_context())
+        self.address = address
+    
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+def conditional_head_request(url: str, etag: Optional[str], last_modified: Optional[str], timeout: float = 5.0) -> bool:
+    """Return True when the server confirms (HTTP 304) that the page is unchanged.
+    
+    Only http(s) URLs whose host resolves to public addresses are revalidated,
+    over a connection pinned to the vetted address and without following
+    redirects; anything else is left to expire by TTL.
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parsed.hostname:
+        return False
+    
+    try:
+        port = parsed.port or DEFAULT_PORTS[scheme]
+    except ValueError:
+        return False
+    
+    address = public_address(parsed.hostname, port)
+    if address is None:
+        logger.debug(f"Not revalidating {url}: host does not resolve to a public address")
+        return False
+    
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    
+    connection_class = _PinnedHTTPSConnection if scheme == 'https' else _PinnedHTTPConnection
+    connection = connection_class(parsed.hostname, port, address, timeout)
+    path = urlunparse(('', '', parsed.path or '/', parsed.params, parsed.query, ''))
+    try:
+        connection.request('HEAD', path, headers=headers)
+        return connection.getresponse().status == 304
+    except Exception as e:
+        logger.debug(f"Revalidation request failed for {url}: {e}")
+        return False
+    finally:
+        connection.close()
+
+
+class ScrapeCache:
+    """Disk-backed cache of scraped markdown and metadata keyed by normalized URL.
+    
+    Entries are fresh for ``ttl_seconds``. A stale entry that carries
+    ETag/Last-Modified validators is revalidated with a conditional HEAD
+    request and reused on HTTP 304; otherwise it counts as a miss. Entries
+    older than ``max_age_seconds`` (default: 7 x TTL) are purged when the
+    cache opens and on every store, which also keeps at most
+    ``max_entries`` of the most recently fetched pages.
+    """
+    
+    def __init__(
+        self,
+        db_path: str = "./data/scrape_cache.sqlite",
+        ttl_seconds: float = 24 * 3600,
+        revalidate: Optional[Callable[[str, Optional[str], Optional[str]], bool]] = conditional_head_request,
+        max_entries: int = 5000,
+        max_age_seconds: Optional[float] = None
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.revalidate = revalidate
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds or ttl_seconds * 7
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0}
+        
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS scrape_cache (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                markdown TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scrape_cache_fetched_at ON scrape_cache (fetched_at)")
+        self._conn.commit()
+        self.purge_expired()
+        
+        logger.info(f"Scrape cache ready at {db_path} (ttl={ttl_seconds:.0f}s)")
+    
+    def get(self, url: str) -> Optional[CachedPage]:
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, markdown, metadata, fetched_at, etag, last_modified FROM scrape_cache WHERE url_key = ?",
+                (key,)
+            ).fetchone()
+        
+        if row is None:
+            self._count('misses')
+            return None
+        
+        page = CachedPage(
+            url=row[0],
+            markdown=row[1],
+            metadata=json.loads(row[2]),
+            fetched_at=row[3],
+            etag=row[4],
+            last_modified=row[5]
+        )
+        
+        if time.time() - page.fetched_at <= self.ttl_seconds:
+            self._count('hits')
+            return page
+        
+        has_validators = bool(page.etag or page.last_modified)
+        if has_validators and self.revalidate and self.revalidate(page.url, page.etag, page.last_modified):
+            page.fetched_at = time.time()
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE scrape_cache SET fetched_at = ? WHERE url_key = ?",
+                    (page.fetched_at, key)
+                )
+                self._conn.commit()
+            self._count('hits')
+            self._count('revalidated')
+            return page
+        
+        self._count('misses')
+        return None
+    
+    def put(self, url: str, markdown: str, metadata: Dict[str, Any]) -> None:
+        etag = self._find_header(metadata, ('etag',))
+        last_modified = self._find_header(metadata, ('last-modified', 'lastmodified', 'last_modified'))
+        
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO scrape_cache
+                   (url_key, url, markdown, metadata, etag, last_modified, fetched_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (normalize_url(url), url, markdown, json.dumps(metadata, default=str), etag, last_modified, time.time())
+            )
+            self._conn.commit()
+        self._count('stores')
+        self.purge_expired()
+    
+    def invalidate(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM scrape_cache WHERE url_key = ?", (normalize_url(url),))
+            self._conn.commit()
+    
+    def purge_expired(self, max_age_seconds: Optional[float] = None) -> int:
+        """Delete entries older than ``max_age_seconds`` and the oldest beyond ``max_entries``."""
+        cutoff = time.time() - (max_age_seconds or self.max_age_seconds)
+        with self._lock:
+            expired = self._conn.execute("DELETE FROM scrape_cache WHERE fetched_at < ?", (cutoff,)).rowcount
+            overflow = self._conn.execute(
+                """DELETE FROM scrape_cache WHERE url_key IN (
+                       SELECT url_key FROM scrape_cache ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+            self.stats['evictions'] += expired + overflow
+        return expired + overflow
+    
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+    
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+    
+    def _find_header(self, metadata: Dict[str, Any], names: tuple) -> Optional[str]:
+        for key, value in metadata.items():
+            if isinstance(key, str) and key.lower() in names and value:
+                return str(value)
+        return None
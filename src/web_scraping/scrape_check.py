@@ -0,0 +1,181 @@
+"""Checks for the scrape cache as used by ``WebScraper`` and ``crawl_site``.
+
+Run with ``python -m src.web_scraping.scrape_check``. ``FakeFirecrawl``
+stands in for the Firecrawl client through ``WebScraper``'s ``client``
+argument and serves pages from a dict, and revalidation goes through a
+recording stand-in for the conditional HEAD request, so no API key or
+network is needed. The checks cover cache hits and misses, revalidation of
+stale pages, TTL expiry, purging on open and on store, and the entry cap.
+The exit status is non-zero if any check fails.
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Set
+
+from src.web_scraping.scrape_cache import ScrapeCache
+from src.web_scraping.web_scraper import WebScraper
+
+SITE = "https://docs.example.com"
+
+
+class FakeFirecrawl:
+    """Answers ``scrape`` from ``pages`` and records every URL it is asked for."""
+
+    def __init__(self, pages: Dict[str, str]):
+        self.pages = pages
+        self.requests: List[str] = []
+        self._lock = threading.Lock()
+
+    def scrape(self, url: str, formats=None, timeout=None):
+        with self._lock:
+            self.requests.append(url)
+        if url not in self.pages:
+            raise ValueError(f"404 for {url}")
+        metadata = {"title": url.rsplit("/", 1)[-1] or "home", "ETag": f'"{len(self.pages[url])}"'}
+        return SimpleNamespace(markdown=self.pages[url], metadata_dict=metadata)
+
+    def count(self, url: str) -> int:
+        with self._lock:
+            return self.requests.count(url)
+
+
+class FakeRevalidator:
+    """Reports URLs in ``unchanged`` as not modified (HTTP 304)."""
+
+    def __init__(self):
+        self.unchanged: Set[str] = set()
+        self.calls: List[str] = []
+
+    def __call__(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> bool:
+        self.calls.append(url)
+        return url in self.unchanged
+
+
+class Checker:
+    def __init__(self):
+        self.failures: List[str] = []
+        self.passed = 0
+
+    def check(self, name: str, condition: bool, detail: str = ""):
+        if condition:
+            self.passed += 1
+        else:
+            self.failures.append(f"{name}: {detail}" if detail else name)
+
+
+def site_pages() -> Dict[str, str]:
+    """A small site: a home page linking to three guides, one a reflowed copy of another."""
+    body = "Vector search retrieves the chunks closest to a query embedding. " * 20
+    return {
+        f"{SITE}/": f"# Docs\n\n[Intro]({SITE}/intro) [Setup]({SITE}/setup) [Copy]({SITE}/setup-copy)\n",
+        f"{SITE}/intro": "# Intro\n\n" + "Sessions keep their own vector store and sources. " * 20,
+        f"{SITE}/setup": "# Setup\n\n" + body,
+        f"{SITE}/setup-copy": "# Setup\n\n" + body.replace(". ", ".\n"),
+    }
+
+
+def _age(cache: ScrapeCache, seconds: float) -> None:
+    """Move every entry's fetch time ``seconds`` into the past."""
+    connection = sqlite3.connect(cache.db_path)
+    connection.execute("UPDATE scrape_cache SET fetched_at = fetched_at - ?", (seconds,))
+    connection.commit()
+    connection.close()
+
+
+def run(ttl_seconds: float) -> bool:
+    checker = Checker()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "scrape_cache.sqlite")
+        pages = site_pages()
+        client = FakeFirecrawl(pages)
+        revalidator = FakeRevalidator()
+        cache = ScrapeCache(db_path=db_path, ttl_seconds=ttl_seconds, revalidate=revalidator)
+        scraper = WebScraper("fake-key", cache=cache, client=client)
+
+        # A first crawl misses on every page and stores it
+        crawled = dict(scraper.crawl_site(f"{SITE}/", max_depth=1, max_concurrency=2,
+                                          requests_per_second_per_domain=0))
+        checker.check("crawl fetches every page once", all(client.count(url) == 1 for url in pages),
+                      repr(client.requests))
+        checker.check("duplicate page skipped", len(crawled) == len(pages) - 1
+                      and (f"{SITE}/setup" in crawled) != (f"{SITE}/setup-copy" in crawled), repr(sorted(crawled)))
+        stats = cache.get_stats()
+        checker.check("crawl misses and stores", stats["misses"] == len(pages) and stats["stores"] == len(pages), repr(stats))
+
+        # A second crawl within the TTL is served from the cache
+        again = dict(scraper.crawl_site(f"{SITE}/", max_depth=1, max_concurrency=2,
+                                        requests_per_second_per_domain=0))
+        checker.check("recrawl hits the cache", len(client.requests) == len(pages), f"{len(client.requests)} requests")
+        checker.check("recrawl yields the same pages", sorted(again) == sorted(crawled))
+        checker.check("recrawl counts hits", cache.get_stats()["hits"] == len(pages), repr(cache.get_stats()))
+
+        # The cache key is the normalized URL
+        chunks = scraper.scrape_url(f"{SITE.upper()}/intro/#top")
+        checker.check("normalized URL hits", client.count(f"{SITE.upper()}/intro/#top") == 0 and bool(chunks))
+
+        # Past the TTL, unchanged pages are revalidated and changed ones refetched
+        _age(cache, ttl_seconds * 2)
+        revalidator.unchanged = {f"{SITE}/intro"}
+        pages[f"{SITE}/setup"] = "# Setup\n\nRewritten setup guide."
+        intro = scraper.scrape_url(f"{SITE}/intro")
+        setup = scraper.scrape_url(f"{SITE}/setup")
+        checker.check("stale pages revalidated", sorted(revalidator.calls) == [f"{SITE}/intro", f"{SITE}/setup"],
+                      repr(revalidator.calls))
+        checker.check("304 reuses the cached page", client.count(f"{SITE}/intro") == 1 and bool(intro))
+        checker.check("modified page refetched", client.count(f"{SITE}/setup") == 2
+                      and "Rewritten" in setup[0].content)
+        checker.check("revalidation counted", cache.get_stats()["revalidated"] == 1, repr(cache.get_stats()))
+        checker.check("revalidated page is fresh again", cache.get(f"{SITE}/intro") is not None
+                      and len(revalidator.calls) == 2)
+
+        # Without validators a stale page is simply a miss
+        cache.revalidate = None
+        _age(cache, ttl_seconds * 2)
+        scraper.scrape_url(f"{SITE}/intro")
+        checker.check("expired page refetched", client.count(f"{SITE}/intro") == 2)
+
+        # Entries past max age are purged on store and when the cache opens
+        before = cache.get_stats()["evictions"]
+        _age(cache, cache.max_age_seconds + 1)
+        scraper.scrape_url(f"{SITE}/setup")
+        checker.check("store purges aged entries", cache.get(f"{SITE}/") is None
+                      and cache.get(f"{SITE}/setup") is not None
+                      and cache.get_stats()["evictions"] > before, repr(cache.get_stats()))
+        cache.close()
+
+        _age(cache, cache.max_age_seconds + 1)
+        reopened = ScrapeCache(db_path=db_path, ttl_seconds=ttl_seconds, revalidate=None, max_entries=2)
+        checker.check("open purges aged entries", reopened.get_stats()["evictions"] >= 1
+                      and reopened.get(f"{SITE}/setup") is None)
+
+        # The entry cap keeps the most recently fetched pages
+        for i in range(5):
+            reopened.put(f"{SITE}/page{i}", f"page {i}", {})
+            time.sleep(0.01)
+        kept = [i for i in range(5) if reopened.get(f"{SITE}/page{i}") is not None]
+        checker.check("entry cap keeps the newest", kept == [3, 4], repr(kept))
+        reopened.close()
+
+    total = checker.passed + len(checker.failures)
+    print(f"{checker.passed}/{total} checks passed")
+    for failure in checker.failures:
+        print(f"FAIL {failure}")
+    return not checker.failures
+
+
+if __name__ == "__main__":
+    import logging
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ttl", type=float, default=3600.0, help="cache TTL in seconds")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    sys.exit(0 if run(args.ttl) else 1)
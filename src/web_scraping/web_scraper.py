@@ -1,18 +1,50 @@
 import logging
 import os
-from typing import List, Dict, Any, Optional
+import re
+import hashlib
+import threading
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from dataclasses import dataclass
 from pathlib import Path
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse, urljoin, urldefrag
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 import time
 from datetime import datetime
 
-from firecrawl import Firecrawl
 from src.document_processing.doc_processor import DocumentChunk
+from src.document_processing.chunking import TextChunker, MARKDOWN_BOUNDARIES
+from src.web_scraping.scrape_cache import ScrapeCache, normalize_url
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MARKDOWN_LINK_PATTERN = re.compile(r'\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)')
+NON_HTML_EXTENSIONS = {
+    '.pdf', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico',
+    '.zip', '.gz', '.tar', '.mp3', '.mp4', '.mov', '.css', '.js', '.xml', '.json'
+}
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles, for near-duplicate page detection."""
+    words = text.lower().split()
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if (value >> bit) & 1 else -1
+    
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
 
 @dataclass
 class WebPageData:
@@ -25,12 +57,51 @@ class WebPageData:
     error: Optional[str] = None
 
 
+class DomainRateLimiter:
+    """Per-domain token buckets shared by concurrent scrape workers"""
+    
+    def __init__(self, requests_per_second: float, burst: int = 1):
+        self.requests_per_second = requests_per_second
+        self.burst = max(1, burst)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, domain: str) -> None:
+        """Block until a request to ``domain`` is allowed."""
+        if self.requests_per_second <= 0:
+            return
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(domain, (float(self.burst), now))
+                tokens = min(float(self.burst), tokens + (now - last) * self.requests_per_second)
+                
+                if tokens >= 1:
+                    self._buckets[domain] = (tokens - 1, now)
+                    return
+                
+                self._buckets[domain] = (tokens, now)
+                wait = (1 - tokens) / self.requests_per_second
+            
+            time.sleep(wait)
+
+
 class WebScraper:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        cache: Optional[ScrapeCache] = None,
+        client: Any = None
+    ):
         self.api_key = api_key
-        self.app = Firecrawl(api_key=api_key)
+        if client is None:
+            from firecrawl import Firecrawl
+            client = Firecrawl(api_key=api_key)
+        self.app = client
+        self.cache = cache
         
-        logger.info("WebScraper initialized with Firecrawl")
+        logger.info(f"WebScraper initialized with Firecrawl (cache {'enabled' if cache else 'disabled'})")
     
     def scrape_url(
         self,
@@ -46,13 +117,8 @@ class WebScraper:
         logger.info(f"Scraping URL: {url}")
         
         try:
-            scrape_params = {
-                'formats': ['markdown', 'html'],
-                'timeout': wait_for_results * 1000
-            }
-            
-            result = self.app.scrape(url, **scrape_params)
-            page_data = self._process_firecrawl_result(result, url)
+            content, metadata_dict = self._fetch_page(url, wait_for_results * 1000)
+            page_data = self._process_firecrawl_result(content, metadata_dict, url)
             
             chunks = self._create_chunks_from_web_content(
                 page_data, 
@@ -67,10 +133,25 @@ class WebScraper:
             logger.error(f"Error scraping URL {url}: {str(e)}")
             raise
     
-    def _process_firecrawl_result(self, result: Dict[str, Any], url: str) -> WebPageData:
+    def _fetch_page(self, url: str, timeout_ms: int) -> Tuple[str, Dict[str, Any]]:
+        """Return page markdown and metadata, from the cache when possible."""
+        if self.cache:
+            cached = self.cache.get(url)
+            if cached is not None:
+                logger.info(f"Scrape cache hit: {url}")
+                return cached.markdown, cached.metadata
+        
+        result = self.app.scrape(url, formats=['markdown'], timeout=timeout_ms)
+        content = result.markdown or ""
+        metadata_dict = dict(result.metadata_dict or {})
+        
+        if self.cache and content:
+            self.cache.put(url, content, metadata_dict)
+        
+        return content, metadata_dict
+    
+    def _process_firecrawl_result(self, content: str, metadata_dict: Dict[str, Any], url: str) -> WebPageData:
         try:
-            content = result.markdown
-            metadata_dict = result.metadata_dict
             metadata = {
                 'scraped_at': datetime.now().isoformat(),
                 'original_url': url,
@@ -115,29 +196,19 @@ class WebScraper:
         
         chunks = []
         content = page_data.content
-        start = 0
-        chunk_index = 0
-        
-        while start < len(content):
-            end = min(start + chunk_size, len(content))
-            if end < len(content):
-                last_double_newline = content.rfind('\n\n', start, end)
-                if last_double_newline > start + chunk_size * 0.3:
-                    end = last_double_newline + 2
-                else:
-                    last_period = content.rfind('.', start, end)
-                    if last_period > start + chunk_size * 0.5:
-                        end = last_period + 1
-            
-            chunk_text = content[start:end].strip()
+        chunker = TextChunker(chunk_size, chunk_overlap, MARKDOWN_BOUNDARIES)
+        
+        for span in chunker.split(content):
+            chunk_text = content[span.start:span.end].strip()
             
             if chunk_text:
-                chunk_metadata = page_data.metadata.copy()
-                chunk_metadata.update({
-                    'chunk_character_start': start,
-                    'chunk_character_end': end - 1,
+                chunk_index = len(chunks)
+                chunk_metadata = {
+                    **page_data.metadata,
+                    'chunk_character_start': span.start,
+                    'chunk_character_end': span.end - 1,
                     'url_fragment': f"{page_data.url}#chunk-{chunk_index}"
-                })
+                }
                 
                 chunk = DocumentChunk(
                     content=chunk_text,
@@ -145,15 +216,12 @@ class WebScraper:
                     source_type='web',
                     page_number=None,
                     chunk_index=chunk_index,
-                    start_char=start,
-                    end_char=end-1,
+                    start_char=span.start,
+                    end_char=span.end-1,
                     metadata=chunk_metadata
                 )
                 
                 chunks.append(chunk)
-                chunk_index += 1
-            
-            start = max(start + chunk_size - chunk_overlap, end)
         
         return chunks
     
@@ -162,37 +230,170 @@ class WebScraper:
         urls: List[str],
         chunk_size: int = 1000,
         chunk_overlap: int = 100,
-        delay_between_requests: float = 1.0
+        delay_between_requests: float = 1.0,
+        max_concurrency: int = 5
     ) -> List[List[DocumentChunk]]:
+        """Scrape URLs concurrently; results keep the order of ``urls``.
         
-        all_chunks = []
-        for i, url in enumerate(urls):
-            try:
-                chunks = self.scrape_url(url, chunk_size, chunk_overlap)
-                all_chunks.append(chunks)
-                logger.info(f"Successfully scraped {url}: {len(chunks)} chunks")
-                
-                if i < len(urls) - 1:
-                    time.sleep(delay_between_requests)
-                    
-            except Exception as e:
-                logger.error(f"Failed to scrape {url}: {str(e)}")
-                all_chunks.append([])
+        ``delay_between_requests`` is the minimum spacing between requests to
+        the same domain; different domains are scraped in parallel.
+        """
+        results: Dict[str, List[DocumentChunk]] = {}
+        for url, chunks, error in self.iter_scrape_urls(
+            urls,
+            chunk_size,
+            chunk_overlap,
+            max_concurrency=max_concurrency,
+            requests_per_second_per_domain=1.0 / delay_between_requests if delay_between_requests > 0 else 0
+        ):
+            results[url] = chunks or []
         
+        all_chunks = [results.get(url, []) for url in urls]
         total_chunks = sum(len(chunks) for chunks in all_chunks)
         logger.info(f"Batch scraping complete: {total_chunks} total chunks from {len(urls)} URLs")
         
         return all_chunks
     
+    def iter_scrape_urls(
+        self,
+        urls: List[str],
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100,
+        max_concurrency: int = 5,
+        requests_per_second_per_domain: float = 1.0,
+        burst_per_domain: int = 2
+    ) -> Iterator[Tuple[str, Optional[List[DocumentChunk]], Optional[Exception]]]:
+        """Scrape URLs concurrently and yield ``(url, chunks, error)`` as each page finishes.
+        
+        Scraping and chunking run together in worker threads, so extraction of
+        one page overlaps with fetching the next. Duplicate URLs are scraped once.
+        """
+        limiter = DomainRateLimiter(requests_per_second_per_domain, burst_per_domain)
+        unique_urls = list(dict.fromkeys(urls))
+        
+        def scrape(url: str) -> List[DocumentChunk]:
+            limiter.acquire(urlparse(url).netloc)
+            return self.scrape_url(url, chunk_size, chunk_overlap)
+        
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(unique_urls) or 1))) as executor:
+            futures = {executor.submit(scrape, url): url for url in unique_urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    chunks = future.result()
+                    logger.info(f"Successfully scraped {url}: {len(chunks)} chunks")
+                    yield url, chunks, None
+                except Exception as e:
+                    logger.error(f"Failed to scrape {url}: {str(e)}")
+                    yield url, None, e
+        
+        logger.info(f"Scraped {len(unique_urls)} URLs in {time.perf_counter() - started_at:.1f}s")
+    
+    def crawl_site(
+        self,
+        seed_url: str,
+        max_depth: int = 2,
+        max_pages: int = 50,
+        max_concurrency: int = 5,
+        same_domain: bool = True,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100,
+        requests_per_second_per_domain: float = 2.0,
+        near_duplicate_distance: int = 3
+    ) -> Iterator[Tuple[str, List[DocumentChunk]]]:
+        """Crawl a site breadth-first and yield ``(url, chunks)`` for each new page.
+        
+        The frontier is deduplicated on normalized URLs, at most ``max_pages``
+        pages are fetched, and pages whose content is an exact or SimHash
+        near-duplicate of an earlier page are skipped before they reach the
+        embedding step.
+        """
+        if not self._is_valid_url(seed_url):
+            raise ValueError(f"Invalid URL format: {seed_url}")
+        
+        seed_domain = urlparse(seed_url).netloc
+        limiter = DomainRateLimiter(requests_per_second_per_domain, burst=max_concurrency)
+        seen_urls = {normalize_url(seed_url)}
+        content_hashes = set()
+        simhashes: List[int] = []
+        fetched = 0
+        skipped = 0
+        
+        def fetch(url: str) -> Tuple[WebPageData, List[str]]:
+            limiter.acquire(urlparse(url).netloc)
+            content, metadata_dict = self._fetch_page(url, 30000)
+            return self._process_firecrawl_result(content, metadata_dict, url), self._extract_links(content, url)
+        
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            pending = {executor.submit(fetch, seed_url): (seed_url, 0)}
+            fetched = 1
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = pending.pop(future)
+                    try:
+                        page_data, links = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to crawl {url}: {str(e)}")
+                        continue
+                    
+                    # Expand the frontier
+                    if depth < max_depth:
+                        for link in links:
+                            if fetched >= max_pages:
+                                break
+                            if same_domain and urlparse(link).netloc != seed_domain:
+                                continue
+                            key = normalize_url(link)
+                            if key in seen_urls:
+                                continue
+                            seen_urls.add(key)
+                            pending[executor.submit(fetch, link)] = (link, depth + 1)
+                            fetched += 1
+                    
+                    # Skip exact and near-duplicate pages before chunking/embedding
+                    if not page_data.success or not page_data.content.strip():
+                        continue
+                    normalized_text = " ".join(page_data.content.split())
+                    content_hash = hashlib.sha256(normalized_text.encode()).hexdigest()
+                    fingerprint = simhash(normalized_text)
+                    if content_hash in content_hashes or any(
+                        hamming_distance(fingerprint, other) <= near_duplicate_distance for other in simhashes
+                    ):
+                        skipped += 1
+                        logger.info(f"Skipping duplicate page: {url}")
+                        continue
+                    content_hashes.add(content_hash)
+                    simhashes.append(fingerprint)
+                    
+                    chunks = self._create_chunks_from_web_content(page_data, chunk_size, chunk_overlap)
+                    if chunks:
+                        yield url, chunks
+        
+        logger.info(
+            f"Crawl of {seed_url} finished in {time.perf_counter() - started_at:.1f}s: "
+            f"{fetched} pages fetched, {skipped} duplicates skipped"
+        )
+    
+    def _extract_links(self, content: str, base_url: str) -> List[str]:
+        links = []
+        for match in MARKDOWN_LINK_PATTERN.finditer(content or ""):
+            link = urljoin(base_url, match.group(1).strip())
+            link, _ = urldefrag(link)
+            parsed = urlparse(link)
+            if parsed.scheme not in ('http', 'https'):
+                continue
+            if Path(parsed.path).suffix.lower() in NON_HTML_EXTENSIONS:
+                continue
+            links.append(link)
+        return list(dict.fromkeys(links))
+    
     def get_url_preview(self, url: str) -> Dict[str, Any]:
         try:
-            result = self.app.scrape(url, **{
-                'formats': ['markdown'],
-                'timeout': 10000
-            })
-            
-            content = result.markdown
-            metadata_dict = result.metadata_dict
+            content, metadata_dict = self._fetch_page(url, 10000)
             
             preview_info = {
                 'url': url,